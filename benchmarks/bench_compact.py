@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+vault清理基准测试
+构造包含大量vault的obsidian.json，其中一部分vault的文件夹已被删除：
+- 比较单线程与多线程检查所有vault路径的耗时（每次stat附加--latency-us延迟，模拟网络驱动器）
+- 清理前后obsidian.json的大小，以及之后一次打开（读取、解析、写入）的耗时
+
+用法: python benchmarks/bench_compact.py [--vaults N] [--dead-ratio R] [--latency-us N] [--workers N]
+"""
+import os
+import io
+import json
+import time
+import argparse
+import contextlib
+
+from common import make_fake_appdata, temp_dir, summarize, format_summary
+
+def time_open(opener, folder, runs):
+    """重复打开同一文件夹（读取、解析、写入obsidian.json）的耗时统计"""
+    samples = []
+    for _ in range(runs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            opener.register_folders([folder])
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="清理已不存在的vault")
+    parser.add_argument('--vaults', type=int, default=20000)
+    parser.add_argument('--dead-ratio', type=float, default=0.8)
+    parser.add_argument('--latency-us', type=float, default=200.0)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with temp_dir() as base:
+        appdata, config_path, _ = make_fake_appdata(base, vault_count=args.vaults)
+        os.environ['APPDATA'] = appdata
+        with open(config_path, 'r', encoding='utf-8') as f:
+            vaults = json.load(f)['vaults']
+        live_every = max(1, round(1 / max(1e-9, 1 - args.dead_ratio)))
+        for i, info in enumerate(vaults.values()):
+            if i % live_every == 0:
+                os.makedirs(info['path'])
+        folder = next(iter(vaults.values()))['path']
+
+        import main as opener
+        from fs_probe import PathProbe
+        from vault_compact import check_vaults, compact_obsidian_config
+
+        def slow_stat(path):
+            time.sleep(args.latency_us / 1e6)
+            return os.stat(path)
+
+        check_times = {}
+        for workers in (1, args.workers):
+            start = time.perf_counter()
+            states = check_vaults(vaults, workers, PathProbe(stat_func=slow_stat))
+            check_times[workers] = (time.perf_counter() - start) * 1000
+        dead = sum(1 for state in states.values() if state == 'dead')
+
+        before = time_open(opener, folder, args.runs)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = compact_obsidian_config(config_path, archive=False, workers=args.workers)
+        after = time_open(opener, folder, args.runs)
+
+    print(f"vault清理（{args.vaults}个vault，{dead}个已不存在，每次stat附加 {args.latency_us:g} us）")
+    for workers, ms in check_times.items():
+        print(f"检查所有vault路径（{workers}个线程）   {ms:10.2f} ms")
+    print(f"obsidian.json {result['bytes_before']} -> {result['bytes_after']} 字节，"
+          f"回收 {result['reclaimed']} 字节")
+    print(format_summary("open before compact", before))
+    print(format_summary("open after compact", after))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+文本补丁写入基准测试
+在数MB的合成obsidian.json上，比较完整解析/序列化与文本补丁两种方式打开一个已有vault
+和一个新文件夹的耗时、写入字节数和实际改动字节数
+
+用法: python benchmarks/bench_config_patch.py [--sizes 20000,100000] [--repeat N]
+"""
+import os
+import io
+import json
+import time
+import argparse
+import contextlib
+
+from common import make_fake_appdata, make_folders, temp_dir, summarize, format_summary
+
+def full_parse_open(folder_path):
+    """原来的流程：完整读取、修改、序列化并写回"""
+    import main
+    from vault_index import VaultIndex
+    config = main.read_obsidian_config()
+    index = VaultIndex(config)
+    main.clean_existing_open_flags(config, index)
+    main.add_vault_to_config(config, folder_path, index)
+    content = json.dumps(config, ensure_ascii=False, separators=(',', ':'))
+    from config_lock import atomic_write_text
+    atomic_write_text(main.get_obsidian_config_path(), content)
+    return len(content.encode('utf-8')), None
+
+def patch_open(folder_path):
+    """文本补丁流程"""
+    import main
+    from config_patch import build_patched_text
+    from config_lock import atomic_write_text
+    config_path = main.get_obsidian_config_path()
+    with open(config_path, 'r', encoding='utf-8') as file:
+        text = file.read()
+    new_text, _, changed = build_patched_text(text, [folder_path], main.generate_vault_id)
+    atomic_write_text(config_path, new_text)
+    return len(new_text.encode('utf-8')), changed
+
+def run(size, repeat):
+    results = []
+    with temp_dir() as base:
+        appdata, config_path, _ = make_fake_appdata(base, vault_count=size, extra_keys=True)
+        os.environ['APPDATA'] = appdata
+        existing = make_folders(os.path.join(base, 'existing'), 1)[0]
+        with open(config_path, 'r', encoding='utf-8') as file:
+            config = json.load(file)
+        config['vaults']['00000000deadbeef'] = {'path': existing, 'ts': 0}
+        with open(config_path, 'w', encoding='utf-8') as file:
+            json.dump(config, file, ensure_ascii=False, separators=(',', ':'))
+        with open(config_path, 'rb') as file:
+            original = file.read()
+
+        for label, target_factory in (('existing vault', lambda i: existing),
+                                      ('new folder', lambda i: make_folders(base, i + 1, 'new')[i])):
+            for name, func in (('full parse', full_parse_open), ('text patch', patch_open)):
+                samples = []
+                written = changed = None
+                for i in range(repeat):
+                    with open(config_path, 'wb') as file:
+                        file.write(original)
+                    target = target_factory(i)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        start = time.perf_counter()
+                        written, changed = func(target)
+                        samples.append(time.perf_counter() - start)
+                results.append((f"{name} / {label}", summarize(samples), written, changed))
+    return len(original), results
+
+def main():
+    parser = argparse.ArgumentParser(description="完整解析与文本补丁写入对比")
+    parser.add_argument('--sizes', default="20000,100000")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for size in [int(s) for s in args.sizes.split(',')]:
+        file_size, results = run(size, args.repeat)
+        print(f"\n{size} 个vault，obsidian.json {file_size / 1024 / 1024:.1f} MB:")
+        for name, stats, written, changed in results:
+            detail = f"written {written} B" + (f", changed {changed} B" if changed is not None else "")
+            print(f"{format_summary(name, stats)}   {detail}")
+
+if __name__ == "__main__":
+    main()
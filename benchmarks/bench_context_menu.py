@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+右键菜单注册基准测试
+比较原来的注册方式（生成.reg文件并启动子进程导入，子进程代替regedit）与通过注册表后端直接写入，
+注册表使用内存注册表（可设置每次调用的延迟）。注册结果的检查见tests/test_context_menu.py
+
+用法: python benchmarks/bench_context_menu.py [--runs N] [--latency-us N]
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import subprocess
+import contextlib
+
+from common import temp_dir, summarize, format_summary
+
+def timed(func, runs, reset=None):
+    samples = []
+    for _ in range(runs):
+        if reset is not None:
+            reset()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            samples.append(time.perf_counter() - start)
+        if result is None or result is False:
+            raise RuntimeError("注册失败")
+    return summarize(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="右键菜单注册：.reg文件+子进程与直接写入注册表")
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--latency-us', type=float, default=20, help="内存注册表每次调用的延迟（微秒）")
+    args = parser.parse_args()
+
+    from registry_backend import InMemoryRegistry, set_backend
+    from context_menu import get_context_menu_entries, register_context_menu, unregister_context_menu
+    import installer
+
+    registry = InMemoryRegistry(latency=args.latency_us / 1e6)
+    previous = set_backend(registry)
+    try:
+        with temp_dir() as base:
+            obsidian_dir = os.path.join(base, 'Obsidian')
+            exe_path = os.path.join(obsidian_dir, 'open_folder_with_obsidian.exe')
+            entries = get_context_menu_entries(obsidian_dir, exe_path)
+
+            def reg_file_install():
+                cwd = os.getcwd()
+                os.chdir(base)
+                try:
+                    reg_file_path = installer.generate_registry_file(obsidian_dir, exe_path)
+                    os.remove(reg_file_path)
+                finally:
+                    os.chdir(cwd)
+                return subprocess.run([sys.executable, '-c', 'pass'], capture_output=True).returncode == 0
+
+            results = {}
+            results[".reg文件 + 启动子进程（原流程）"] = timed(reg_file_install, args.runs)
+            results["直接写入（首次安装）"] = timed(lambda: register_context_menu(entries), args.runs,
+                                                  reset=unregister_context_menu)
+            results["直接写入（已是最新）"] = timed(lambda: register_context_menu(entries), args.runs)
+    finally:
+        set_backend(previous)
+
+    print(f"右键菜单注册（内存注册表延迟 {args.latency_us:g} us，{args.runs}次）")
+    for name, stats in results.items():
+        print(format_summary(name, stats))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
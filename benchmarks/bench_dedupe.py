@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+跨vault插件去重基准测试
+生成大量vault，每个vault从一组插件中随机安装一部分，另有几个只属于该vault的插件；部分插件有大小相同、只有末尾不同的
+两个版本（开头部分哈希相同，需要完整哈希才能区分）。比较：
+- 对所有文件计算完整哈希
+- find_duplicates：大小 -> 开头部分哈希 -> 完整哈希
+的耗时和读取量，然后执行硬链接替换和撤销，检查节省的空间和撤销后文件内容不变
+
+用法: python benchmarks/bench_dedupe.py [--vaults N] [--plugins N] [--per-vault N] [--unique N]
+"""
+import os
+import io
+import sys
+import time
+import random
+import hashlib
+import argparse
+import contextlib
+
+from common import temp_dir
+
+def make_vaults(base, vaults, plugins, per_vault, unique):
+    """生成vault及其插件目录，每个vault另有unique个只在该vault中存在的插件，返回vault路径列表"""
+    rng = random.Random(0)
+    versions = []
+    for i in range(plugins):
+        size = 8 * 1024 * 1024 if i == 0 else int(rng.lognormvariate(12.5, 1.0)) + 4096
+        content = os.urandom(size)
+        # 每三个插件中有一个存在大小相同、只有末尾不同的旧版本
+        variants = [content]
+        if i % 3 == 0:
+            variants.append(content[:-16] + os.urandom(16))
+        versions.append((variants, os.urandom(rng.randint(5, 60) * 1024)))
+
+    vault_paths = []
+    for v in range(vaults):
+        vault = os.path.join(base, f"vault-{v:03d}")
+        for i in rng.sample(range(plugins), per_vault):
+            variants, styles = versions[i]
+            plugin_dir = os.path.join(vault, '.obsidian', 'plugins', f"plugin-{i:02d}")
+            os.makedirs(plugin_dir)
+            with open(os.path.join(plugin_dir, 'main.js'), 'wb') as f:
+                f.write(rng.choice(variants))
+            with open(os.path.join(plugin_dir, 'styles.css'), 'wb') as f:
+                f.write(styles)
+            with open(os.path.join(plugin_dir, 'data.json'), 'w', encoding='utf-8') as f:
+                f.write('{"vault": %d}' % v)
+        for i in range(unique):
+            plugin_dir = os.path.join(vault, '.obsidian', 'plugins', f"local-{i:02d}")
+            os.makedirs(plugin_dir)
+            with open(os.path.join(plugin_dir, 'main.js'), 'wb') as f:
+                f.write(os.urandom(int(rng.lognormvariate(12.5, 1.0)) + 4096))
+        vault_paths.append(vault)
+    return vault_paths
+
+def disk_usage(paths):
+    """路径列表下所有文件占用的磁盘空间，硬链接只计一次"""
+    seen = set()
+    usage = 0
+    for path in paths:
+        for directory, _, names in os.walk(path):
+            for name in names:
+                st = os.stat(os.path.join(directory, name))
+                if st.st_ino not in seen:
+                    seen.add(st.st_ino)
+                    usage += st.st_blocks * 512
+    return usage
+
+def content_digest(paths):
+    """所有文件内容的摘要，用于确认去重和撤销都没有改变内容"""
+    digest = hashlib.sha256()
+    for path in paths:
+        for directory, dirnames, names in os.walk(path):
+            dirnames.sort()
+            for name in sorted(names):
+                with open(os.path.join(directory, name), 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+def main():
+    parser = argparse.ArgumentParser(description="跨vault插件去重")
+    parser.add_argument('--vaults', type=int, default=100)
+    parser.add_argument('--plugins', type=int, default=30)
+    parser.add_argument('--per-vault', type=int, default=12)
+    parser.add_argument('--unique', type=int, default=4)
+    args = parser.parse_args()
+
+    with temp_dir() as base:
+        os.environ['APPDATA'] = os.path.join(base, 'AppData')
+        vault_paths = make_vaults(os.path.join(base, 'vaults'), args.vaults, args.plugins, args.per_vault,
+                                  args.unique)
+
+        from vault_dedupe import (collect_plugin_files, find_duplicates, link_duplicates,
+                                  rollback_last_run, _hash_file)
+
+        files = collect_plugin_files(vault_paths)
+        total = sum(st.st_size for _, st in files)
+
+        start = time.perf_counter()
+        naive = {}
+        for path, st in files:
+            naive.setdefault(_hash_file(path).hexdigest(), []).append(path)
+        naive_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        groups, bytes_read = find_duplicates(files)
+        staged_ms = (time.perf_counter() - start) * 1000
+        if sum(len(g) for g in groups) != sum(len(p) for p in naive.values() if len(p) > 1):
+            print("[失败] 分阶段比较与完整哈希的结果不一致")
+            return 1
+
+        before = disk_usage(vault_paths)
+        digest = content_digest(vault_paths)
+        with contextlib.redirect_stdout(io.StringIO()):
+            linked, _ = link_duplicates(groups)
+        after = disk_usage(vault_paths)
+        linked_digest = content_digest(vault_paths)
+        with contextlib.redirect_stdout(io.StringIO()):
+            restored = rollback_last_run()
+        restored_usage = disk_usage(vault_paths)
+        restored_digest = content_digest(vault_paths)
+
+    print(f"跨vault插件去重（{args.vaults}个vault，每个{args.per_vault}个插件，"
+          f"{len(files)}个文件，共 {total / 1048576:.1f} MB）")
+    print(f"完整哈希所有文件         {naive_ms:10.1f} ms   读取 {total / 1048576:8.1f} MB")
+    print(f"大小 -> 部分哈希 -> 完整  {staged_ms:10.1f} ms   读取 {bytes_read / 1048576:8.1f} MB")
+    print(f"替换为硬链接 {linked} 个文件：占用 {before / 1048576:.1f} MB -> {after / 1048576:.1f} MB")
+    print(f"撤销 {restored} 个文件：占用 {restored_usage / 1048576:.1f} MB")
+    if not (digest == linked_digest == restored_digest):
+        print("[失败] 文件内容发生了变化")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
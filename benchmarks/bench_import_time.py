@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+导入时间预算检查
+用 -X importtime 运行main.py的快速路径（已保存Obsidian路径、文件夹已在vault列表中、常驻服务未运行），
+统计解释器启动之外的模块导入耗时；超过预算或加载了冷路径模块时以非零状态退出，可用于CI回归检查
+
+用法: python benchmarks/bench_import_time.py [--budget-ms N] [--runs N]
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from common import SRC_DIR, MARKER_ENV, make_fake_appdata, make_folders, temp_dir, wait_for
+
+MAIN_SCRIPT = os.path.join(SRC_DIR, 'main.py')
+
+# 快速路径上不应加载的模块
+COLD_PATH_MODULES = [
+    'registry_utils',
+    'winreg',
+    'hashlib',
+    'logging',
+    'socket',
+]
+
+DEFAULT_BUDGET_MS = 30.0
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 {模块名: 自身耗时微秒}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, _, name = line[len("import time:"):].split("|", 2)
+            modules[name.strip()] = modules.get(name.strip(), 0) + int(self_us)
+        except ValueError:
+            continue
+    return modules
+
+def interpreter_baseline(env):
+    """解释器启动本身导入的模块集合"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'pass'], env=env,
+                            capture_output=True, text=True)
+    return set(parse_importtime(result.stderr))
+
+def measure_fast_path(env, folder, marker, timeout=30):
+    """运行一次快速路径，返回main.py运行期间导入的模块及耗时"""
+    if os.path.exists(marker):
+        os.remove(marker)
+    proc = subprocess.Popen([sys.executable, '-X', 'importtime', MAIN_SCRIPT, folder], env=env,
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+    launched = wait_for(marker, timeout)
+    # 桩Obsidian启动后所有导入都已完成，成功路径上的3秒等待无需计入
+    proc.kill()
+    _, stderr = proc.communicate()
+    if not launched:
+        raise RuntimeError("桩Obsidian未启动，快速路径执行失败")
+    return parse_importtime(stderr)
+
+def run(runs):
+    with temp_dir() as base:
+        appdata, config_path, _ = make_fake_appdata(base, vault_count=100)
+        folder = make_folders(os.path.join(base, 'targets'), 1)[0]
+        marker = os.path.join(base, 'launched.marker')
+
+        # 让目标文件夹预先存在于vault列表中，快速路径不需要生成新的vault ID
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        config['vaults']['00000000deadbeef'] = {'path': folder, 'ts': 0}
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, separators=(',', ':'))
+
+        env = dict(os.environ)
+        env['APPDATA'] = appdata
+        env[MARKER_ENV] = marker
+
+        startup = interpreter_baseline(env)
+        samples = []
+        for _ in range(runs):
+            modules = measure_fast_path(env, folder, marker)
+            samples.append({name: us for name, us in modules.items() if name not in startup})
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py快速路径导入时间预算检查")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    samples = run(args.runs)
+    # 取最快的一次，减少机器抖动的影响
+    best = min(samples, key=lambda modules: sum(modules.values()))
+    total_ms = sum(best.values()) / 1000
+
+    print(f"快速路径导入耗时: {total_ms:.2f} ms（预算 {args.budget_ms:.2f} ms）")
+    for name, us in sorted(best.items(), key=lambda item: -item[1])[:15]:
+        print(f"  {us / 1000:8.2f} ms  {name}")
+
+    failures = []
+    loaded_cold = sorted(name for name in best if name in COLD_PATH_MODULES)
+    if loaded_cold:
+        failures.append(f"快速路径加载了冷路径模块: {', '.join(loaded_cold)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"导入耗时 {total_ms:.2f} ms 超出预算 {args.budget_ms:.2f} ms")
+
+    for failure in failures:
+        print(f"[失败] {failure}")
+    if failures:
+        sys.exit(1)
+    print("[通过] 导入时间在预算之内")
+
+if __name__ == "__main__":
+    main()
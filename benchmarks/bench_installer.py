@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+安装程序重复运行基准测试
+在已安装的机器上重复运行安装程序（如每次登录时由脚本执行），比较原流程
+（删除并复制exe、启动regedit导入注册表文件）与先比较内容哈希和注册表值、跳过未变化部分的耗时。
+注册表使用内存注册表，regedit用启动一个Python子进程代替（实际的regedit更慢）
+
+用法: python benchmarks/bench_installer.py [--exe-mb N] [--runs N]
+"""
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+import contextlib
+
+from common import temp_dir, make_stub_exe, summarize, format_summary
+
+def legacy_rerun(exe_path, target_path):
+    """原流程：总是删除后复制exe，并启动子进程导入注册表文件"""
+    if os.path.exists(target_path):
+        os.remove(target_path)
+    shutil.copy2(exe_path, target_path)
+    return subprocess.run([sys.executable, '-c', 'pass'], capture_output=True).returncode == 0
+
+def timed(func, runs):
+    samples = []
+    for _ in range(runs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            samples.append(time.perf_counter() - start)
+        if result is False or result is None:
+            raise RuntimeError("安装步骤失败")
+    return summarize(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="安装程序重复运行：总是覆盖与增量检查")
+    parser.add_argument('--exe-mb', type=int, default=12, help="打包后的exe大小（MB）")
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    from registry_backend import InMemoryRegistry, HKEY_CLASSES_ROOT, set_backend
+    import installer
+    from context_menu import get_context_menu_entries, find_outdated_entries, register_context_menu
+
+    registry = InMemoryRegistry()
+    previous = set_backend(registry)
+    try:
+        with temp_dir() as base:
+            obsidian_dir = os.path.dirname(make_stub_exe(os.path.join(base, 'Obsidian')))
+            dist_dir = os.path.join(base, 'dist')
+            os.makedirs(dist_dir)
+            exe_path = os.path.join(dist_dir, 'open_folder_with_obsidian.exe')
+            with open(exe_path, 'wb') as f:
+                f.write(os.urandom(args.exe_mb * 1024 * 1024))
+            target_path = os.path.join(obsidian_dir, 'open_folder_with_obsidian.exe')
+            entries = get_context_menu_entries(obsidian_dir, target_path)
+
+            # 首次安装
+            with contextlib.redirect_stdout(io.StringIO()):
+                installer.copy_exe_to_obsidian_dir(exe_path, obsidian_dir)
+                register_context_menu(entries)
+
+            results = {}
+            results["删除+复制+启动子进程（原流程）"] = timed(
+                lambda: legacy_rerun(exe_path, target_path), args.runs)
+
+            def incremental_rerun():
+                if not installer.copy_exe_to_obsidian_dir(exe_path, obsidian_dir):
+                    return False
+                return register_context_menu(entries) is not None
+            results["比较哈希和注册表值后跳过"] = timed(incremental_rerun, args.runs)
+
+            # 验证：exe更新后应被替换，注册表值不同时应检测到
+            with open(exe_path, 'r+b') as f:
+                f.seek(-1, os.SEEK_END)
+                last = f.read(1)
+                f.seek(-1, os.SEEK_END)
+                f.write(bytes([last[0] ^ 0xFF]))
+            with contextlib.redirect_stdout(io.StringIO()):
+                installer.copy_exe_to_obsidian_dir(exe_path, obsidian_dir)
+            replaced = installer.files_identical(exe_path, target_path)
+            registry.set_value(HKEY_CLASSES_ROOT, entries[1][0], "", r"C:\Old\open_folder_with_obsidian.exe")
+            detected = bool(find_outdated_entries(entries))
+    finally:
+        set_backend(previous)
+
+    print(f"安装程序重复运行（exe {args.exe_mb} MB，{args.runs}次）")
+    for name, stats in results.items():
+        print(format_summary(name, stats))
+    print(f"exe更新后已替换: {'是' if replaced else '否'}   注册表值变化已检测到: {'是' if detected else '否'}")
+    if not replaced or not detected:
+        print("[失败] 增量检查没有发现变化")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
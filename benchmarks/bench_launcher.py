@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+启动策略基准测试
+对桩Obsidian可执行文件比较各启动策略：launch()返回的耗时，以及从调用到桩进程实际运行
+（创建标记文件）的延迟；auto策略分别测量Obsidian未运行（没有单实例锁，直接启动）
+和已运行（扫描进程表后交给正在运行的实例）两种情况
+
+用法: python benchmarks/bench_launcher.py [--runs N]
+"""
+import os
+import io
+import stat
+import time
+import argparse
+import subprocess
+import contextlib
+
+from common import MARKER_ENV, make_stub_exe, temp_dir, wait_for, summarize, format_summary
+
+def make_running_instance(directory):
+    """
+    启动一个名为Obsidian.exe的常驻桩进程，模拟正在运行的Obsidian
+    同时像Electron一样创建单实例锁
+    """
+    from launcher import get_instance_lock_path
+    os.makedirs(directory, exist_ok=True)
+    exe_path = os.path.join(directory, "Obsidian.exe")
+    with open(exe_path, 'w', encoding='utf-8') as f:
+        f.write('#!/bin/sh\nsleep 600\n')
+    os.chmod(exe_path, os.stat(exe_path).st_mode | stat.S_IXUSR)
+    # sh被kill后sleep仍会运行，不能继承本进程的输出管道
+    process = subprocess.Popen([exe_path], stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    lock_path = get_instance_lock_path()
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    os.symlink(f"bench-{process.pid}", lock_path)
+    return process
+
+def measure(launcher, exe_path, folder, marker, runs):
+    """返回 (launch()耗时统计, 到标记文件出现的延迟统计)"""
+    call_samples = []
+    ready_samples = []
+    for _ in range(runs):
+        if os.path.exists(marker):
+            os.remove(marker)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            launcher.launch(exe_path, [folder])
+            call_samples.append(time.perf_counter() - start)
+        if not wait_for(marker, 10):
+            raise RuntimeError("桩Obsidian未启动")
+        ready_samples.append(time.perf_counter() - start)
+    return summarize(call_samples), summarize(ready_samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Obsidian启动策略对比")
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    from launcher import ShellLauncher, DirectLauncher, HandoffLauncher, get_process_table
+
+    with temp_dir() as base:
+        exe_path = make_stub_exe(os.path.join(base, 'Obsidian'))
+        folder = os.path.join(base, 'vault')
+        os.makedirs(folder)
+        marker = os.path.join(base, 'started')
+        os.environ[MARKER_ENV] = marker
+        os.environ['APPDATA'] = base
+
+        results = {}
+        table = get_process_table()
+        results['shell'] = measure(ShellLauncher(), exe_path, folder, marker, args.runs)
+        results['direct'] = measure(DirectLauncher(), exe_path, folder, marker, args.runs)
+        results['auto (idle)'] = measure(HandoffLauncher(table), exe_path, folder, marker, args.runs)
+
+        running = make_running_instance(os.path.join(base, 'running'))
+        try:
+            time.sleep(0.1)
+            if table.find("Obsidian.exe") is None:
+                raise RuntimeError("进程表中未找到模拟的Obsidian实例")
+            results['auto (handoff)'] = measure(HandoffLauncher(table), exe_path, folder,
+                                                         marker, args.runs)
+            scan_samples = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                table.find("Obsidian.exe")
+                scan_samples.append(time.perf_counter() - start)
+        finally:
+            running.kill()
+            running.wait()
+
+        print(f"启动策略对比（{args.runs}次，桩Obsidian）")
+        for name, (call_stats, ready_stats) in results.items():
+            print(format_summary(f"{name}: launch() returned", call_stats))
+            print(format_summary(f"{name}: stub running", ready_stats))
+        print(format_summary("process table scan", summarize(scan_samples)))
+
+if __name__ == "__main__":
+    main()
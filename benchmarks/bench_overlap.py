@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+查找与写入并行的计时测试
+保存的路径和查找缓存都失效、需要遍历注册表（内存注册表，带调用延迟）时，比较
+先写入obsidian.json再查找Obsidian（原来的顺序执行）与open_folders_with_obsidian中
+两者并行执行的端到端耗时；并行耗时应接近两者中较长的一个，而不是两者之和
+
+默认模拟较慢的注册表（每次调用5ms）：查找主要在等待I/O，可以与写入重叠；
+如果每次调用都很快而条目很多，查找本身主要消耗CPU，受GIL限制几乎无法与写入重叠
+
+用法: python benchmarks/bench_overlap.py [--vaults N] [--entries N] [--latency-us N] [--runs N]
+并行比顺序执行省下的时间不到 min(写入, 查找) 的30%时返回非零状态
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import contextlib
+
+from common import make_fake_appdata, make_folders, temp_dir, summarize, format_summary
+
+# 并行相对顺序执行至少应省下 min(写入, 查找) 的这一比例
+MIN_OVERLAP_RATIO = 0.3
+
+def main():
+    parser = argparse.ArgumentParser(description="查找与写入并行的计时测试")
+    parser.add_argument('--vaults', type=int, default=50000)
+    parser.add_argument('--entries', type=int, default=6)
+    parser.add_argument('--latency-us', type=float, default=5000.0)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with temp_dir() as base:
+        appdata, config_path, exe_path = make_fake_appdata(base, vault_count=args.vaults)
+        os.environ['APPDATA'] = appdata
+        os.environ['LOCALAPPDATA'] = os.path.join(base, 'Local')
+        folder = make_folders(base, 1)[0]
+        opener_config = os.path.join(appdata, 'ObsidianFolderOpener', 'config.json')
+        with open(config_path, 'rb') as f:
+            original = f.read()
+
+        import main as opener
+        from config_manager import config_store
+        from registry_backend import InMemoryRegistry, set_backend
+        set_backend(InMemoryRegistry.with_uninstall_entries(
+            args.entries, obsidian_dir=os.path.dirname(exe_path), latency=args.latency_us / 1e6))
+
+        def reset():
+            """恢复obsidian.json，并让保存的路径、查找缓存和注册表索引全部失效"""
+            with open(config_path, 'wb') as f:
+                f.write(original)
+            with open(opener_config, 'w', encoding='utf-8') as f:
+                json.dump({'obsidian_path': os.path.join(base, 'moved')}, f)
+
+        def sequential():
+            """原来的顺序：写入完成后才开始查找，与open_folders_with_obsidian使用同一批查找和启动函数"""
+            with config_store.batch():
+                added = opener.register_folders([folder])
+                exe_path, from_saved = opener.discover_obsidian_exe()
+                return opener.start_discovered_obsidian(exe_path, from_saved, added,
+                                                        interactive=False)
+
+        cases = {
+            'register_folders only': lambda: opener.register_folders([folder]),
+            'discover_obsidian_exe only': opener.discover_obsidian_exe,
+            'sequential (write, then discover)': sequential,
+            'overlapped (open_folders_with_obsidian)': lambda: opener.open_folders_with_obsidian([folder]),
+        }
+        results = {}
+        for name, func in cases.items():
+            samples = []
+            for _ in range(args.runs):
+                reset()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    func()
+                    samples.append(time.perf_counter() - start)
+            results[name] = summarize(samples)
+
+    print(f"查找与写入并行（{args.vaults}个vault，{args.entries}个卸载信息条目，"
+          f"每次注册表调用 {args.latency_us:g} us，{args.runs}次）")
+    for name, stats in results.items():
+        print(format_summary(name, stats))
+
+    write_ms = results['register_folders only']['min_ms']
+    discover_ms = results['discover_obsidian_exe only']['min_ms']
+    sequential_ms = results['sequential (write, then discover)']['min_ms']
+    overlapped_ms = results['overlapped (open_folders_with_obsidian)']['min_ms']
+    saved_ms = sequential_ms - overlapped_ms
+    print(f"\n写入 {write_ms:.2f} ms，查找 {discover_ms:.2f} ms；"
+          f"顺序 {sequential_ms:.2f} ms，并行 {overlapped_ms:.2f} ms，省下 {saved_ms:.2f} ms")
+    if saved_ms < min(write_ms, discover_ms) * MIN_OVERLAP_RATIO:
+        print(f"[失败] 省下的时间不到 min(写入, 查找) 的 {MIN_OVERLAP_RATIO:g} 倍，查找与写入没有重叠")
+        return 1
+    print("[通过] 查找与写入已并行执行")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
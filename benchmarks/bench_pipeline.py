@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+obsidian.json处理流程基准测试
+在临时APPDATA下生成10到10万个vault的合成obsidian.json（分别带和不带额外的顶层键），测量
+read_obsidian_config、clean_existing_open_flags、add_vault_to_config、write_obsidian_config
+以及使用桩Obsidian的端到端open_folder_with_obsidian耗时
+
+结果以JSON写入--output指定的文件；给出--baseline时与保存的基线比较最小值（受系统噪声影响最小），
+任意一项超过基线的--threshold倍且差值超过NOISE_FLOOR_MS时返回非零状态；超过倍数但差值在噪声范围内的
+项目单独列出，不会被当作未变化；--save-baseline把本次结果保存为新基线
+
+用法: python benchmarks/bench_pipeline.py [--sizes 10,1000,10000,100000] [--repeat N]
+                                          [--output results.json] [--baseline baselines/pipeline.json]
+                                          [--threshold 1.5] [--save-baseline]
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+
+from common import make_fake_appdata, make_folders, temp_dir, summarize, format_summary
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baselines', 'pipeline.json')
+DEFAULT_THRESHOLD = 1.5
+# 启动桩进程等毫秒级的项目抖动较大，绝对差值不超过该值时不算退化（但仍会列出）
+NOISE_FLOOR_MS = 2.0
+
+def timed(func, repeat, setup=None):
+    """运行repeat次，setup的耗时不计入；返回统计结果"""
+    samples = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(state)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def run_case(size, extra_keys, repeat):
+    """测量一种配置规模下的各个阶段"""
+    import main
+
+    results = {}
+    with temp_dir() as base:
+        appdata, config_path, _ = make_fake_appdata(base, vault_count=size, extra_keys=extra_keys)
+        os.environ['APPDATA'] = appdata
+        with open(config_path, 'rb') as f:
+            original = f.read()
+        existing = make_folders(os.path.join(base, 'existing'), 1)[0]
+        new_folders = iter(make_folders(os.path.join(base, 'new'), repeat * 2))
+
+        def fresh_config(_=None):
+            return json.loads(original.decode('utf-8'))
+
+        results['read_obsidian_config'] = timed(lambda _: main.read_obsidian_config(), repeat)
+        results['clean_existing_open_flags'] = timed(
+            lambda config: main.clean_existing_open_flags(config), repeat, setup=fresh_config)
+        results['add_vault_to_config (new)'] = timed(
+            lambda config: main.add_vault_to_config(config, next(new_folders)), repeat,
+            setup=fresh_config)
+        results['write_obsidian_config'] = timed(
+            lambda config: main.write_obsidian_config(config), repeat, setup=fresh_config)
+
+        # 端到端：保存的路径指向桩Obsidian；打开新文件夹前恢复原始配置，已有vault则重复打开同一个文件夹
+        def restore(_=None):
+            with open(config_path, 'wb') as f:
+                f.write(original)
+
+        results['open_folder_with_obsidian (new)'] = timed(
+            lambda _: main.open_folder_with_obsidian(next(new_folders)), repeat, setup=restore)
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.open_folder_with_obsidian(existing)
+        results['open_folder_with_obsidian (existing)'] = timed(
+            lambda _: main.open_folder_with_obsidian(existing), repeat)
+        config_bytes = len(original)
+    return results, config_bytes
+
+def compare(results, baseline, threshold):
+    """与基线比较最小值，返回 (退化项目列表, 超过倍数但差值在噪声范围内的项目列表)"""
+    regressions = []
+    within_noise = []
+    for key, stats in results.items():
+        base = baseline.get('results', {}).get(key)
+        if base is None:
+            continue
+        ratio = stats['min_ms'] / base['min_ms'] if base['min_ms'] else float('inf')
+        delta = stats['min_ms'] - base['min_ms']
+        marker = ""
+        if ratio > threshold and delta > NOISE_FLOOR_MS:
+            regressions.append(key)
+            marker = "  <-- 退化"
+        elif ratio > threshold:
+            within_noise.append(key)
+            marker = f"  <-- 超过倍数，差值 {delta:.2f} ms 在噪声范围内"
+        print(f"{key:<70} {base['min_ms']:9.2f} -> {stats['min_ms']:9.2f} ms  x{ratio:5.2f}{marker}")
+    return regressions, within_noise
+
+def main():
+    parser = argparse.ArgumentParser(description="obsidian.json处理流程基准测试")
+    parser.add_argument('--sizes', default="10,1000,10000,100000")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None, help="结果JSON文件路径")
+    parser.add_argument('--baseline', default=None, help="要比较的基线JSON文件")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help=f"把本次结果保存为基线（默认 {DEFAULT_BASELINE}）")
+    args = parser.parse_args()
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(',')]:
+        for extra_keys in (False, True):
+            label = f"vaults={size},extra_keys={int(extra_keys)}"
+            case, config_bytes = run_case(size, extra_keys, args.repeat)
+            print(f"\n{label}（{config_bytes / 1024:.1f} KB）:")
+            for name, stats in case.items():
+                print(format_summary(name, stats))
+                results[f"{name} [{label}]"] = stats
+
+    report = {
+        'meta': {
+            'timestamp': int(time.time()),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n[信息] 结果已写入: {args.output}")
+
+    if args.save_baseline:
+        baseline_path = args.baseline or DEFAULT_BASELINE
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[信息] 基线已保存: {baseline_path}")
+        return 0
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n与基线比较（{baseline['meta'].get('platform')}, 阈值 x{args.threshold:g}）:")
+        regressions, within_noise = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"[失败] {len(regressions)} 项超过基线")
+            return 1
+        if within_noise:
+            print(f"[警告] {len(within_noise)} 项超过基线的 x{args.threshold:g}，"
+                  f"但差值不超过 {NOISE_FLOOR_MS:g} ms，可以用更大的--repeat确认")
+            return 0
+        print("[通过] 未发现性能退化")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
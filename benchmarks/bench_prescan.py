@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+新vault预扫描基准测试
+生成一个典型的项目根目录（笔记、附件、源码、node_modules、构建输出、数据导出），
+测量prescan_folder的耗时（单线程与多线程），以及排除后Obsidian需要索引的文件数
+
+用法: python benchmarks/bench_prescan.py [--packages N] [--data-files N] [--runs N]
+"""
+import os
+import sys
+import time
+import argparse
+
+from common import temp_dir, summarize, format_summary
+
+def write_files(directory, count, ext, size=200):
+    os.makedirs(directory, exist_ok=True)
+    payload = b'x' * size
+    for i in range(count):
+        with open(os.path.join(directory, f"file-{i:05d}{ext}"), 'wb') as f:
+            f.write(payload)
+
+def make_project(base, packages, data_files):
+    """生成项目目录，返回 (根目录, 期望排除的目录)"""
+    root = os.path.join(base, 'project')
+    write_files(os.path.join(root, 'docs'), 300, '.md', 2000)
+    write_files(os.path.join(root, 'docs', 'assets'), 100, '.png', 20000)
+    write_files(os.path.join(root, 'src', 'app'), 400, '.ts')
+    for i in range(packages):
+        package = os.path.join(root, 'node_modules', f"pkg-{i:04d}")
+        write_files(os.path.join(package, 'lib'), 20, '.js')
+        write_files(package, 1, '.md')
+    write_files(os.path.join(root, 'dist', 'static'), 500, '.js')
+    write_files(os.path.join(root, 'exports', '2024'), data_files, '.csv', 4000)
+    write_files(os.path.join(root, '.git', 'objects'), 2000, '')
+    return root, ['dist/', 'exports/', 'node_modules/']
+
+def count_indexed(root, filters):
+    """Obsidian会列出的文件数：跳过隐藏文件夹和排除项"""
+    total = 0
+    for directory, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(directory, root).replace(os.sep, '/') + '/'
+        rel = '' if rel == './' else rel
+        dirnames[:] = [name for name in dirnames if not name.startswith('.')
+                       and not any((rel + name + '/').startswith(f) for f in filters)]
+        total += len(filenames)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="新vault预扫描")
+    parser.add_argument('--packages', type=int, default=2000)
+    parser.add_argument('--data-files', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    from vault_prescan import prescan_folder
+
+    with temp_dir() as base:
+        root, expected = make_project(base, args.packages, args.data_files)
+
+        results = {}
+        result = None
+        for workers in (1, 8):
+            samples = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                result = prescan_folder(root, workers=workers)
+                samples.append(time.perf_counter() - start)
+            results[f"prescan_folder ({workers} workers)"] = summarize(samples)
+
+        before = count_indexed(root, [])
+        after = count_indexed(root, result['filters'])
+
+    print(f"项目目录预扫描（{args.packages}个依赖包，{args.data_files}个数据文件，{args.runs}次）")
+    for name, stats in results.items():
+        print(format_summary(name, stats))
+    print(f"排除项: {result['filters']}（扫描了 {result['files']} 个文件，"
+          f"{'完整' if result['complete'] else '超出预算'}）")
+    print(f"Obsidian需要索引的文件: {before} -> {after}")
+    if sorted(result['filters']) != expected:
+        print(f"[失败] 期望排除 {expected}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
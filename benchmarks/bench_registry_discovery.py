@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+注册表查找基准测试
+使用内存注册表（可设置每次调用的延迟）比较三种查找方式：
+顺序遍历三个Uninstall键、并行遍历、以及命中registry_index后直接检查已知键
+Obsidian条目位于HKCU的Uninstall键末尾，是顺序遍历时较差的情况
+
+用法: python benchmarks/bench_registry_discovery.py [--entries 100,1000,5000] [--latency-us 50] [--repeat N]
+"""
+import io
+import os
+import time
+import argparse
+import contextlib
+
+from common import make_stub_exe, summarize, format_summary, temp_dir
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        samples.append(time.perf_counter() - start)
+        if not result[0]:
+            raise RuntimeError("未找到Obsidian")
+    return summarize(samples)
+
+def run(entries, latency, repeat, obsidian_dir):
+    from registry_backend import InMemoryRegistry, set_backend
+    import registry_utils
+
+    registry = InMemoryRegistry.with_uninstall_entries(entries, obsidian_dir=obsidian_dir,
+                                                       latency=latency)
+    previous = set_backend(registry)
+    try:
+        results = {}
+        calls = {}
+        strategies = [
+            ('sequential', dict(parallel=False, use_index=False)),
+            ('parallel', dict(parallel=True, use_index=False)),
+            ('cached (registry_index)', dict(parallel=True, use_index=True)),
+        ]
+        for name, kwargs in strategies:
+            def find():
+                return registry_utils.find_obsidian_in_registry_with_source(**kwargs)
+            # 预热一次，同时让缓存策略写入registry_index
+            timed(find, 1)
+            registry.calls = 0
+            results[name] = timed(find, repeat)
+            calls[name] = registry.calls // repeat
+        return results, calls
+    finally:
+        set_backend(previous)
+
+def main():
+    parser = argparse.ArgumentParser(description="注册表查找方式对比（内存注册表）")
+    parser.add_argument('--entries', default="100,1000,5000")
+    parser.add_argument('--latency-us', type=float, default=50.0,
+                        help="每次注册表调用的模拟延迟（微秒）")
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with temp_dir() as base:
+        # registry_index保存在临时APPDATA下的config.json中
+        os.environ['APPDATA'] = os.path.join(base, 'AppData', 'Roaming')
+        obsidian_dir = os.path.dirname(make_stub_exe(os.path.join(base, 'Obsidian')))
+
+        for entries in [int(s) for s in args.entries.split(',')]:
+            print(f"\n{entries} 个卸载信息条目，每次调用延迟 {args.latency_us:g} us:")
+            results, calls = run(entries, args.latency_us / 1e6, args.repeat, obsidian_dir)
+            for name, stats in results.items():
+                print(f"{format_summary(name, stats)}   {calls[name]} 次调用")
+
+if __name__ == "__main__":
+    main()
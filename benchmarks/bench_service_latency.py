@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+常驻服务基准测试
+比较“冷启动进程内处理”和“交给常驻服务处理”两种模式下，
+从启动main.py到桩Obsidian被拉起的延迟；服务模式下另外统计客户端收到确认并退出的耗时
+
+用法: python benchmarks/bench_service_latency.py [--runs N] [--vaults N]
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import subprocess
+
+from common import (SRC_DIR, MARKER_ENV, make_fake_appdata, make_folders,
+                    temp_dir, wait_for, summarize, format_summary)
+
+MAIN_SCRIPT = os.path.join(SRC_DIR, 'main.py')
+
+def measure_click(env, folder, marker, timeout=30, exits=None):
+    """
+    模拟一次右键点击，返回到桩Obsidian启动时的耗时（秒）
+    传入exits列表时等待进程自行退出，并记录退出耗时
+    """
+    if os.path.exists(marker):
+        os.remove(marker)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, MAIN_SCRIPT, folder], env=env,
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL)
+    launched = wait_for(marker, timeout)
+    elapsed = time.perf_counter() - start
+    if exits is not None:
+        proc.wait(timeout)
+        exits.append(time.perf_counter() - start)
+    # 进程内模式成功后会等待3秒再退出，这里不计入延迟
+    proc.kill()
+    proc.wait()
+    if not launched:
+        raise RuntimeError(f"桩Obsidian未在{timeout}秒内启动")
+    return elapsed
+
+def run(runs, vault_count):
+    with temp_dir() as base:
+        appdata, _, _ = make_fake_appdata(base, vault_count=vault_count)
+        folders = make_folders(os.path.join(base, 'targets'), runs)
+        marker = os.path.join(base, 'launched.marker')
+
+        env = dict(os.environ)
+        env['APPDATA'] = appdata
+        env[MARKER_ENV] = marker
+
+        results = {}
+
+        results['in-process (cold start)'] = summarize(
+            [measure_click(env, folder, marker) for folder in folders])
+
+        service = subprocess.Popen([sys.executable, MAIN_SCRIPT, '--service'], env=env,
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+        try:
+            info_path = os.path.join(appdata, 'ObsidianFolderOpener', 'service.json')
+            if not wait_for(info_path, 10):
+                raise RuntimeError("常驻服务未能启动")
+            time.sleep(0.2)
+            exits = []
+            results['resident service (thin client)'] = summarize(
+                [measure_click(env, folder, marker, exits=exits) for folder in folders])
+            results['thin client exit'] = summarize(exits)
+        finally:
+            service.terminate()
+            service.wait()
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻服务与冷启动的点击到启动延迟对比")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--vaults', type=int, default=1000)
+    parser.add_argument('--json', action='store_true', help="以JSON格式输出结果")
+    args = parser.parse_args()
+
+    results = run(args.runs, args.vaults)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"点击到启动延迟（{args.runs}次，{args.vaults}个vault）")
+        for name, stats in results.items():
+            print(format_summary(name, stats))
+
+if __name__ == "__main__":
+    main()
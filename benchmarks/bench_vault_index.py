@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+vault索引基准测试
+在10、1万、10万个vault的合成配置上，比较原来的线性扫描与VaultIndex的
+查找和清理open标志耗时
+
+用法: python benchmarks/bench_vault_index.py [--sizes 10,10000,100000] [--repeat N]
+"""
+import os
+import time
+import argparse
+
+from common import make_synthetic_config, summarize, format_summary
+from vault_index import VaultIndex
+
+def legacy_find(config, folder_path):
+    """原add_vault_to_config中的线性查找"""
+    for existing_id, vault_info in config['vaults'].items():
+        if vault_info.get('path') == folder_path:
+            return existing_id
+    return None
+
+def legacy_clean(config):
+    """原clean_existing_open_flags中的全量清理"""
+    for vault_id, vault_info in config['vaults'].items():
+        if 'open' in vault_info:
+            del vault_info['open']
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def run(size, repeat):
+    root = os.path.abspath('vaults')
+    config = make_synthetic_config(size, root)
+    # 查找最后一个vault，是线性扫描的最坏情况
+    target = config['vaults'][list(config['vaults'])[-1]]['path']
+    missing = os.path.join(root, 'not-a-vault')
+
+    def reopen_flags():
+        for info in list(config['vaults'].values())[:1]:
+            info['open'] = True
+
+    results = {}
+    results['legacy: find'] = timed(lambda: legacy_find(config, target), repeat)
+    results['legacy: find (new vault)'] = timed(lambda: legacy_find(config, missing), repeat)
+    results['legacy: clean open flags'] = timed(lambda: (reopen_flags(), legacy_clean(config)), repeat)
+    results['legacy: clean + find'] = timed(
+        lambda: (reopen_flags(), legacy_clean(config), legacy_find(config, target)), repeat)
+    results['index: build'] = timed(lambda: VaultIndex(config), repeat)
+
+    # 单次打开只查找一次：每次使用新的索引，只计查找本身
+    fresh = []
+    def first_find(path):
+        fresh.append(VaultIndex(config))
+        start = time.perf_counter()
+        fresh.pop().find(path)
+        return time.perf_counter() - start
+    results['index: first find (scan)'] = summarize([first_find(target) for _ in range(repeat)])
+    results['index: first find (new vault)'] = summarize([first_find(missing) for _ in range(repeat)])
+
+    def index_open():
+        reopen_flags()
+        index = VaultIndex(config)
+        index.clear_open_flags()
+        index.find(target)
+    results['index: build + clean + find'] = timed(index_open, repeat)
+
+    index = VaultIndex(config)
+    index.find(target)
+    results['index: build path map'] = timed(index._build_path_map, repeat)
+    results['index: find (path map)'] = timed(lambda: index.find(target), repeat)
+
+    def index_clean():
+        index.mark_open(next(iter(config['vaults'])))
+        index.clear_open_flags()
+    results['index: clean open flags'] = timed(index_clean, repeat)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="线性扫描与VaultIndex对比")
+    parser.add_argument('--sizes', default="10,10000,100000")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for size in [int(s) for s in args.sizes.split(',')]:
+        print(f"\n{size} 个vault:")
+        for name, stats in run(size, args.repeat).items():
+            print(format_summary(name, stats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+vault模板基准测试
+生成一个接近真实大小的.obsidian模板（几十个社区插件和几个主题），
+比较用复制和硬链接为新vault生成配置的耗时，以及每个新vault额外占用的磁盘空间
+
+用法: python benchmarks/bench_vault_template.py [--plugins N] [--vaults N]
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import contextlib
+
+from common import temp_dir, summarize, format_summary
+
+def write_file(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size))
+
+def make_template(base, plugins, themes):
+    """生成模板.obsidian目录，返回 (路径, 总字节数)"""
+    rng = random.Random(0)
+    template = os.path.join(base, 'template', '.obsidian')
+    total = 0
+    for i in range(plugins):
+        plugin_dir = os.path.join(template, 'plugins', f"plugin-{i:02d}")
+        # 大多数插件的main.js在几十KB到几MB之间，少数（如Excalidraw）接近10MB
+        sizes = {
+            'main.js': 8 * 1024 * 1024 if i == 0 else int(rng.lognormvariate(12.5, 1.0)),
+            'styles.css': rng.randint(2, 120) * 1024,
+            'manifest.json': 400,
+            'data.json': rng.randint(1, 20) * 1024,
+        }
+        for name, size in sizes.items():
+            write_file(os.path.join(plugin_dir, name), size)
+            total += size
+    for i in range(themes):
+        theme_dir = os.path.join(template, 'themes', f"theme-{i}")
+        for name, size in (('theme.css', rng.randint(200, 900) * 1024), ('manifest.json', 300)):
+            write_file(os.path.join(theme_dir, name), size)
+            total += size
+    settings = {
+        'app.json': {'promptDelete': False},
+        'appearance.json': {'cssTheme': 'theme-0'},
+        'community-plugins.json': [f"plugin-{i:02d}" for i in range(plugins)],
+        'core-plugins.json': ['file-explorer', 'search', 'backlink'],
+        'hotkeys.json': {},
+        'workspace.json': {'main': {}},
+    }
+    for name, value in settings.items():
+        with open(os.path.join(template, name), 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+    return template, total
+
+def extra_disk_usage(template, seeded_dirs):
+    """新vault中不与模板共享inode的文件占用的磁盘空间（字节）"""
+    shared = set()
+    for directory, _, names in os.walk(template):
+        for name in names:
+            shared.add(os.stat(os.path.join(directory, name)).st_ino)
+    usage = 0
+    seen = set()
+    for seeded in seeded_dirs:
+        for directory, _, names in os.walk(seeded):
+            for name in names:
+                st = os.stat(os.path.join(directory, name))
+                if st.st_ino in shared or st.st_ino in seen:
+                    continue
+                seen.add(st.st_ino)
+                usage += st.st_blocks * 512
+    return usage
+
+def main():
+    parser = argparse.ArgumentParser(description="按模板生成vault配置：复制与硬链接")
+    parser.add_argument('--plugins', type=int, default=40)
+    parser.add_argument('--themes', type=int, default=3)
+    parser.add_argument('--vaults', type=int, default=10)
+    args = parser.parse_args()
+
+    from vault_template import seed_vault, COPY_MODE, LINK_MODE
+
+    with temp_dir() as base:
+        template, total = make_template(base, args.plugins, args.themes)
+        results = {}
+        for mode in (COPY_MODE, LINK_MODE):
+            samples = []
+            seeded = []
+            for i in range(args.vaults):
+                folder = os.path.join(base, mode, f"vault-{i:02d}")
+                os.makedirs(folder)
+                os.sync()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    stats = seed_vault(template, folder, mode)
+                    samples.append(time.perf_counter() - start)
+                if stats is None:
+                    raise RuntimeError("按模板生成vault配置失败")
+                seeded.append(os.path.join(folder, '.obsidian'))
+            results[mode] = (summarize(samples), extra_disk_usage(template, seeded) / args.vaults, stats)
+
+    print(f"vault模板（{args.plugins}个插件，{args.themes}个主题，共 {total / 1048576:.1f} MB，"
+          f"生成{args.vaults}个vault）")
+    for mode, (timing, usage, stats) in results.items():
+        print(format_summary(f"seed_vault ({mode})", timing))
+        print(f"  每个vault额外占用 {usage / 1048576:8.2f} MB   硬链接 {stats['linked']} 个文件，"
+              f"复制 {stats['copied']} 个文件")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+vault预读基准测试
+生成一个包含大量笔记的文件夹，用posix_fadvise把文件移出页缓存模拟冷盘，然后比较：
+- 冷启动：模拟Obsidian启动（--startup-ms）后单线程读取所有笔记建立索引
+- 预读：在“启动Obsidian”的同时开始VaultWarmup，启动完成后再建立索引
+- 热缓存：所有文件都已在页缓存中（理论下限）
+耗时从“启动Obsidian”开始计算，到索引完成为止
+
+需要Linux（os.posix_fadvise）；虚拟磁盘或tmpfs上冷热差别可能很小
+用法: python benchmarks/bench_warmup.py [--notes N] [--note-kb N] [--startup-ms N]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+from common import temp_dir
+
+NOTES_PER_DIR = 500
+
+def make_tree(base, notes, note_kb, attachments):
+    """生成笔记树：每个子目录NOTES_PER_DIR篇笔记，大小在note_kb的一半到1.5倍之间"""
+    rng = random.Random(0)
+    root = os.path.join(base, 'vault')
+    paths = []
+    for i in range(notes):
+        directory = os.path.join(root, f"area-{i // (NOTES_PER_DIR * 10):02d}", f"topic-{i // NOTES_PER_DIR:03d}")
+        if i % NOTES_PER_DIR == 0:
+            os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"note-{i:06d}.md")
+        size = rng.randint(note_kb * 512, note_kb * 1536)
+        with open(path, 'wb') as f:
+            f.write(b'# note\n' + os.urandom(size // 2).hex().encode()[:size])
+        paths.append(path)
+    attachment_dir = os.path.join(root, 'attachments')
+    os.makedirs(attachment_dir, exist_ok=True)
+    for i in range(attachments):
+        with open(os.path.join(attachment_dir, f"image-{i:05d}.png"), 'wb') as f:
+            f.write(os.urandom(64 * 1024))
+    os.makedirs(os.path.join(root, '.obsidian'), exist_ok=True)
+    with open(os.path.join(root, '.obsidian', 'app.json'), 'w', encoding='utf-8') as f:
+        f.write('{}')
+    return root, paths
+
+def evict(root):
+    """把文件夹中所有文件移出页缓存"""
+    os.sync()
+    for directory, _, names in os.walk(root):
+        for name in names:
+            fd = os.open(os.path.join(directory, name), os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+def index_notes(paths):
+    """模拟Obsidian建立索引：单线程依次读取每篇笔记"""
+    total = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            total += len(f.read())
+    return total
+
+def run_case(root, paths, startup, warm):
+    """返回 (从启动到索引完成的耗时ms, 预读统计)"""
+    from vault_warmup import VaultWarmup
+    warmup = None
+    start = time.perf_counter()
+    if warm:
+        warmup = VaultWarmup([root]).start()
+    time.sleep(startup)
+    index_notes(paths)
+    elapsed = (time.perf_counter() - start) * 1000
+    if warmup is not None:
+        warmup.wait()
+        return elapsed, warmup.stats()
+    return elapsed, None
+
+def main():
+    parser = argparse.ArgumentParser(description="vault预读对首次索引的影响")
+    parser.add_argument('--notes', type=int, default=50000)
+    parser.add_argument('--note-kb', type=int, default=4)
+    parser.add_argument('--attachments', type=int, default=200)
+    parser.add_argument('--startup-ms', type=float, default=1000.0)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    if not hasattr(os, 'posix_fadvise'):
+        print("[错误] 需要os.posix_fadvise（Linux）")
+        return 1
+
+    startup = args.startup_ms / 1000
+    with temp_dir() as base:
+        print(f"正在生成 {args.notes} 篇笔记...")
+        root, paths = make_tree(base, args.notes, args.note_kb, args.attachments)
+
+        results = {'cold': [], 'warmup': [], 'hot': []}
+        stats = None
+        for _ in range(args.runs):
+            evict(root)
+            results['cold'].append(run_case(root, paths, startup, False)[0])
+            evict(root)
+            elapsed, stats = run_case(root, paths, startup, True)
+            results['warmup'].append(elapsed)
+            results['hot'].append(run_case(root, paths, startup, False)[0])
+
+    print(f"\n{args.notes}篇笔记（平均 {args.note_kb} KB），Obsidian启动 {args.startup_ms:g} ms，{args.runs}次取最小值")
+    for name, label in (('cold', "cold"), ('warmup', "warm-up at launch"), ('hot', "page cache hot")):
+        print(f"{label:<20} {min(results[name]):10.1f} ms   （启动后索引 {min(results[name]) - args.startup_ms:10.1f} ms）")
+    print(f"预读: {stats['dirs']} 个目录，{stats['files']} 个文件，{stats['bytes'] / 1048576:.1f} MB，"
+          f"{stats['seconds'] * 1000:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试公共工具
+在临时目录中构造假的APPDATA（obsidian.json、config.json）和桩Obsidian可执行文件，
+使基准测试可以在Linux上运行
+"""
+import os
+import sys
+import json
+import time
+import stat
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+MARKER_ENV = "OFO_BENCH_MARKER"
+
+def make_stub_exe(directory):
+    """
+    在指定目录创建桩Obsidian.exe
+    被启动时会创建环境变量OFO_BENCH_MARKER指向的标记文件，用于测量启动时刻
+    """
+    os.makedirs(directory, exist_ok=True)
+    exe_path = os.path.join(directory, "Obsidian.exe")
+    with open(exe_path, 'w', encoding='utf-8') as f:
+        f.write('#!/bin/sh\n[ -n "$%s" ] && : > "$%s"\nexit 0\n' % (MARKER_ENV, MARKER_ENV))
+    os.chmod(exe_path, os.stat(exe_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return exe_path
+
+def make_synthetic_config(vault_count, root_dir, extra_keys=False):
+    """
+    生成包含vault_count个vault的obsidian.json内容（dict）
+    extra_keys为True时额外加入一些与vault无关的顶层键
+    """
+    now = int(time.time() * 1000)
+    vaults = {}
+    for i in range(vault_count):
+        vaults[f"{i:016x}"] = {
+            'path': os.path.join(root_dir, f"vault-{i:06d}"),
+            'ts': now - i,
+        }
+    if vaults:
+        vaults[next(iter(vaults))]['open'] = True
+    config = {'vaults': vaults}
+    if extra_keys:
+        config['frame'] = 'hidden'
+        config['updateDisabled'] = False
+        config['insider'] = False
+        config['cli'] = {'enabled': False}
+        config['history'] = [{'path': v['path'], 'ts': v['ts']} for v in list(vaults.values())[:1000]]
+    return config
+
+def make_fake_appdata(base_dir, vault_count=100, extra_keys=False, with_saved_exe=True):
+    """
+    在base_dir下构造假的APPDATA目录
+    返回 (appdata_dir, obsidian_json_path, stub_exe_path)
+    """
+    appdata = os.path.join(base_dir, 'AppData', 'Roaming')
+    obsidian_dir = os.path.join(appdata, 'obsidian')
+    os.makedirs(obsidian_dir, exist_ok=True)
+
+    config_path = os.path.join(obsidian_dir, 'obsidian.json')
+    config = make_synthetic_config(vault_count, os.path.join(base_dir, 'vaults'), extra_keys)
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, separators=(',', ':'))
+
+    stub_dir = os.path.join(base_dir, 'Obsidian')
+    exe_path = make_stub_exe(stub_dir)
+
+    if with_saved_exe:
+        opener_dir = os.path.join(appdata, 'ObsidianFolderOpener')
+        os.makedirs(opener_dir, exist_ok=True)
+        with open(os.path.join(opener_dir, 'config.json'), 'w', encoding='utf-8') as f:
+            json.dump({'obsidian_path': stub_dir, 'last_updated': int(time.time())}, f)
+
+    return appdata, config_path, exe_path
+
+def make_folders(base_dir, count, prefix="folder"):
+    """创建count个待打开的空文件夹"""
+    folders = []
+    for i in range(count):
+        path = os.path.join(base_dir, f"{prefix}-{i:04d}")
+        os.makedirs(path, exist_ok=True)
+        folders.append(path)
+    return folders
+
+def temp_dir(prefix="ofo-bench-"):
+    """创建基准测试用的临时目录"""
+    return tempfile.TemporaryDirectory(prefix=prefix)
+
+def wait_for(path, timeout):
+    """等待文件出现，超时返回False"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if os.path.exists(path):
+            return True
+        time.sleep(0.0005)
+    return False
+
+def summarize(samples):
+    """返回样本的(最小值, 中位数, 平均值, 最大值)，单位毫秒"""
+    ordered = sorted(samples)
+    n = len(ordered)
+    median = ordered[n // 2] if n % 2 else (ordered[n // 2 - 1] + ordered[n // 2]) / 2
+    return {
+        'min_ms': ordered[0] * 1000,
+        'median_ms': median * 1000,
+        'mean_ms': sum(ordered) / n * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+def format_summary(name, stats):
+    """格式化一行统计结果"""
+    return (f"{name:<36} min {stats['min_ms']:9.2f} ms   median {stats['median_ms']:9.2f} ms   "
+            f"mean {stats['mean_ms']:9.2f} ms   max {stats['max_ms']:9.2f} ms")
@@ -92,7 +92,7 @@ echo 1. 以管理员身份运行 obsidian_installer.exe 进行安装
 echo 2. 安装完成后即可在任意文件夹右键选择"用Obsidian打开"
 echo.
 echo 卸载方法:
-echo 在Obsidian安装目录运行 remove_obsidian_context_menu.reg 文件
+echo 以管理员身份运行 obsidian_installer.exe --uninstall
 ) > dist\README.md
 
 echo.
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+obsidian.json并发写入保护模块
+提供跨进程的建议性文件锁、先写临时文件再原子替换的写入方式，
+以及锁被占用时的请求排队：排队的请求由持有锁的进程在同一次写入中一并处理
+"""
+import os
+import json
+import time
+
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.01
+REPLACE_RETRIES = 5
+# 排队的进程最多等待LOCK_TIMEOUT秒后撤回请求，超过这一时间仍在队列中的凭据视为遗留
+QUEUE_TICKET_MAX_AGE = LOCK_TIMEOUT * 3
+
+def get_lock_path():
+    """获取锁文件路径"""
+    from config_manager import get_config_dir
+    return os.path.join(get_config_dir(), 'obsidian.json.lock')
+
+def get_queue_dir():
+    """获取请求队列目录"""
+    from config_manager import get_config_dir
+    return os.path.join(get_config_dir(), 'queue')
+
+class ConfigLock:
+    """
+    obsidian.json读-改-写过程的跨进程锁
+    Windows下使用msvcrt.locking，其他平台使用fcntl.flock
+    """
+
+    def __init__(self, lock_path=None):
+        self.lock_path = lock_path or get_lock_path()
+        self.file = None
+
+    def _try_lock(self):
+        """尝试以非阻塞方式加锁，成功返回True"""
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, blocking=True, timeout=LOCK_TIMEOUT):
+        """
+        获取锁
+        blocking为False时只尝试一次；否则最多等待timeout秒，超时返回False
+        """
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            self.file = open(self.lock_path, 'a+')
+
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._try_lock():
+                return True
+            if not blocking or time.monotonic() >= deadline:
+                return False
+            time.sleep(LOCK_POLL_INTERVAL)
+
+    def release(self):
+        """释放锁"""
+        if self.file is None:
+            return
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        finally:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError(f"等待配置文件锁超时: {self.lock_path}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+def atomic_write_text(path, content):
+    """
+    先写入同目录下的临时文件，再用os.replace原子替换目标文件
+    读取方永远不会看到写了一半的文件；Windows下目标文件被短暂占用时会重试几次
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+    except OSError:
+        _remove_quietly(tmp_path)
+        raise
+
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(tmp_path, path)
+            return
+        except PermissionError:
+            if attempt == REPLACE_RETRIES - 1:
+                _remove_quietly(tmp_path)
+                raise
+            time.sleep(0.02 * (attempt + 1))
+
+def _remove_quietly(path):
+    """删除文件，文件不存在或删除失败时忽略"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def enqueue_request(folder_paths):
+    """
+    把请求写入队列目录，返回队列文件路径（作为排队凭据）
+    文件名为 <写入时间ns>-<进程ID>.json，用于判断凭据是否已遗留
+    """
+    queue_dir = get_queue_dir()
+    os.makedirs(queue_dir, exist_ok=True)
+    ticket = os.path.join(queue_dir, f"{time.time_ns()}-{os.getpid()}.json")
+    tmp_path = ticket + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump({'folders': list(folder_paths)}, file, ensure_ascii=False)
+    os.replace(tmp_path, ticket)
+    return ticket
+
+def is_request_pending(ticket):
+    """排队的请求是否还未被其他进程处理"""
+    return os.path.exists(ticket)
+
+def discard_request(ticket):
+    """撤回自己排队的请求"""
+    _remove_quietly(ticket)
+
+def acquire_or_enqueue(folder_paths):
+    """
+    获取obsidian.json的写入锁，返回 (lock, handled)
+    锁空闲时直接获得锁；锁被占用时先把请求排队，再等待锁：
+    如果等到锁时请求已被持锁进程处理，handled为True，调用方无需再写入；
+    等待超时时lock为None，调用方只能在无锁状态下继续
+    """
+    lock = ConfigLock()
+    if lock.acquire(blocking=False):
+        return lock, False
+
+    print("[信息] 其他进程正在更新配置，请求已加入队列")
+    ticket = enqueue_request(folder_paths)
+    if not lock.acquire():
+        print("[警告] 等待配置文件锁超时，将直接写入")
+        discard_request(ticket)
+        return None, False
+
+    if not is_request_pending(ticket):
+        lock.release()
+        return None, True
+
+    # 持锁进程在我们排队之前已经完成写入，由自己处理
+    discard_request(ticket)
+    return lock, False
+
+def _process_alive(pid):
+    """进程是否仍在运行，无法判断时视为在运行"""
+    if os.name == 'nt':
+        # Windows上os.kill(pid, 0)会结束进程，只能通过OpenProcess查询
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        ERROR_ACCESS_DENIED = 5
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return True
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+def _is_stale_ticket(name, now_ns):
+    """
+    凭据是否已遗留：写入时间超过QUEUE_TICKET_MAX_AGE，或写入的进程已退出（被结束或崩溃）
+    文件名无法解析时也视为遗留
+    """
+    stem = name.split('.', 1)[0]
+    try:
+        written_ns, pid = (int(part) for part in stem.split('-', 1))
+    except ValueError:
+        return True
+    if now_ns - written_ns > QUEUE_TICKET_MAX_AGE * 1_000_000_000:
+        return True
+    return pid != os.getpid() and not _process_alive(pid)
+
+def drain_queue():
+    """
+    读取队列中所有排队的请求，返回 (文件夹路径列表, 凭据列表)
+    必须在持有ConfigLock时调用；写入成功后调用complete_requests删除凭据，
+    排队的进程据此得知请求已被处理，写入失败时凭据保留，排队的进程会自行处理
+    遗留的凭据（包括写了一半的临时文件）直接删除，不再处理
+    """
+    queue_dir = get_queue_dir()
+    try:
+        names = sorted(os.listdir(queue_dir))
+    except OSError:
+        return [], []
+
+    now_ns = time.time_ns()
+    folder_paths = []
+    tickets = []
+    for name in names:
+        ticket = os.path.join(queue_dir, name)
+        if _is_stale_ticket(name, now_ns):
+            print(f"[警告] 删除遗留的排队请求: {name}")
+            discard_request(ticket)
+            continue
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(ticket, 'r', encoding='utf-8') as file:
+                folders = json.load(file).get('folders', [])
+        except (OSError, ValueError) as e:
+            print(f"[警告] 跳过无效的排队请求 {name}: {e}")
+            folders = []
+        folder_paths.extend(path for path in folders if isinstance(path, str))
+        tickets.append(ticket)
+    return folder_paths, tickets
+
+def complete_requests(tickets):
+    """删除已处理请求的凭据"""
+    for ticket in tickets:
+        discard_request(ticket)
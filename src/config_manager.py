@@ -5,77 +5,172 @@
 """
 import os
 import json
-import logging
+import threading
+import fs_probe
 
-def get_config_file_path():
-    """获取配置文件路径"""
+def get_config_dir():
+    """获取本工具的数据目录（不保证已存在）"""
     # 使用AppData目录存储配置
     appdata_dir = os.getenv("APPDATA")
-    config_dir = os.path.join(appdata_dir, 'ObsidianFolderOpener')
-    
-    # 确保目录存在
-    if not os.path.exists(config_dir):
-        os.makedirs(config_dir)
-    
-    return os.path.join(config_dir, 'config.json')
+    return os.path.join(appdata_dir, 'ObsidianFolderOpener')
+
+DEFAULT_CONFIG = {
+    'obsidian_path': None,
+    'last_updated': None
+}
+
+class ConfigStore:
+    """
+    config.json的进程内缓存
+    每个进程只读取一次文件，之后按(mtime, 大小)判断文件是否被其他进程修改过；
+    在batch()中的多次保存会合并为退出时的一次写入；配置目录只在第一次写入前确保存在
+    查找Obsidian的后台线程与主线程共用同一个缓存：读写都持有lock，
+    先读取再修改再保存的操作应整体放在 with config_store.lock: 中
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.config_file = None
+        self.data = None
+        self.stamp = None
+        self.dirty = False
+        self.dir_ensured = False
+        self.batch_depth = 0
+
+    def _stat(self):
+        """获取配置文件的(mtime, 大小)，文件不存在时返回None"""
+        try:
+            st = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self):
+        """返回缓存的配置，文件路径变化或文件被修改过时重新读取"""
+        with self.lock:
+            config_file = os.path.join(get_config_dir(), 'config.json')
+            if config_file != self.config_file:
+                self.config_file = config_file
+                self.data = None
+                self.dirty = False
+                self.dir_ensured = False
+
+            # 有未写入的修改时以内存中的为准
+            if self.data is not None and self.dirty:
+                return self.data
+
+            stamp = self._stat()
+            if self.data is not None and stamp == self.stamp:
+                return self.data
+
+            self.stamp = stamp
+            if stamp is None:
+                # 返回默认配置
+                self.data = dict(DEFAULT_CONFIG)
+                return self.data
+
+            try:
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+                print(f"[配置] 已加载配置文件: {config_file}")
+            except Exception as e:
+                print(f"[警告] 加载配置文件失败: {e}")
+                self.data = dict(DEFAULT_CONFIG)
+            return self.data
+
+    def save(self, config):
+        """保存配置，在batch()中只做标记，退出batch时统一写入"""
+        with self.lock:
+            self.load()
+            self.data = config
+            self.dirty = True
+            if self.batch_depth:
+                return True
+            return self.flush()
+
+    def flush(self):
+        """把未写入的修改写入文件"""
+        with self.lock:
+            if not self.dirty:
+                return True
+
+            try:
+                # 确保目录存在
+                if not self.dir_ensured:
+                    os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
+                    self.dir_ensured = True
+                # 先写临时文件再原子替换，其他进程不会读到写了一半的config.json
+                from config_lock import atomic_write_text
+                atomic_write_text(self.config_file,
+                                  json.dumps(self.data, ensure_ascii=False, indent=2))
+                print(f"[配置] 配置已保存到: {self.config_file}")
+                self.stamp = self._stat()
+                return True
+            except Exception as e:
+                print(f"[错误] 保存配置文件失败: {e}")
+                # 丢弃写入失败的修改，下次重新读取文件
+                self.data = None
+                return False
+            finally:
+                self.dirty = False
+
+    def batch(self):
+        """
+        合并多次保存，用于with语句：
+            with config_store.batch():
+                ...
+        """
+        return _StoreBatch(self)
+
+class _StoreBatch:
+    """ConfigStore.batch()返回的上下文"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __enter__(self):
+        with self.store.lock:
+            self.store.batch_depth += 1
+        return self.store
+
+    def __exit__(self, exc_type, exc, tb):
+        with self.store.lock:
+            self.store.batch_depth -= 1
+            if not self.store.batch_depth:
+                self.store.flush()
+        return False
+
+config_store = ConfigStore()
 
 def load_config():
     """加载配置文件"""
-    config_file = get_config_file_path()
-    
-    if not os.path.exists(config_file):
-        # 返回默认配置
-        return {
-            'obsidian_path': None,
-            'last_updated': None
-        }
-    
-    try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        print(f"[配置] 已加载配置文件: {config_file}")
-        return config
-    except Exception as e:
-        print(f"[警告] 加载配置文件失败: {e}")
-        return {
-            'obsidian_path': None,
-            'last_updated': None
-        }
+    return config_store.load()
 
 def save_config(config):
     """保存配置文件"""
-    config_file = get_config_file_path()
-    
-    try:
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
-        print(f"[配置] 配置已保存到: {config_file}")
-        return True
-    except Exception as e:
-        print(f"[错误] 保存配置文件失败: {e}")
-        return False
+    return config_store.save(config)
 
 def save_obsidian_path(obsidian_path):
     """保存Obsidian路径到配置"""
     import time
-    
-    config = load_config()
-    config['obsidian_path'] = obsidian_path
-    config['last_updated'] = int(time.time())
-    
-    return save_config(config)
+
+    with config_store.lock:
+        config = load_config()
+        config['obsidian_path'] = obsidian_path
+        config['last_updated'] = int(time.time())
+        return save_config(config)
 
 def get_obsidian_path():
     """从配置获取Obsidian路径"""
     config = load_config()
     obsidian_path = config.get('obsidian_path')
-    
-    if obsidian_path and os.path.exists(obsidian_path):
+
+    if obsidian_path and fs_probe.exists(obsidian_path):
         print(f"[配置] 使用已保存的Obsidian路径: {obsidian_path}")
         return obsidian_path
     elif obsidian_path:
         print(f"[警告] 已保存的Obsidian路径不存在: {obsidian_path}")
-    
+
     return None
 
 def get_saved_obsidian_exe_path():
@@ -83,24 +178,175 @@ def get_saved_obsidian_exe_path():
     obsidian_dir = get_obsidian_path()
     if obsidian_dir:
         obsidian_exe = os.path.join(obsidian_dir, "Obsidian.exe")
-        if os.path.exists(obsidian_exe):
+        if fs_probe.exists(obsidian_exe):
             return obsidian_exe
         else:
             print(f"[警告] Obsidian.exe不存在于保存的路径: {obsidian_exe}")
-    
+
+    return None
+
+def get_registry_index():
+    """获取上次记录的 DisplayName -> 注册表卸载信息键 索引"""
+    return load_config().get('registry_index') or {}
+
+def save_registry_index(registry_index):
+    """保存 DisplayName -> 注册表卸载信息键 索引"""
+    with config_store.lock:
+        config = load_config()
+        if config.get('registry_index') == registry_index:
+            return True
+        config['registry_index'] = registry_index
+        return save_config(config)
+
+def get_candidate_hits():
+    """获取各候选安装位置（按来源）的历史命中次数"""
+    return load_config().get('candidate_hits') or {}
+
+def record_candidate_hit(source):
+    """记录一次在指定来源找到Obsidian"""
+    with config_store.lock:
+        config = load_config()
+        hits = config.get('candidate_hits') or {}
+        hits[source] = hits.get(source, 0) + 1
+        config['candidate_hits'] = hits
+        return save_config(config)
+
+def _stat_candidate(path):
+    """获取候选路径的(大小, 修改时间)，文件不存在时返回None"""
+    st = fs_probe.stat(path)
+    if st is None:
+        return None
+    return st.st_size, int(st.st_mtime)
+
+def save_discovery_cache(candidates):
+    """
+    保存Obsidian可执行文件查找结果
+    candidates为 [(路径, 来源)]，只记录实际存在的文件及其大小、修改时间和来源注册表键
+    """
+    import time
+
+    entries = []
+    for path, source in candidates:
+        stamp = _stat_candidate(path)
+        if stamp is None:
+            continue
+        entries.append({
+            'path': path,
+            'size': stamp[0],
+            'mtime': stamp[1],
+            'source': source,
+        })
+
+    with config_store.lock:
+        config = load_config()
+        config['discovery_cache'] = {
+            'candidates': entries,
+            'updated': int(time.time()),
+        }
+        return save_config(config)
+
+def get_cached_obsidian_exe():
+    """
+    从查找缓存中获取仍然有效的Obsidian.exe路径
+    每个候选只做一次stat：文件不存在说明安装已被移动，从缓存中移除；
+    文件存在但大小或修改时间变化说明被原地更新，仍然可用并刷新记录
+    所有候选都失效时返回None，调用方需要重新完整查找
+    """
+    with config_store.lock:
+        config = load_config()
+        cache = config.get('discovery_cache') or {}
+        entries = cache.get('candidates') or []
+
+        valid_entries = []
+        changed = False
+        for entry in entries:
+            stamp = _stat_candidate(entry.get('path', ''))
+            if stamp is None:
+                print(f"[配置] 缓存的Obsidian路径已失效: {entry.get('path')}")
+                changed = True
+                continue
+            if stamp != (entry.get('size'), entry.get('mtime')):
+                print(f"[配置] Obsidian已更新，刷新缓存记录: {entry['path']}")
+                entry['size'], entry['mtime'] = stamp
+                changed = True
+            valid_entries.append(entry)
+
+        if changed:
+            cache['candidates'] = valid_entries
+            config['discovery_cache'] = cache
+            save_config(config)
+
+    if valid_entries:
+        print(f"[配置] 使用缓存的Obsidian路径: {valid_entries[0]['path']}（来源: {valid_entries[0].get('source')}）")
+        return valid_entries[0]['path']
     return None
 
+def _positive_int(value):
+    """配置值为正整数时返回该值，否则返回None"""
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    return None
+
+def get_auto_compact_threshold_kb():
+    """获取自动清理obsidian.json的大小阈值（KB），未设置时返回None（不自动清理）"""
+    return _positive_int(load_config().get('auto_compact_kb'))
+
+def get_compact_max_vaults():
+    """获取清理时保留的最多vault数，未设置时返回None（不限制）"""
+    return _positive_int(load_config().get('compact_max_vaults'))
+
+def get_last_compact_size():
+    """获取上次清理后obsidian.json的大小（字节）"""
+    return load_config().get('last_compact_size') or 0
+
+def save_last_compact_size(size):
+    """记录清理后obsidian.json的大小"""
+    with config_store.lock:
+        config = load_config()
+        config['last_compact_size'] = size
+        return save_config(config)
+
+def get_warmup_settings():
+    """
+    获取vault预读设置，config.json中vault_warmup不为true时返回None（不预读）
+    返回 {'max_bytes': ..., 'seconds': ...}，warmup_max_mb和warmup_seconds未设置时使用默认值
+    """
+    config = load_config()
+    if config.get('vault_warmup') is not True:
+        return None
+    from vault_warmup import WARMUP_MAX_MB, WARMUP_SECONDS
+    max_mb = _positive_int(config.get('warmup_max_mb')) or WARMUP_MAX_MB
+    seconds = _positive_int(config.get('warmup_seconds')) or WARMUP_SECONDS
+    return {'max_bytes': max_mb * 1024 * 1024, 'seconds': seconds}
+
+def is_prescan_enabled():
+    """注册新vault前是否预扫描并生成排除项，config.json中vault_prescan为true时开启"""
+    return load_config().get('vault_prescan') is True
+
+def get_vault_template():
+    """
+    获取新vault的模板设置，返回 (模板路径, 生成方式)，未设置vault_template时返回None
+    生成方式为vault_template_mode：hardlink（默认，插件代码使用硬链接）或copy
+    """
+    config = load_config()
+    template_path = config.get('vault_template')
+    if not template_path:
+        return None
+    from vault_template import LINK_MODE, TEMPLATE_MODES
+    mode = config.get('vault_template_mode')
+    return template_path, mode if mode in TEMPLATE_MODES else LINK_MODE
+
 if __name__ == "__main__":
     print("配置管理模块测试")
     print("=" * 40)
-    
+
     # 测试加载配置
     config = load_config()
     print(f"当前配置: {config}")
-    
+
     # 测试获取Obsidian路径
     path = get_obsidian_path()
     print(f"Obsidian路径: {path}")
-    
+
     exe_path = get_saved_obsidian_exe_path()
-    print(f"Obsidian.exe路径: {exe_path}")
\ No newline at end of file
+    print(f"Obsidian.exe路径: {exe_path}")
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+obsidian.json文本补丁模块
+每次打开只会改动少量字节（清除旧的"open":true、更新目标vault的ts和open），
+对于很大的配置文件，直接在文本中定位受影响的vault对象并只改写这些片段，
+避免完整的json.loads和json.dump；结构不符合预期时返回None，由调用方回退到完整解析
+"""
+import os
+import re
+import json
+import time
+from json.decoder import scanstring
+import fs_probe
+from vault_index import CASE_INSENSITIVE_PATHS
+
+# 小文件完整解析本身就很快，只对较大的文件使用补丁
+PATCH_MIN_BYTES = 64 * 1024
+
+VAULTS_PREFIX = '{"vaults":{'
+OPEN_MEMBER = ',"open":true'
+TS_MEMBER = ',"ts":'
+ENTRY_START = '{"path":'
+VAULT_KEY = re.compile(r'"[0-9a-f]{16}":$')
+
+class PatchFallback(Exception):
+    """文件结构不符合补丁引擎的预期，需要完整解析"""
+
+def _parse_entry(text, obj_start):
+    """
+    解析从obj_start开始的vault对象，只接受Obsidian写出的紧凑格式：
+    {"path":"...","ts":123} 或 {"path":"...","ts":123,"open":true}
+    返回 (path, ts_start, ts_end, open_start, obj_end)，open_start在没有open时为None
+    """
+    if not text.startswith(ENTRY_START + '"', obj_start):
+        raise PatchFallback("vault对象不以path开头")
+    if not VAULT_KEY.search(text, max(0, obj_start - 19), obj_start):
+        raise PatchFallback("vault键不是16位ID")
+
+    try:
+        path, pos = scanstring(text, obj_start + len(ENTRY_START) + 1)
+    except ValueError as e:
+        raise PatchFallback(f"path字符串无效: {e}")
+
+    if not text.startswith(TS_MEMBER, pos):
+        raise PatchFallback("vault对象缺少ts")
+    ts_start = pos + len(TS_MEMBER)
+    ts_end = ts_start
+    while ts_end < len(text) and text[ts_end].isdigit():
+        ts_end += 1
+    if ts_end == ts_start:
+        raise PatchFallback("ts不是整数")
+
+    open_start = None
+    pos = ts_end
+    if text.startswith(OPEN_MEMBER, pos):
+        open_start = pos
+        pos += len(OPEN_MEMBER)
+    if not text.startswith('}', pos):
+        raise PatchFallback("vault对象包含未知字段")
+    return path, ts_start, ts_end, open_start, pos + 1
+
+def _find_open_entries(text, vaults_start):
+    """找出所有带"open":true的vault对象，返回 {对象起点: 解析结果}"""
+    entries = {}
+    pos = text.find(OPEN_MEMBER, vaults_start)
+    while pos != -1:
+        obj_start = text.rfind(ENTRY_START, vaults_start, pos)
+        if obj_start == -1:
+            raise PatchFallback("open标志不在vault对象中")
+        entry = _parse_entry(text, obj_start)
+        if entry[3] != pos:
+            raise PatchFallback("open标志位置异常")
+        entries[obj_start] = entry
+        pos = text.find(OPEN_MEMBER, pos + len(OPEN_MEMBER))
+    if text.count(OPEN_MEMBER[1:], vaults_start) != len(entries):
+        raise PatchFallback("存在无法定位的open标志")
+    return entries
+
+def _find_vault_by_path(text, vaults_start, folder_path):
+    """按路径查找已有vault对象，返回对象起点，不存在时返回None"""
+    encoded = json.dumps(folder_path, ensure_ascii=False)
+    obj_start = text.find(ENTRY_START + encoded + TS_MEMBER, vaults_start)
+    if obj_start != -1:
+        return obj_start
+
+    # 路径可能以\uXXXX转义形式保存，这种情况交给完整解析，避免重复添加vault
+    ascii_encoded = json.dumps(folder_path, ensure_ascii=True)
+    if ascii_encoded != encoded and text.find(ascii_encoded, vaults_start) != -1:
+        raise PatchFallback("路径以转义形式保存")
+
+    # 路径不区分大小写时（Windows），只对编码长度相同的已有path值做normcase比较，
+    # 大小写不同的已有vault交给完整解析，由VaultIndex按normcase匹配
+    if CASE_INSENSITIVE_PATHS:
+        key = os.path.normcase(folder_path)
+        candidates = re.compile(r'\{"path":"([^"]{%d})","ts":' % (len(encoded) - 2))
+        for match in candidates.finditer(text, vaults_start):
+            if os.path.normcase(scanstring(text, match.start(1))[0]) == key:
+                raise PatchFallback("路径大小写与已有vault不同")
+    return None
+
+def build_patched_text(text, folder_paths, generate_vault_id):
+    """
+    在配置文本上应用打开操作，返回 (新文本, [(文件夹路径, vault ID, 是否新建)], 改动字节数)
+    没有实质变化（只有ts会更新）时返回原文本，改动字节数为0；结构不符合预期时抛出PatchFallback
+    """
+    if not text.startswith(VAULTS_PREFIX):
+        raise PatchFallback("文件不以vaults开头")
+    vaults_start = len(VAULTS_PREFIX)
+    timestamp = str(int(time.time() * 1000))
+
+    # 对象起点 -> (改写起点, 改写终点, 新内容)
+    edits = {}
+    open_entries = _find_open_entries(text, vaults_start)
+    targets = set()
+    for obj_start, entry in open_entries.items():
+        open_start = entry[3]
+        edits[obj_start] = (open_start, open_start + len(OPEN_MEMBER), '')
+
+    results = []
+    inserted = []
+    seen = set()
+    for folder_path in folder_paths:
+        folder_path = os.path.abspath(folder_path)
+        if folder_path in seen:
+            continue
+        seen.add(folder_path)
+        if not fs_probe.exists(folder_path):
+            print(f"[错误] 文件夹不存在: {folder_path}")
+            continue
+
+        obj_start = _find_vault_by_path(text, vaults_start, folder_path)
+        if obj_start is not None:
+            _, ts_start, _, _, obj_end = _parse_entry(text, obj_start)
+            edits[obj_start] = (ts_start, obj_end, f'{timestamp},"open":true}}')
+            targets.add(obj_start)
+            vault_id = text[obj_start - 18:obj_start - 2]
+            results.append((folder_path, vault_id, False))
+            continue
+
+        vault_id = generate_vault_id(folder_path)
+        if text.find(f'"{vault_id}":{{', vaults_start) != -1:
+            raise PatchFallback("vault ID已存在")
+        entry = json.dumps({'path': folder_path, 'ts': int(timestamp), 'open': True},
+                           ensure_ascii=False, separators=(',', ':'))
+        inserted.append(f'"{vault_id}":{entry}')
+        results.append((folder_path, vault_id, True))
+
+    # 打开的vault集合不变且没有新vault时只有ts会变化，不需要改写
+    if not inserted and targets == set(open_entries):
+        return text, results, 0
+
+    pieces = [text[:vaults_start]]
+    changed = 0
+    if inserted:
+        insertion = ','.join(inserted)
+        if not text.startswith('}', vaults_start):
+            insertion += ','
+        pieces.append(insertion)
+        changed += len(insertion)
+
+    pos = vaults_start
+    for start, end, replacement in sorted(edits.values()):
+        pieces.append(text[pos:start])
+        pieces.append(replacement)
+        changed += max(end - start, len(replacement))
+        pos = end
+    pieces.append(text[pos:])
+    return ''.join(pieces), results, changed
+
+def patch_obsidian_config(config_path, folder_paths, generate_vault_id, cache=None):
+    """
+    用文本补丁更新obsidian.json
+    成功时返回 [(文件夹路径, vault ID, 是否新建)]，没有有效文件夹或写入失败时返回空列表；
+    文件较小或结构不符合预期时返回None，调用方应回退到完整解析
+    传入cache（main.ObsidianConfigCache）时文件未被修改就使用缓存的文本，写入后更新缓存
+    """
+    from config_lock import atomic_write_text
+
+    try:
+        if os.path.getsize(config_path) < PATCH_MIN_BYTES:
+            return None
+        text = cache.get(config_path)[0] if cache is not None else None
+        if text is None:
+            with open(config_path, 'r', encoding='utf-8') as file:
+                text = file.read()
+            if cache is not None:
+                cache.store(config_path, text)
+        new_text, results, changed = build_patched_text(text, folder_paths, generate_vault_id)
+    except PatchFallback as e:
+        print(f"[信息] 配置结构不适合补丁写入，改为完整解析: {e}")
+        return None
+    except (OSError, ValueError) as e:
+        print(f"[信息] 补丁写入不可用，改为完整解析: {e}")
+        return None
+
+    if not results:
+        return []
+    if not changed:
+        print("[信息] 配置没有实质变化（只有时间戳），跳过写入")
+        return results
+
+    try:
+        atomic_write_text(config_path, new_text)
+    except OSError as e:
+        print(f"[错误] 写入配置文件失败: {e}")
+        if cache is not None:
+            cache.clear()
+        return []
+    if cache is not None:
+        cache.store(config_path, new_text)
+    for folder_path, vault_id, is_new in results:
+        print(f"[成功] {'已添加新vault' if is_new else '已更新现有vault'}: {vault_id} {folder_path}")
+    print(f"[成功] 配置文件已更新（补丁改动 {changed} 字节）: {config_path}")
+    return results
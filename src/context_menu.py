@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+右键菜单注册模块
+通过registry_backend直接写入和删除HKEY_CLASSES_ROOT下的右键菜单键，
+不再生成.reg文件再启动regedit导入。写入前先读取已安装的值，只写入不一致的部分，
+已是最新时不做任何修改；注册表后端换成内存注册表后可以在Linux上运行
+"""
+import os
+from registry_backend import get_backend, HKEY_CLASSES_ROOT
+
+CONTEXT_MENU_KEY = r"Directory\shell\OpenWithObsidian"
+BACKGROUND_MENU_KEY = r"Directory\Background\shell\OpenWithObsidian"
+MENU_KEYS = (CONTEXT_MENU_KEY, BACKGROUND_MENU_KEY)
+
+def get_context_menu_entries(obsidian_dir, exe_path, multi_select=True):
+    """
+    右键菜单需要的注册表值
+    返回 [(HKEY_CLASSES_ROOT下的子键, {值名称: 值})]，值名称为''表示默认值；
+    multi_select为True时使用Player多选模型，选中超过15个文件夹时菜单项仍然可见
+    """
+    # 确保路径使用标准的Windows路径格式（反斜杠）
+    exe_path_normalized = os.path.normpath(exe_path)
+    obsidian_exe_path = os.path.normpath(os.path.join(obsidian_dir, "Obsidian.exe"))
+
+    shell_values = {"": "Open with Obsidian", "Icon": obsidian_exe_path}
+    if multi_select:
+        shell_values["MultiSelectModel"] = "Player"
+
+    return [
+        (CONTEXT_MENU_KEY, shell_values),
+        (CONTEXT_MENU_KEY + "\\command", {"": f'{exe_path_normalized} "%1"'}),
+        (BACKGROUND_MENU_KEY, {"": "Open this folder in Obsidian", "Icon": obsidian_exe_path}),
+        (BACKGROUND_MENU_KEY + "\\command", {"": f'{exe_path_normalized} "%V"'}),
+    ]
+
+def find_outdated_entries(entries, backend=None):
+    """
+    读取已安装的值，返回需要写入的部分 [(子键, {值名称: 值})]
+    键或值不存在、值不同都算作需要写入
+    """
+    backend = backend or get_backend()
+    outdated = []
+    for subkey, values in entries:
+        try:
+            key = backend.open_key(HKEY_CLASSES_ROOT, subkey)
+        except OSError:
+            outdated.append((subkey, dict(values)))
+            continue
+        try:
+            changed = {}
+            for name, value in values.items():
+                try:
+                    current, _ = backend.query_value(key, name)
+                except OSError:
+                    current = None
+                if current != value:
+                    changed[name] = value
+        finally:
+            backend.close_key(key)
+        if changed:
+            outdated.append((subkey, changed))
+    return outdated
+
+def register_context_menu(entries):
+    """
+    一次写入entries中与已安装值不一致的部分，写入后重新读取校验
+    返回写入的值数量（已是最新时为0），写入或校验失败时返回None
+    """
+    try:
+        backend = get_backend()
+        outdated = find_outdated_entries(entries, backend)
+        if not outdated:
+            return 0
+
+        written = 0
+        for subkey, values in outdated:
+            key = backend.create_key(HKEY_CLASSES_ROOT, subkey)
+            try:
+                for name, value in values.items():
+                    backend.set_value_ex(key, name, value)
+                    written += 1
+            finally:
+                backend.close_key(key)
+
+        if find_outdated_entries(entries, backend):
+            print("写入后校验注册表失败")
+            return None
+        return written
+    except Exception as e:
+        print(f"写入注册表失败: {e}")
+        return None
+
+def unregister_context_menu():
+    """
+    删除右键菜单的键（先删除command子键），已不存在的键视为已删除
+    返回删除的键数量，失败时返回None
+    """
+    try:
+        backend = get_backend()
+        removed = 0
+        for menu_key in MENU_KEYS:
+            for subkey in (menu_key + "\\command", menu_key):
+                try:
+                    backend.delete_key(HKEY_CLASSES_ROOT, subkey)
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+    except Exception as e:
+        print(f"删除注册表键失败: {e}")
+        return None
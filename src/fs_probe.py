@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+文件系统探测模块
+所有"路径是否存在/是否为文件夹"的检查都通过这里进行：
+- 每个路径在一次运行中只stat一次，结果缓存
+- 网络路径（UNC共享、映射的网络驱动器）在工作线程中stat，超过期限视为不可访问，
+  同一驱动器或共享上的其他路径直接判定为不可访问，断开的网络驱动器不会让点击卡住几十秒
+"""
+import os
+import sys
+import ntpath
+import stat as stat_module
+
+PROBE_TIMEOUT = 2.0
+DRIVE_REMOTE = 4
+
+class _Pending:
+    """在工作线程中进行的一次stat"""
+
+    def __init__(self, path, stat_func):
+        import threading
+        self.result = None
+        self.done = threading.Event()
+        thread = threading.Thread(target=self._run, args=(path, stat_func),
+                                  name='path-probe', daemon=True)
+        thread.start()
+
+    def _run(self, path, stat_func):
+        try:
+            self.result = stat_func(path)
+        except (OSError, ValueError):
+            self.result = None
+        self.done.set()
+
+class PathProbe:
+    """
+    带缓存和超时的路径探测
+    threaded为None时只对网络路径使用工作线程，为True时所有路径都使用（用于测试）
+    """
+
+    def __init__(self, timeout=PROBE_TIMEOUT, threaded=None, stat_func=os.stat):
+        self.timeout = timeout
+        self.threaded = threaded
+        self.stat_func = stat_func
+        self.results = {}
+        self.pending = {}
+        self.unreachable_roots = set()
+        self._remote_drives = {}
+
+    def _root(self, path):
+        """路径所在的驱动器或UNC共享，按Windows规则解析"""
+        return ntpath.splitdrive(path)[0].lower()
+
+    def _is_remote(self, path):
+        """是否为UNC共享或映射的网络驱动器"""
+        if self.threaded is not None:
+            return self.threaded
+        if sys.platform != 'win32':
+            return False
+        drive = ntpath.splitdrive(path)[0]
+        if drive.startswith(('\\\\', '//')):
+            return True
+        if not drive:
+            return False
+        remote = self._remote_drives.get(drive.lower())
+        if remote is None:
+            import ctypes
+            remote = ctypes.windll.kernel32.GetDriveTypeW(drive + '\\') == DRIVE_REMOTE
+            self._remote_drives[drive.lower()] = remote
+        return remote
+
+    def prefetch(self, paths):
+        """为多个网络路径同时开始stat，之后的stat()只需等待结果"""
+        for path in paths:
+            if path and path not in self.results and path not in self.pending and self._is_remote(path):
+                if self._root(path) not in self.unreachable_roots:
+                    self.pending[path] = _Pending(path, self.stat_func)
+
+    def stat(self, path):
+        """返回os.stat结果，路径不存在、无法访问或超时时返回None"""
+        if not path:
+            return None
+        if path in self.results:
+            return self.results[path]
+
+        if not self._is_remote(path):
+            try:
+                result = self.stat_func(path)
+            except (OSError, ValueError):
+                result = None
+            self.results[path] = result
+            return result
+
+        root = self._root(path)
+        if root in self.unreachable_roots:
+            self.results[path] = None
+            return None
+
+        pending = self.pending.pop(path, None) or _Pending(path, self.stat_func)
+        if not pending.done.wait(self.timeout):
+            print(f"[警告] 访问路径超时（可能是断开的网络驱动器）: {path}")
+            if root:
+                self.unreachable_roots.add(root)
+            self.results[path] = None
+            return None
+        self.results[path] = pending.result
+        return pending.result
+
+    def exists(self, path):
+        return self.stat(path) is not None
+
+    def isdir(self, path):
+        st = self.stat(path)
+        return st is not None and stat_module.S_ISDIR(st.st_mode)
+
+    def isfile(self, path):
+        st = self.stat(path)
+        return st is not None and stat_module.S_ISREG(st.st_mode)
+
+_probe = None
+
+def get_probe():
+    """获取本次运行共用的探测器"""
+    global _probe
+    if _probe is None:
+        _probe = PathProbe()
+    return _probe
+
+def reset_probe(probe=None):
+    """丢弃缓存的探测结果（常驻服务在每次请求前调用），可以传入自定义的探测器"""
+    global _probe
+    _probe = probe
+
+def exists(path):
+    return get_probe().exists(path)
+
+def isdir(path):
+    return get_probe().isdir(path)
+
+def isfile(path):
+    return get_probe().isfile(path)
+
+def stat(path):
+    return get_probe().stat(path)
@@ -1,16 +1,24 @@
 # -*- coding: utf-8 -*-
 """
 Obsidian文件夹打开器安装程序
-自动检测Obsidian路径，生成注册表文件，并安装右键菜单功能
+自动检测Obsidian路径，并安装右键菜单功能
+
+用法: obsidian_installer.exe [--export-reg] [--uninstall]
+  --export-reg  同时在当前目录生成安装和卸载用的.reg文件
+  --uninstall   删除右键菜单
 """
 import os
 import sys
 import shutil
-import subprocess
+import hashlib
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from registry_utils import get_enhanced_obsidian_paths
-from config_manager import save_obsidian_path
+from registry_utils import find_obsidian_adaptive
+from config_manager import save_obsidian_path, save_discovery_cache
+from context_menu import (CONTEXT_MENU_KEY, BACKGROUND_MENU_KEY, get_context_menu_entries,
+                          register_context_menu, unregister_context_menu)
+
+HASH_CHUNK = 1024 * 1024
 
 def find_obsidian_installation():
     """
@@ -18,14 +26,15 @@ def find_obsidian_installation():
     """
     print("正在查找Obsidian安装路径...")
     
-    # 使用增强的路径查找
-    obsidian_paths = get_enhanced_obsidian_paths()
+    # 按历史命中顺序检查常规安装位置，都未命中时才遍历注册表；
+    # 记录所有存在的候选供主程序快速校验
+    path, candidates = find_obsidian_adaptive()
+    save_discovery_cache(candidates)
     
-    for path in obsidian_paths:
-        if os.path.exists(path):
-            obsidian_dir = os.path.dirname(path)
-            print(f"找到Obsidian安装目录: {obsidian_dir}")
-            return obsidian_dir, path
+    if path:
+        obsidian_dir = os.path.dirname(path)
+        print(f"找到Obsidian安装目录: {obsidian_dir}")
+        return obsidian_dir, path
     
     print("未能自动找到Obsidian安装路径")
     return None, None
@@ -102,46 +111,53 @@ def safe_messagebox_error(title, message):
             except:
                 pass
 
-def generate_registry_file(obsidian_dir, exe_path):
+def _write_if_changed(file_path, content):
     """
-    生成注册表文件到当前目录
+    内容与现有文件不同时才写入，返回是否写入
     """
-    print("正在生成注册表文件...")
-    
-    # 确保路径使用标准的Windows路径格式（反斜杠）
-    exe_path_normalized = os.path.normpath(exe_path)
-    obsidian_exe_path = os.path.normpath(os.path.join(obsidian_dir, "Obsidian.exe"))
-    
-    # 对于注册表文件，路径中的反斜杠需要双重转义
-    exe_path_escaped = exe_path_normalized.replace("\\", "\\\\")
-    obsidian_exe_escaped = obsidian_exe_path.replace("\\", "\\\\")
-    
-    # 注册表内容
-    reg_content = f'''Windows Registry Editor Version 5.00
-
-; Add "Open with Obsidian" to folder context menu
-[HKEY_CLASSES_ROOT\\Directory\\shell\\OpenWithObsidian]
-@="Open with Obsidian"
-"Icon"="{obsidian_exe_escaped}"
-
-[HKEY_CLASSES_ROOT\\Directory\\shell\\OpenWithObsidian\\command]
-@="{exe_path_escaped} \\"%1\\""
-
-; Add to folder background context menu (right-click in empty space)
-[HKEY_CLASSES_ROOT\\Directory\\Background\\shell\\OpenWithObsidian]
-@="Open this folder in Obsidian"
-"Icon"="{obsidian_exe_escaped}"
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
 
-[HKEY_CLASSES_ROOT\\Directory\\Background\\shell\\OpenWithObsidian\\command]
-@="{exe_path_escaped} \\"%V\\""
-'''
+def generate_registry_file(obsidian_dir, exe_path, multi_select=True):
+    """
+    生成注册表文件到当前目录（可选的导出文件，安装时直接写入注册表，不需要导入）
+    multi_select为True时使用Player多选模型，选中超过15个文件夹时菜单项仍然可见，
+    各个进程的请求会由常驻服务合并为一次配置写入
+    """
+    print("正在生成注册表文件...")
     
-    # 写入注册表文件到当前目录，使用UTF-8编码
+    comments = {
+        CONTEXT_MENU_KEY: '; Add "Open with Obsidian" to folder context menu',
+        BACKGROUND_MENU_KEY: '; Add to folder background context menu (right-click in empty space)',
+    }
+    
+    # 对于注册表文件，值中的反斜杠和引号需要转义
+    lines = ["Windows Registry Editor Version 5.00", ""]
+    for subkey, values in get_context_menu_entries(obsidian_dir, exe_path, multi_select):
+        if subkey in comments:
+            lines.append(comments[subkey])
+        lines.append(f"[HKEY_CLASSES_ROOT\\{subkey}]")
+        for name, value in values.items():
+            escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+            label = f'"{name}"' if name else "@"
+            lines.append(f'{label}="{escaped}"')
+        lines.append("")
+    reg_content = "\n".join(lines)
+    
+    # 写入注册表文件到当前目录，使用UTF-8编码；内容未变化时不重写
     reg_file_path = os.path.join(os.getcwd(), "add_obsidian_context_menu.reg")
     try:
-        with open(reg_file_path, 'w', encoding='utf-8') as f:
-            f.write(reg_content)
-        print(f"注册表文件已生成: {reg_file_path}")
+        if _write_if_changed(reg_file_path, reg_content):
+            print(f"注册表文件已生成: {reg_file_path}")
+        else:
+            print(f"注册表文件已是最新: {reg_file_path}")
         return reg_file_path
     except Exception as e:
         print(f"生成注册表文件失败: {e}")
@@ -164,17 +180,69 @@ def generate_uninstall_registry_file(current_dir):
     
     uninstall_reg_path = os.path.join(current_dir, "remove_obsidian_context_menu.reg")
     try:
-        with open(uninstall_reg_path, 'w', encoding='utf-8') as f:
-            f.write(uninstall_reg_content)
-        print(f"卸载注册表文件已生成: {uninstall_reg_path}")
+        if _write_if_changed(uninstall_reg_path, uninstall_reg_content):
+            print(f"卸载注册表文件已生成: {uninstall_reg_path}")
+        else:
+            print(f"卸载注册表文件已是最新: {uninstall_reg_path}")
         return uninstall_reg_path
     except Exception as e:
         print(f"生成卸载注册表文件失败: {e}")
         return None
 
+def _file_digest(path):
+    """
+    分块计算文件的SHA-256
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+def files_identical(path_a, path_b):
+    """
+    先比较大小，大小相同时再比较内容哈希，返回两个文件内容是否相同
+    """
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        return _file_digest(path_a) == _file_digest(path_b)
+    except OSError:
+        return False
+
+def _remove_quietly(path):
+    """
+    删除文件，文件不存在或删除失败时忽略
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def replace_file_atomically(source, target):
+    """
+    先复制到目标目录下的临时文件，再用os.replace替换目标文件，目标路径不会出现复制了一半的文件
+    目标exe正在运行（如常驻服务）时Windows不允许覆盖，但允许重命名：先把旧文件改名为.old再替换
+    """
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    old_path = target + ".old"
+    # 上次替换留下的旧文件，对应进程已退出时可以删除
+    _remove_quietly(old_path)
+    try:
+        shutil.copy2(source, tmp_path)
+        try:
+            os.replace(tmp_path, target)
+        except PermissionError:
+            os.replace(target, old_path)
+            os.replace(tmp_path, target)
+    except OSError:
+        _remove_quietly(tmp_path)
+        raise
+
 def copy_exe_to_obsidian_dir(exe_path, obsidian_dir):
     """
     将exe文件复制到Obsidian目录
+    目标文件内容相同时跳过复制，不同时原子替换
     """
     print("正在复制exe文件到Obsidian目录...")
     
@@ -196,48 +264,45 @@ def copy_exe_to_obsidian_dir(exe_path, obsidian_dir):
             print(f"目标目录不存在: {obsidian_dir}")
             return None
         
-        # 如果目标文件已存在，先删除
+        # 源文件就是已安装的文件（从Obsidian目录重新运行安装程序）
+        if os.path.normcase(exe_path) == os.path.normcase(target_path):
+            print(f"文件已在Obsidian目录中: {target_path}")
+            return target_path
+        
         if os.path.exists(target_path):
-            print(f"目标文件已存在，将被覆盖: {target_path}")
-            os.remove(target_path)
+            if files_identical(exe_path, target_path):
+                print(f"目标文件已是最新，跳过复制: {target_path}")
+                return target_path
+            print(f"目标文件已存在，将被替换: {target_path}")
         
-        shutil.copy2(exe_path, target_path)
+        replace_file_atomically(exe_path, target_path)
         print(f"文件已复制到: {target_path}")
         return target_path
     except Exception as e:
         print(f"复制文件失败: {e}")
         return None
 
-def apply_registry_file(reg_file_path):
+def uninstall_context_menu():
     """
-    应用注册表文件
+    删除右键菜单，返回退出码
     """
-    print("正在应用注册表文件...")
+    print("正在删除右键菜单...")
+    removed = unregister_context_menu()
+    if removed is None:
+        safe_messagebox_error("错误", "删除右键菜单失败")
+        return 1
     
+    print(f"右键菜单已删除（删除了 {removed} 个注册表键）")
+    root = tk.Tk()
+    root.withdraw()
     try:
-        # 检查是否以管理员身份运行
-        import ctypes
-        if not ctypes.windll.shell32.IsUserAnAdmin():
-            print("错误: 需要管理员权限来修改注册表")
-            print("请以管理员身份运行此程序")
-            return False
-        
-        # 应用注册表文件
-        result = subprocess.run(['regedit', '/s', reg_file_path], 
-                              capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("注册表文件应用成功")
-            return True
-        else:
-            print(f"应用注册表文件失败: {result.stderr}")
-            return False
-            
-    except Exception as e:
-        print(f"应用注册表文件时出错: {e}")
-        return False
+        messagebox.showinfo("卸载完成", "右键菜单已删除。\n"
+                            "如需彻底卸载，请删除Obsidian目录下的 open_folder_with_obsidian.exe")
+    finally:
+        root.destroy()
+    return 0
 
-def show_completion_dialog(obsidian_dir, exe_path):
+def show_completion_dialog(obsidian_dir, exe_path, reg_exported=False):
     """
     显示安装完成对话框
     """
@@ -260,20 +325,20 @@ def show_completion_dialog(obsidian_dir, exe_path):
     y = (root.winfo_screenheight() // 2) - (root.winfo_height() // 2)
     root.geometry(f"+{x}+{y}")
     
+    export_line = "\n• 注册表文件已导出到当前目录" if reg_exported else ""
     message = f"""✓ Obsidian文件夹打开器安装成功！
 
 安装详情：
 • Obsidian目录: {obsidian_dir}
 • 执行文件: {exe_path}
-• 右键菜单已添加
-• 注册表文件已生成到当前目录
+• 右键菜单已添加{export_line}
 
 使用方法：
 1. 在任意文件夹上右键点击，选择"Open with Obsidian"
 2. 或在文件夹内空白处右键，选择"Open this folder in Obsidian"
 
 如需卸载：
-运行当前目录下的 remove_obsidian_context_menu.reg 文件
+以管理员身份运行 obsidian_installer.exe --uninstall
 """
     
     label = tk.Label(root, text=message, justify=tk.LEFT, padx=20, pady=20)
@@ -307,10 +372,18 @@ def show_completion_dialog(obsidian_dir, exe_path):
             pass
         sys.exit(0)
 
-def main():
+def main(args=None):
     """
     主安装流程
     """
+    import argparse
+    parser = argparse.ArgumentParser(prog='obsidian_installer.exe',
+                                     description="安装用Obsidian打开文件夹的右键菜单")
+    parser.add_argument('--export-reg', action='store_true',
+                        help="同时在当前目录生成安装和卸载用的.reg文件")
+    parser.add_argument('--uninstall', action='store_true', help="删除右键菜单")
+    options = parser.parse_args(args)
+    
     print("=" * 60)
     print("Obsidian文件夹打开器安装程序")
     print("=" * 60)
@@ -321,43 +394,46 @@ def main():
         if not ctypes.windll.shell32.IsUserAnAdmin():
             root = tk.Tk()
             root.withdraw()
-            messagebox.showerror("权限不足", 
-                               "此程序需要管理员权限来修改注册表。\n"
-                               "请右键选择此程序，然后选择'以管理员身份运行'。")
+            messagebox.showerror("权限不足",
+                                 "此程序需要管理员权限来修改注册表。\n"
+                                 "请右键选择此程序，然后选择'以管理员身份运行'。")
             root.destroy()  # 确保销毁窗口
             sys.exit(1)
     except Exception as e:
         print(f"权限检查异常: {e}")
         pass
-    
+
+    if options.uninstall:
+        sys.exit(uninstall_context_menu())
+
     # 1. 查找Obsidian安装路径
     obsidian_dir, obsidian_exe = find_obsidian_installation()
-    
+
     if not obsidian_dir:
         root = tk.Tk()
         root.withdraw()
-        
+
         try:
-            choice = messagebox.askyesno("未找到Obsidian", 
-                                       "未能自动找到Obsidian安装路径。\n"
-                                       "是否手动选择Obsidian安装目录？")
-            
+            choice = messagebox.askyesno("未找到Obsidian",
+                                         "未能自动找到Obsidian安装路径。\n"
+                                         "是否手动选择Obsidian安装目录？")
+
             if choice:
                 obsidian_dir = filedialog.askdirectory(title="请选择Obsidian安装目录")
                 if not obsidian_dir:
                     print("未选择目录，安装取消")
                     root.destroy()  # 确保销毁窗口
                     sys.exit(1)
-                
+
                 # 标准化路径格式
                 obsidian_dir = os.path.normpath(obsidian_dir)
                 obsidian_exe = os.path.join(obsidian_dir, "Obsidian.exe")
-                
+
                 if not os.path.exists(obsidian_exe):
-                    safe_messagebox_error("错误", 
-                        f"在选择的目录中未找到Obsidian.exe文件\n"
-                        f"选择的目录: {obsidian_dir}\n"
-                        f"期望的文件: {obsidian_exe}")
+                    safe_messagebox_error("错误",
+                                          f"在选择的目录中未找到Obsidian.exe文件\n"
+                                          f"选择的目录: {obsidian_dir}\n"
+                                          f"期望的文件: {obsidian_exe}")
                     root.destroy()  # 确保销毁窗口
                     sys.exit(1)
                 
@@ -401,23 +477,25 @@ def main():
         safe_messagebox_error("错误", "复制文件失败")
         sys.exit(1)
     
-    # 4. 生成注册表文件到当前目录
-    current_dir = os.getcwd()
-    reg_file_path = generate_registry_file(obsidian_dir, target_exe_path)
-    if not reg_file_path:
-        safe_messagebox_error("错误", "生成注册表文件失败")
+    # 4. 写入右键菜单注册表项（已安装的值与当前一致时不写入）
+    entries = get_context_menu_entries(obsidian_dir, target_exe_path)
+    written = register_context_menu(entries)
+    if written is None:
+        safe_messagebox_error("错误", "写入右键菜单注册表项失败")
         sys.exit(1)
+    if written:
+        print(f"右键菜单已写入注册表（{written} 个值）")
+    else:
+        print("右键菜单已是最新，未修改注册表")
     
-    # 5. 生成卸载注册表文件到当前目录
-    uninstall_reg_path = generate_uninstall_registry_file(current_dir)
+    # 5. 按需导出安装和卸载用的注册表文件到当前目录
+    if options.export_reg:
+        current_dir = os.getcwd()
+        generate_registry_file(obsidian_dir, target_exe_path)
+        generate_uninstall_registry_file(current_dir)
     
-    # 6. 应用注册表文件
-    if apply_registry_file(reg_file_path):
-        print("安装成功！")
-        show_completion_dialog(obsidian_dir, target_exe_path)
-    else:
-        safe_messagebox_error("错误", "应用注册表文件失败")
-        sys.exit(1)
+    print("安装成功！")
+    show_completion_dialog(obsidian_dir, target_exe_path, options.export_reg)
 
 if __name__ == "__main__":
     main()
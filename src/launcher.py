@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Obsidian启动策略模块
+- shell:  原来的方式，经cmd.exe启动Obsidian
+- direct: 不经过shell，直接执行Obsidian.exe
+- auto:   先在进程表中查找正在运行的Obsidian，找到时把文件夹通过obsidian://open交给它，
+          否则按direct方式启动（默认）
+进程表在Linux上读取/proc（用于测试和基准测试），Windows上使用Toolhelp32快照
+Obsidian（Electron）运行时在其数据目录中持有单实例锁，锁不存在时不必扫描进程表
+"""
+import os
+import sys
+
+from profiler import span
+
+DEFAULT_STRATEGY = 'auto'
+# Electron的单实例锁：Windows上是独占打开、进程退出时由系统删除的lockfile，
+# Linux上是SingletonLock符号链接（异常退出后可能残留，此时仍会扫描进程表）
+INSTANCE_LOCK_NAME = 'lockfile' if sys.platform == 'win32' else 'SingletonLock'
+
+class ProcessTable:
+    """进程表接口"""
+
+    def find(self, image_name):
+        """返回映像名为image_name（不区分大小写）的进程ID，未找到时返回None"""
+        raise NotImplementedError
+
+class ProcfsProcessTable(ProcessTable):
+    """读取/proc/<pid>/comm的进程表（Linux）"""
+
+    # comm最多保存15个字符
+    COMM_LENGTH = 15
+
+    def __init__(self, proc_dir='/proc'):
+        self.proc_dir = proc_dir
+
+    def find(self, image_name):
+        target = image_name[:self.COMM_LENGTH].lower()
+        try:
+            entries = os.listdir(self.proc_dir)
+        except OSError:
+            return None
+        for entry in entries:
+            if not entry.isdigit():
+                continue
+            try:
+                with open(os.path.join(self.proc_dir, entry, 'comm'), 'rb') as f:
+                    comm = f.read().decode('utf-8', 'replace').strip()
+            except OSError:
+                continue
+            if comm.lower() == target:
+                return int(entry)
+        return None
+
+class WindowsProcessTable(ProcessTable):
+    """使用CreateToolhelp32Snapshot遍历进程的进程表（Windows）"""
+
+    TH32CS_SNAPPROCESS = 0x00000002
+    MAX_PATH = 260
+
+    def find(self, image_name):
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESSENTRY32W(ctypes.Structure):
+            _fields_ = [
+                ('dwSize', wintypes.DWORD),
+                ('cntUsage', wintypes.DWORD),
+                ('th32ProcessID', wintypes.DWORD),
+                ('th32DefaultHeapID', ctypes.c_size_t),
+                ('th32ModuleID', wintypes.DWORD),
+                ('cntThreads', wintypes.DWORD),
+                ('th32ParentProcessID', wintypes.DWORD),
+                ('pcPriClassBase', ctypes.c_long),
+                ('dwFlags', wintypes.DWORD),
+                ('szExeFile', ctypes.c_wchar * self.MAX_PATH),
+            ]
+
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+        kernel32.CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+        kernel32.Process32FirstW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+        kernel32.Process32NextW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        snapshot = kernel32.CreateToolhelp32Snapshot(self.TH32CS_SNAPPROCESS, 0)
+        if snapshot in (None, wintypes.HANDLE(-1).value):
+            return None
+
+        target = image_name.lower()
+        try:
+            entry = PROCESSENTRY32W()
+            entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+            found = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+            while found:
+                if entry.szExeFile.lower() == target:
+                    return entry.th32ProcessID
+                found = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+        finally:
+            kernel32.CloseHandle(snapshot)
+        return None
+
+def get_process_table():
+    """获取当前平台的进程表实现"""
+    if sys.platform == 'win32':
+        return WindowsProcessTable()
+    return ProcfsProcessTable()
+
+def get_instance_lock_path():
+    """获取Obsidian单实例锁的路径（与obsidian.json在同一目录）"""
+    return os.path.join(os.getenv("APPDATA"), 'obsidian', INSTANCE_LOCK_NAME)
+
+def build_open_uri(folder_path):
+    """生成让Obsidian打开指定路径的obsidian:// URI"""
+    from urllib.parse import quote
+    return f"obsidian://open?path={quote(folder_path, safe='')}"
+
+def _spawn(args, shell=False):
+    """启动进程，不等待其结束"""
+    import subprocess
+    kwargs = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+    if sys.platform == 'win32' and not shell:
+        # 与本程序的控制台分离，本程序退出时不影响Obsidian
+        kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    subprocess.Popen(args, shell=shell, **kwargs)
+
+class LaunchStrategy:
+    """启动策略接口"""
+
+    name = None
+
+    def launch(self, exe_path, folder_paths=None):
+        """启动Obsidian（或把文件夹交给已运行的实例），成功返回True"""
+        raise NotImplementedError
+
+class ShellLauncher(LaunchStrategy):
+    """经shell启动（原来的方式）"""
+
+    name = 'shell'
+
+    def launch(self, exe_path, folder_paths=None):
+        with span('spawn'):
+            _spawn([exe_path], shell=True)
+        return True
+
+class DirectLauncher(LaunchStrategy):
+    """直接执行Obsidian.exe，省去启动cmd.exe的开销"""
+
+    name = 'direct'
+
+    def launch(self, exe_path, folder_paths=None):
+        with span('spawn'):
+            _spawn([exe_path])
+        return True
+
+class HandoffLauncher(LaunchStrategy):
+    """
+    Obsidian已在运行时，把每个文件夹以obsidian://open?path=...交给它，
+    由已运行的实例打开，不再冷启动第二个实例；未运行时直接启动
+    未运行时一次启动就会打开obsidian.json中所有设置了open的vault；已运行的实例不会重新读取
+    open标志，而一个obsidian://open只能指定一个vault（再次启动的进程只把自己的命令行转交给
+    已运行的实例后立即退出），所以批量打开时每个文件夹需要各交接一次
+    单实例锁不存在时Obsidian一定未运行，只需一次lstat，不扫描进程表
+    """
+
+    name = 'auto'
+
+    def __init__(self, process_table=None, fallback=None, lock_path=None):
+        self.process_table = process_table or get_process_table()
+        self.fallback = fallback or DirectLauncher()
+        self.lock_path = lock_path
+
+    def may_be_running(self):
+        """单实例锁是否存在（SingletonLock是指向不存在目标的符号链接，要用lexists）"""
+        return os.path.lexists(self.lock_path or get_instance_lock_path())
+
+    def launch(self, exe_path, folder_paths=None):
+        with span('detect_instance'):
+            pid = None
+            if folder_paths and self.may_be_running():
+                pid = self.process_table.find(os.path.basename(exe_path))
+        if pid is None:
+            return self.fallback.launch(exe_path, folder_paths)
+
+        print(f"[信息] Obsidian正在运行（PID {pid}），将文件夹交给该实例打开")
+        with span('handoff'):
+            for folder_path in folder_paths:
+                _spawn([exe_path, build_open_uri(folder_path)])
+        return True
+
+STRATEGIES = {
+    'shell': ShellLauncher,
+    'direct': DirectLauncher,
+    'auto': HandoffLauncher,
+}
+
+def get_launcher(name=None):
+    """
+    获取启动策略；name为None时读取config.json中的launch_strategy，默认为auto
+    """
+    if name is None:
+        from config_manager import load_config
+        name = load_config().get('launch_strategy') or DEFAULT_STRATEGY
+    strategy = STRATEGIES.get(name)
+    if strategy is None:
+        print(f"[警告] 未知的启动策略: {name}，使用 {DEFAULT_STRATEGY}")
+        strategy = STRATEGIES[DEFAULT_STRATEGY]
+    return strategy()
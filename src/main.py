@@ -5,12 +5,17 @@
 """
 import os
 import json
-import hashlib
 import time
 import sys
-import subprocess
-from registry_utils import get_enhanced_obsidian_paths
-from config_manager import get_saved_obsidian_exe_path, save_obsidian_path
+import fs_probe
+from vault_index import VaultIndex
+from profiler import span, start_profiling, write_profile
+
+# 本次运行中启动的后台预读，退出前等待它们在时间预算内结束
+_warmups = []
+
+# 注意：hashlib、subprocess、config_manager、registry_utils等模块只在实际用到时才导入，
+# 以缩短右键点击到Obsidian启动之间的时间
 
 def safe_input(prompt=""):
     """
@@ -29,6 +34,7 @@ def generate_vault_id(folder_path):
     为文件夹路径生成唯一的vault ID
     使用路径的MD5哈希值的前16位
     """
+    import hashlib
     path_hash = hashlib.md5(folder_path.encode('utf-8')).hexdigest()
     return path_hash[:16]
 
@@ -38,14 +44,64 @@ def get_obsidian_config_path():
     """
     return os.path.join(os.getenv("APPDATA"), 'obsidian', 'obsidian.json')
 
-def clean_existing_open_flags(config):
+class ObsidianConfigCache:
+    """
+    obsidian.json的进程内缓存（常驻服务使用）
+    保存上次读取或写入的文本和解析结果，按(mtime, 大小)判断文件是否被Obsidian或其他进程修改过
+    """
+
+    def __init__(self):
+        self.stamp = None
+        self.text = None
+        self.config = None
+
+    @staticmethod
+    def _stat(config_path):
+        """获取文件的(mtime, 大小)，文件不存在时返回None"""
+        try:
+            st = os.stat(config_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, config_path):
+        """
+        返回缓存的 (文本, 解析结果)，文件自上次读写以来被修改过时返回 (None, None)
+        只更新了ts而未写入时，解析结果中的ts比文件新，与下次写入的内容一致
+        """
+        if self.stamp is None or self._stat(config_path) != self.stamp:
+            self.clear()
+        return self.text, self.config
+
+    def store(self, config_path, text=None, config=None):
+        """记录刚读取或写入的内容，只有文本时解析结果视为未缓存"""
+        self.stamp = self._stat(config_path)
+        self.text = text
+        self.config = config
+
+    def clear(self):
+        """丢弃缓存，下次重新读取文件"""
+        self.stamp = None
+        self.text = None
+        self.config = None
+
+# obsidian.json缓存，只在常驻服务中开启；进程内处理每次运行只读取一次文件
+_config_cache = None
+
+def enable_obsidian_config_cache():
+    """开启obsidian.json缓存，返回缓存对象"""
+    global _config_cache
+    _config_cache = ObsidianConfigCache()
+    return _config_cache
+
+def clean_existing_open_flags(config, index=None):
     """
     移除现有vault中的open标志，为新vault让路
+    传入index时只处理索引中记录为打开的vault
     """
-    if 'vaults' in config:
-        for vault_id, vault_info in config['vaults'].items():
-            if 'open' in vault_info:
-                del vault_info['open']
+    if index is None:
+        index = VaultIndex(config)
+    index.clear_open_flags()
     return config
 
 def read_obsidian_config():
@@ -54,16 +110,25 @@ def read_obsidian_config():
     """
     config_path = get_obsidian_config_path()
     
-    if not os.path.exists(config_path):
+    content = None
+    if _config_cache is not None:
+        content, config = _config_cache.get(config_path)
+        if config is not None:
+            return config
+    
+    if content is None and not os.path.exists(config_path):
         print(f"[错误] 未找到obsidian.json配置文件: {config_path}")
         return None
     
     try:
-        with open(config_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+        if content is None:
+            with open(config_path, 'r', encoding='utf-8') as file:
+                content = file.read()
             
         # 解析JSON
         config = json.loads(content)
+        if _config_cache is not None:
+            _config_cache.store(config_path, content, config)
         return config
         
     except json.JSONDecodeError as e:
@@ -85,62 +150,66 @@ def write_obsidian_config(config):
         if not os.path.exists(config_dir):
             os.makedirs(config_dir)
         
-        # 写入配置文件
-        with open(config_path, 'w', encoding='utf-8') as file:
-            json.dump(config, file, ensure_ascii=False, separators=(',', ':'))
+        # 先写临时文件再原子替换，Obsidian不会读到写了一半的文件
+        from config_lock import atomic_write_text
+        content = json.dumps(config, ensure_ascii=False, separators=(',', ':'))
+        atomic_write_text(config_path, content)
+        if _config_cache is not None:
+            _config_cache.store(config_path, content, config)
         
         print(f"[成功] 配置文件已更新: {config_path}")
         return True
         
     except Exception as e:
         print(f"[错误] 写入配置文件失败: {e}")
+        if _config_cache is not None:
+            _config_cache.clear()
         return False
 
-def add_vault_to_config(config, folder_path):
+def add_vault_to_config(config, folder_path, index=None):
     """
     在配置中添加新的vault
+    传入index时通过索引查找已有vault，否则临时构建索引
     """
     # 确保folder_path是绝对路径
     folder_path = os.path.abspath(folder_path)
     
     # 检查文件夹是否存在
-    if not os.path.exists(folder_path):
+    if not fs_probe.exists(folder_path):
         print(f"[错误] 文件夹不存在: {folder_path}")
         return False
     
-    # 生成vault ID
-    vault_id = generate_vault_id(folder_path)
-    
-    # 确保vaults字段存在
-    if 'vaults' not in config:
-        config['vaults'] = {}
+    # 构建索引时会确保vaults字段存在
+    if index is None:
+        index = VaultIndex(config)
     
     # 检查是否已经存在相同路径的vault
-    for existing_id, vault_info in config['vaults'].items():
-        if vault_info.get('path') == folder_path:
-            print(f"[信息] 文件夹已存在于配置中: {folder_path}")
-            print(f"[信息] 现有vault ID: {existing_id}")
-            
-            # 重要：为已有vault设置open标志和更新时间戳
-            current_timestamp = int(time.time() * 1000)  # 毫秒时间戳
-            vault_info['open'] = True
-            vault_info['ts'] = current_timestamp
-            
-            print(f"[成功] 已更新现有vault:")
-            print(f"  ID: {existing_id}")
-            print(f"  路径: {folder_path}")
-            print(f"  时间戳: {current_timestamp}")
-            print(f"  设置为打开状态: True")
-            
-            return existing_id
+    existing_id = index.find(folder_path)
+    if existing_id is not None:
+        print(f"[信息] 文件夹已存在于配置中: {folder_path}")
+        print(f"[信息] 现有vault ID: {existing_id}")
+        
+        # 重要：为已有vault设置open标志和更新时间戳
+        current_timestamp = int(time.time() * 1000)  # 毫秒时间戳
+        index.mark_open(existing_id)
+        index.touch(existing_id, current_timestamp)
+        
+        print(f"[成功] 已更新现有vault:")
+        print(f"  ID: {existing_id}")
+        print(f"  路径: {folder_path}")
+        print(f"  时间戳: {current_timestamp}")
+        print(f"  设置为打开状态: True")
+        
+        return existing_id
     
     # 添加新的vault
+    vault_id = generate_vault_id(folder_path)
     current_timestamp = int(time.time() * 1000)  # 毫秒时间戳
-    config['vaults'][vault_id] = {
+    index.add(vault_id, {
         'path': folder_path,
         'ts': current_timestamp,
         'open': True
-    }
+    })
     
     print(f"[成功] 已添加新vault:")
     print(f"  ID: {vault_id}")
@@ -149,150 +218,461 @@ def add_vault_to_config(config, folder_path):
     
     return vault_id
 
-def launch_obsidian():
+def start_obsidian(exe_path, folder_paths=None):
     """
-    启动Obsidian应用程序
-    按照优先级顺序查找：1.配置文件 2.注册表 3.提示用户安装
+    启动指定路径的Obsidian可执行文件
+    按config.json中的launch_strategy选择启动方式，默认直接执行，Obsidian已运行时把文件夹交给它
     """
-    print("\n正在启动Obsidian...")
+    from launcher import get_launcher
+    launcher = get_launcher()
+    print(f"即将启动Obsidian（{launcher.name}）...")
+    launched = launcher.launch(exe_path, folder_paths)
+    print("启动命令已执行")
+    return launched
+
+def discover_obsidian_exe():
+    """
+    按优先级查找Obsidian.exe：1.配置文件 2.查找缓存 3.常规安装位置和注册表
+    不依赖obsidian.json，可以与配置写入并行执行
+    返回 (Obsidian.exe路径, 是否来自保存的配置路径)，未找到时返回 (None, False)
+    """
+    from config_manager import (get_saved_obsidian_exe_path, get_cached_obsidian_exe,
+                                save_discovery_cache)
+    
+    print("\n正在查找Obsidian...")
     print("=" * 40)
     
     # 第一优先级：使用保存的配置路径
     print("1. 检查保存的配置路径...")
-    saved_exe_path = get_saved_obsidian_exe_path()
-    if saved_exe_path and os.path.exists(saved_exe_path):
+    with span('saved_path'):
+        saved_exe_path = get_saved_obsidian_exe_path()
+        saved_exists = bool(saved_exe_path) and fs_probe.exists(saved_exe_path)
+    if saved_exists:
         print(f"[成功] 使用保存的Obsidian路径: {saved_exe_path}")
-        print("即将启动Obsidian...")
-        subprocess.Popen([saved_exe_path], shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        print("启动命令已执行")
-        print("\n" + "=" * 40)
-        print("成功启动Obsidian！")
-        print("=" * 40)
-        return True
+        return saved_exe_path, True
     elif saved_exe_path:
         print(f"[警告] 保存的路径已失效: {saved_exe_path}")
     else:
         print("[信息] 未找到保存的配置路径")
     
-    # 第二优先级：使用注册表和常规路径查找
-    print("\n2. 使用注册表和常规路径查找...")
-    OBSIDIAN_PATHS = get_enhanced_obsidian_paths()
-    
-    path_found = False
-    found_path = None
-    for i, path in enumerate(OBSIDIAN_PATHS, 1):
-        print(f"正在检查路径 {i}: {path}")
-        if os.path.exists(path):
-            print(f"[成功找到] {path}")
-            found_path = path
-            path_found = True
-            break
-        else:
-            print(f"[未找到] {path}")
+    # 第二优先级：使用查找缓存，每个候选只需一次stat
+    print("\n2. 检查Obsidian查找缓存...")
+    with span('discovery_cache'):
+        found_path = get_cached_obsidian_exe()
+    if found_path is not None:
+        return found_path, False
     
-    if path_found:
-        print("即将启动Obsidian...")
-        subprocess.Popen([found_path], shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        print("启动命令已执行")
-        
+    # 第三优先级：按历史命中顺序检查常规安装位置，都未命中时才遍历注册表
+    print("\n3. 检查常规安装位置和注册表...")
+    # 注册表模块只在保存的路径和缓存都失效时才加载
+    with span('probe_candidates'):
+        from registry_utils import find_obsidian_adaptive
+        found_path, candidates = find_obsidian_adaptive()
+    
+    # 记录所有存在的候选，下次保存的路径失效时无需再遍历注册表
+    with span('save_discovery_cache'):
+        save_discovery_cache(candidates)
+    return found_path, False
+
+def start_discovered_obsidian(exe_path, from_saved, folder_paths=None, interactive=True):
+    """
+    启动discover_obsidian_exe找到的Obsidian，新找到的路径保存到配置中
+    没有找到时提示用户重新配置并返回False；interactive为False时（常驻服务）不等待用户按键
+    """
+    from config_manager import save_obsidian_path
+    
+    if exe_path is None:
+        # 第四优先级：提示用户重新安装配置
+        print("\n4. 未找到Obsidian，需要重新配置...")
+        print("所有路径都未找到Obsidian")
+        print("请按以下步骤操作：")
+        print("1. 确认Obsidian已正确安装")
+        print("2. 以管理员身份运行 obsidian_installer.exe 重新配置路径")
+        print("3. 或者手动安装Obsidian到标准位置")
+        if interactive:
+            safe_input("按回车键继续...")
+        return False
+    
+    start_obsidian(exe_path, folder_paths)
+    
+    if not from_saved:
         # 将找到的路径保存到配置文件中，以便下次使用
-        obsidian_dir = os.path.dirname(found_path)
+        obsidian_dir = os.path.dirname(exe_path)
         print(f"正在保存找到的路径到配置文件: {obsidian_dir}")
-        if save_obsidian_path(obsidian_dir):
+        with span('save_path'):
+            saved = save_obsidian_path(obsidian_dir)
+        if saved:
             print("✓ 路径已保存，下次启动将更快")
         else:
             print("⚠ 保存配置失败，但不影响本次使用")
-        
-        print("\n" + "=" * 40)
-        print("成功启动Obsidian！")
-        print("=" * 40)
-        return True
     
-    # 第三优先级：提示用户重新安装配置
-    print("\n3. 未找到Obsidian，需要重新配置...")
-    print("所有路径都未找到Obsidian")
-    print("请按以下步骤操作：")
-    print("1. 确认Obsidian已正确安装")
-    print("2. 以管理员身份运行 obsidian_installer.exe 重新配置路径")
-    print("3. 或者手动安装Obsidian到标准位置")
-    safe_input("按回车键继续...")
-    return False
+    print("\n" + "=" * 40)
+    print("成功启动Obsidian！")
+    print("=" * 40)
+    return True
 
-def open_folder_with_obsidian(folder_path):
+def start_obsidian_discovery():
     """
-    用Obsidian打开指定文件夹
+    在后台线程中执行discover_obsidian_exe
+    返回一个函数，调用时等待查找结束并返回 (Obsidian.exe路径, 是否来自保存的配置路径)
     """
-    print(f"准备用Obsidian打开文件夹: {folder_path}")
-    print("=" * 60)
+    import threading
+    result = []
     
-    # 读取当前配置
-    print("\n1. 读取Obsidian配置...")
-    config = read_obsidian_config()
-    if config is None:
-        return False
+    def run():
+        with span('discovery'):
+            result.append(discover_obsidian_exe())
     
-    # 清理现有的open标志
-    print("\n2. 清理现有vault的open标志...")
-    config = clean_existing_open_flags(config)
+    thread = threading.Thread(target=run, name='obsidian-discovery', daemon=True)
+    thread.start()
     
-    # 添加vault到配置
-    print("\n3. 添加文件夹到Obsidian vault列表...")
-    vault_id = add_vault_to_config(config, folder_path)
-    if not vault_id:
-        return False
+    def wait():
+        thread.join()
+        return result[0] if result else (None, False)
+    return wait
+
+def auto_compact_if_needed():
+    """
+    config.json中设置了auto_compact_kb且obsidian.json超过该大小时，清理已不存在的vault
+    在启动Obsidian之后调用，不增加打开的延迟；自行获取ConfigLock，锁被其他进程占用时跳过，
+    下次打开时再检查。未设置时不导入清理模块
+    """
+    from config_manager import get_auto_compact_threshold_kb, get_compact_max_vaults
+    threshold_kb = get_auto_compact_threshold_kb()
+    if threshold_kb is None:
+        return None
+    from config_lock import ConfigLock
+    lock = ConfigLock()
+    if not lock.acquire(blocking=False):
+        return None
+    try:
+        from vault_compact import auto_compact
+        return auto_compact(get_obsidian_config_path(), threshold_kb, get_compact_max_vaults())
+    finally:
+        lock.release()
+
+def start_vault_warmup(folder_paths):
+    """
+    config.json中开启vault_warmup时，在后台预读新打开的文件夹，让Obsidian建立索引时少读冷盘
+    未开启时不导入预读模块，返回None
+    """
+    from config_manager import get_warmup_settings
+    settings = get_warmup_settings()
+    if settings is None:
+        return None
+    from vault_warmup import VaultWarmup
+    # 常驻服务中会多次调用，先移除已经结束的预读
+    _warmups[:] = [warmup for warmup in _warmups if not warmup.wait(0)]
+    print(f"[信息] 后台预读文件夹（最多 {settings['max_bytes'] // (1024 * 1024)} MB、{settings['seconds']} 秒）")
+    warmup = VaultWarmup(folder_paths, **settings).start()
+    _warmups.append(warmup)
+    return warmup
+
+def wait_vault_warmup():
+    """等待本次运行启动的预读结束（预读本身受时间预算限制）"""
+    for warmup in _warmups:
+        warmup.wait()
+        stats = warmup.stats()
+        print(f"[信息] 预读完成: {stats['files']} 个文件，{stats['bytes'] // 1024} KB")
+    _warmups.clear()
+
+def prepare_new_vaults(folder_paths):
+    """
+    为新注册、还没有.obsidian目录的vault做准备：
+    设置了vault_template时按模板生成.obsidian，然后预扫描，把node_modules、构建输出和数据目录写入排除项
+    没有需要准备的vault时不导入模板和预扫描模块
+    """
+    new_folders = [folder_path for folder_path in folder_paths
+                   if not fs_probe.isdir(os.path.join(folder_path, '.obsidian'))]
+    if not new_folders:
+        return
+    from config_manager import get_vault_template, is_prescan_enabled
+    template = get_vault_template()
+    prescan = is_prescan_enabled()
+    for folder_path in new_folders:
+        if template is not None:
+            from vault_template import seed_vault
+            seed_vault(template[0], folder_path, template[1])
+        if prescan:
+            from vault_prescan import prescan_vault
+            prescan_vault(folder_path)
+
+def register_folders(folder_paths):
+    """
+    在一次读写obsidian.json中注册所有文件夹并设置为打开状态
+    返回成功注册的文件夹列表；请求已由其他进程一并处理时返回空列表，失败时返回None
+    """
+    # 获取写入锁；其他进程正在写入时请求会排队，由持锁进程一并处理
+    from config_lock import acquire_or_enqueue, drain_queue, complete_requests
+    with span('lock'):
+        lock, handled = acquire_or_enqueue(folder_paths)
+    if handled:
+        print("[成功] 请求已由正在运行的实例一并写入配置")
+        return []
     
-    # 写入配置
-    print("\n4. 保存配置...")
-    if not write_obsidian_config(config):
-        return False
+    try:
+        with span('drain_queue'):
+            queued_paths, tickets = drain_queue()
+        if queued_paths:
+            print(f"[信息] 一并处理 {len(tickets)} 个排队的请求")
+        
+        # 大配置文件优先使用文本补丁，只改写受影响的vault，避免完整解析和序列化
+        with span('patch_config'):
+            from config_patch import patch_obsidian_config
+            patched = patch_obsidian_config(get_obsidian_config_path(), folder_paths + queued_paths,
+                                            generate_vault_id, _config_cache)
+        if patched is not None:
+            if not patched:
+                return None
+            added = [folder_path for folder_path, _, _ in patched]
+            new_vaults = [folder_path for folder_path, _, is_new in patched if is_new]
+            complete_requests(tickets)
+        else:
+            # 读取当前配置
+            print("\n1. 读取Obsidian配置...")
+            with span('read_config'):
+                config = read_obsidian_config()
+            if config is None:
+                return None
+        
+            # 每次读取后只构建一次vault索引
+            with span('build_index'):
+                index = VaultIndex(config)
+        
+            # 清理现有的open标志
+            print("\n2. 清理现有vault的open标志...")
+            with span('clean_flags'):
+                config = clean_existing_open_flags(config, index)
+        
+            # 添加vault到配置，包括其他进程排队的请求
+            print("\n3. 添加文件夹到Obsidian vault列表...")
+            added = []
+            with span('add_vaults'):
+                for folder_path in folder_paths + queued_paths:
+                    vault_id = add_vault_to_config(config, folder_path, index)
+                    if vault_id and folder_path not in added:
+                        added.append(folder_path)
+            if not added:
+                # 缓存的解析结果已清除了open标志却不会写入，丢弃
+                if _config_cache is not None:
+                    _config_cache.clear()
+                return None
+            new_vaults = [config['vaults'][vault_id]['path'] for vault_id in index.added_ids]
+        
+            # 写入配置；目标vault本来就是唯一打开的vault时只有ts变化，不必重写整个文件
+            if index.is_dirty():
+                print("\n4. 保存配置...")
+                with span('write_config'):
+                    written = write_obsidian_config(config)
+                if not written:
+                    return None
+            else:
+                print("\n4. 配置没有实质变化（只有时间戳），跳过写入")
+            complete_requests(tickets)
+    finally:
+        if lock is not None:
+            lock.release()
+    
+    # 释放锁之后、启动Obsidian之前，为新注册的vault生成配置和排除项
+    with span('prepare_vaults'):
+        prepare_new_vaults(new_vaults)
+    
+    return added
+
+def open_folders_with_obsidian(folder_paths, discovered=None, interactive=True):
+    """
+    用Obsidian批量打开多个文件夹
+    所有文件夹在一次读取、一次写入obsidian.json中完成注册，最后只启动一次Obsidian
+    （Obsidian已在运行时每个文件夹各交接一次，见launcher.HandoffLauncher）
+    discovered为已查找到的 (Obsidian.exe路径, 是否来自保存的配置路径) 时不再查找；
+    interactive为False时（常驻服务）出错也不等待用户按键
+    """
+    if len(folder_paths) == 1:
+        print(f"准备用Obsidian打开文件夹: {folder_paths[0]}")
+    else:
+        print(f"准备用Obsidian打开 {len(folder_paths)} 个文件夹")
+    print("=" * 60)
     
-    # 启动Obsidian
-    print("\n5. 启动Obsidian...")
-    if not launch_obsidian():
+    from config_manager import config_store
+    
+    # 查找Obsidian.exe不依赖obsidian.json，在后台线程中与配置写入同时进行，
+    # 启动只等待写入完成，总耗时约为两者中较长的一个
+    with config_store.batch():
+        if discovered is None:
+            wait_for_discovery = start_obsidian_discovery()
+        try:
+            added = register_folders(folder_paths)
+        finally:
+            if discovered is None:
+                with span('wait_discovery'):
+                    discovered = wait_for_discovery()
+        exe_path, from_saved = discovered
+        
+        if added is None:
+            return False
+        if not added:
+            return True
+        
+        # 预读与Obsidian启动同时进行
+        start_vault_warmup(added)
+        
+        # 启动Obsidian
+        print("\n5. 启动Obsidian...")
+        with span('launch'):
+            launched = start_discovered_obsidian(exe_path, from_saved, added, interactive)
+    
+    # Obsidian启动之后再检查是否需要自动清理，清理不会推迟打开
+    with span('auto_compact'):
+        auto_compact_if_needed()
+    if not launched:
         return False
     
-    print(f"\n✓ 成功完成！文件夹 '{folder_path}' 已添加到Obsidian")
+    for folder_path in added:
+        print(f"\n✓ 成功完成！文件夹 '{folder_path}' 已添加到Obsidian")
     print("请在Obsidian中选择对应的vault来打开该文件夹")
     
     return True
 
+def open_folder_with_obsidian(folder_path):
+    """
+    用Obsidian打开指定文件夹
+    """
+    return open_folders_with_obsidian([folder_path])
+
+def read_folder_list(list_file):
+    """
+    读取--from-file指定的文件夹列表，每行一个路径，忽略空行和#开头的注释行
+    """
+    try:
+        with open(list_file, 'r', encoding='utf-8-sig') as file:
+            return [line.strip() for line in file if line.strip() and not line.strip().startswith('#')]
+    except Exception as e:
+        print(f"[错误] 读取文件夹列表失败: {e}")
+        return None
+
+def parse_folder_args(args):
+    """
+    解析命令行中的文件夹参数，支持多个路径和 --from-file <列表文件>
+    返回文件夹路径列表，参数有误时返回None
+    """
+    folder_paths = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--from-file":
+            if i + 1 >= len(args):
+                print("[错误] --from-file 需要指定列表文件")
+                return None
+            listed = read_folder_list(args[i + 1])
+            if listed is None:
+                return None
+            folder_paths.extend(listed)
+            i += 2
+            continue
+        folder_paths.append(arg)
+        i += 1
+    
+    # 去除路径两端的引号
+    cleaned = []
+    for folder_path in folder_paths:
+        print(f"原始参数: {repr(folder_path)}")
+        if folder_path.startswith('"') and folder_path.endswith('"'):
+            folder_path = folder_path[1:-1]
+            print(f"去除引号后: {repr(folder_path)}")
+        cleaned.append(folder_path)
+    return cleaned
+
+def validate_folders(folder_paths):
+    """
+    验证文件夹是否存在，返回有效的文件夹路径列表（去重并保持顺序）
+    """
+    # 网络路径同时开始探测，一个不可访问的共享不会让每个路径依次等待
+    fs_probe.get_probe().prefetch(folder_paths)
+    
+    valid = []
+    for folder_path in folder_paths:
+        # 每个路径只stat一次，网络路径超时视为不存在
+        st = fs_probe.stat(folder_path)
+        
+        # 验证路径是否存在
+        if st is None:
+            print(f"[错误] 指定的文件夹不存在或无法访问: {folder_path}")
+            continue
+        
+        # 验证是否为文件夹
+        if not fs_probe.isdir(folder_path):
+            print(f"[错误] 指定的路径不是文件夹: {folder_path}")
+            continue
+        
+        folder_path = os.path.abspath(folder_path)
+        if folder_path not in valid:
+            valid.append(folder_path)
+    return valid
+
 def main():
     """
     主函数 - 处理命令行参数
     """
-    if len(sys.argv) != 2:
-        print("用法: open_folder_with_obsidian.exe <文件夹路径>")
+    args = sys.argv[1:]
+    if args == ["--service"]:
+        from opener_service import run_service
+        run_service()
+        sys.exit(0)
+    
+    # compact：清理obsidian.json中已不存在的vault
+    if args and args[0] == "compact":
+        from vault_compact import run_compact_command
+        sys.exit(run_compact_command(args[1:]))
+    
+    # dedupe：用硬链接合并各vault中相同的插件文件
+    if args and args[0] == "dedupe":
+        from vault_dedupe import run_dedupe_command
+        sys.exit(run_dedupe_command(args[1:]))
+    
+    # --profile：记录各阶段耗时，结束时向profile.log追加一行JSON
+    if "--profile" in args:
+        start_profiling()
+        args = [arg for arg in args if arg != "--profile"]
+    
+    folder_paths = parse_folder_args(args)
+    if not folder_paths:
+        print("用法: open_folder_with_obsidian.exe <文件夹路径> [<文件夹路径> ...]")
+        print("      open_folder_with_obsidian.exe --from-file <列表文件>  （每行一个文件夹路径）")
+        print("      open_folder_with_obsidian.exe --service  （以常驻服务方式运行）")
+        print("      open_folder_with_obsidian.exe --profile <文件夹路径>  （记录各阶段耗时到profile.log）")
+        print("      open_folder_with_obsidian.exe compact [--max-vaults N] [--drop] [--dry-run]  （清理已不存在的vault）")
+        print("      open_folder_with_obsidian.exe dedupe [--dry-run] [--rollback]  （用硬链接合并各vault中相同的插件文件）")
         print("示例: open_folder_with_obsidian.exe \"C:\\Users\\Username\\Documents\\MyNotes\"")
         print(f"实际收到的参数数量: {len(sys.argv)}")
         print(f"参数列表: {sys.argv}")
         safe_input("按回车键退出...")
         sys.exit(1)
     
-    folder_path = sys.argv[1]
-    print(f"原始参数: {repr(folder_path)}")
-    
-    # 去除路径两端的引号
-    if folder_path.startswith('"') and folder_path.endswith('"'):
-        folder_path = folder_path[1:-1]
-        print(f"去除引号后: {repr(folder_path)}")
-    
-    # 验证路径是否存在
-    if not os.path.exists(folder_path):
-        print(f"[错误] 指定的文件夹不存在: {folder_path}")
+    valid_paths = validate_folders(folder_paths)
+    if not valid_paths:
         safe_input("按回车键退出...")
         sys.exit(1)
     
-    # 验证是否为文件夹
-    if not os.path.isdir(folder_path):
-        print(f"[错误] 指定的路径不是文件夹: {folder_path}")
-        safe_input("按回车键退出...")
-        sys.exit(1)
+    # 常驻服务运行时，直接把路径交给服务处理后立即退出
+    with span('service_request'):
+        from opener_service import send_open_request
+        sent = send_open_request(valid_paths)
+    if sent:
+        print("[成功] 已交由常驻服务打开")
+        write_profile(mode='service', folders=len(valid_paths), ok=True)
+        sys.exit(0)
+    
+    success = open_folders_with_obsidian(valid_paths)
     
-    success = open_folder_with_obsidian(folder_path)
+    log_path = write_profile(mode='direct', folders=len(valid_paths), ok=success)
+    if log_path:
+        print(f"[信息] 各阶段耗时已写入: {log_path}")
     
     if success:
         print("\n操作完成，程序将在3秒后退出...")
-        time.sleep(3)
+        exit_at = time.monotonic() + 3
+        wait_vault_warmup()
+        time.sleep(max(0.0, exit_at - time.monotonic()))
         sys.exit(0)
     else:
         print("\n操作失败！")
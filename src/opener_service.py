@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+常驻打开服务模块
+在后台常驻一个本地服务，打开流程用到的模块和config.json都已加载好；
+右键菜单启动的进程只需把文件夹路径发送给服务，服务放入队列后立即确认，客户端随即退出。
+服务与进程内处理使用同一个open_folders_with_obsidian流程；找到的Obsidian.exe和
+obsidian.json的内容缓存在内存中，文件被修改后才重新查找或读取
+"""
+import os
+import json
+import fs_probe
+
+SERVICE_HOST = "127.0.0.1"
+CONNECT_TIMEOUT = 0.5
+# 服务把请求放入队列后立即确认，客户端只等待确认
+ACK_TIMEOUT = 2
+LISTEN_BACKLOG = 256
+# 同时读取请求的连接数：一个迟迟不发送请求的客户端不会阻塞其他客户端
+CONNECTION_WORKERS = 8
+# 服务启动时预先导入的打开流程模块
+PRELOAD_MODULES = ('config_lock', 'config_patch', 'vault_index', 'launcher')
+
+def get_service_info_path():
+    """获取服务信息文件路径（端口和令牌）"""
+    from config_manager import get_config_dir
+    return os.path.join(get_config_dir(), 'service.json')
+
+def read_service_info():
+    """读取服务信息文件，服务未运行时返回None"""
+    try:
+        with open(get_service_info_path(), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        return info if info.get('port') and info.get('token') else None
+    except (OSError, ValueError):
+        return None
+
+def send_open_request(folder_paths):
+    """
+    把文件夹路径列表发送给常驻服务
+    服务已接收请求时返回True，服务不可用或拒绝请求时返回False（调用方应回退到进程内处理）
+    """
+    info = read_service_info()
+    if info is None:
+        return False
+
+    import socket
+    request = {'token': info['token'], 'folders': list(folder_paths)}
+    try:
+        with socket.create_connection((SERVICE_HOST, info['port']), timeout=CONNECT_TIMEOUT) as sock:
+            sock.settimeout(ACK_TIMEOUT)
+            sock.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b"\n")
+            reply = sock.makefile('rb').readline()
+        return bool(json.loads(reply.decode('utf-8')).get('ok'))
+    except (OSError, ValueError) as e:
+        print(f"[信息] 常驻服务不可用，改为直接处理: {e}")
+        return False
+
+class OpenerService:
+    """
+    常驻打开服务
+    主线程接受连接，交给连接线程读取请求并放入队列，处理线程逐批打开；
+    处理上一批期间到达的请求合并为下一批
+    """
+
+    def __init__(self):
+        import threading
+        self.pending = []
+        self.condition = threading.Condition()
+        # 缓存的 (Obsidian.exe路径, 是否来自保存的配置路径) 及查找时config.json和Obsidian.exe的状态
+        self.discovered = None
+        self.discovered_stamp = None
+
+    def enqueue(self, folder_paths):
+        """把请求中的文件夹加入待处理队列"""
+        with self.condition:
+            for path in folder_paths:
+                if path not in self.pending:
+                    self.pending.append(path)
+            self.condition.notify()
+
+    def take_batch(self):
+        """等待并取出队列中所有待处理的文件夹"""
+        with self.condition:
+            while not self.pending:
+                self.condition.wait()
+            batch = self.pending
+            self.pending = []
+        return batch
+
+    @staticmethod
+    def _discovery_stamp(exe_path):
+        """config.json和Obsidian.exe的(mtime, 大小)，任一变化时缓存的查找结果失效"""
+        from config_manager import get_config_dir
+        stamp = []
+        for path in (os.path.join(get_config_dir(), 'config.json'), exe_path):
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def resolve_obsidian_exe(self):
+        """
+        返回 (Obsidian.exe路径, 是否来自保存的配置路径)
+        使用缓存的查找结果，config.json被修改（如重新运行安装程序）或Obsidian.exe被替换、删除后重新查找
+        """
+        from main import discover_obsidian_exe
+        if self.discovered is not None:
+            if self._discovery_stamp(self.discovered[0]) == self.discovered_stamp:
+                return self.discovered
+            self.discovered = None
+
+        discovered = discover_obsidian_exe()
+        if discovered[0] is not None:
+            self.discovered = discovered
+            self.discovered_stamp = self._discovery_stamp(discovered[0])
+        return discovered
+
+    def open_folders(self, folder_paths):
+        """在服务进程内打开文件夹，与进程内处理使用同一流程，但不等待用户按键"""
+        from main import validate_folders, open_folders_with_obsidian
+
+        # 每批重新探测，文件夹和Obsidian.exe可能在两次请求之间被移动
+        fs_probe.reset_probe()
+        folder_paths = validate_folders(folder_paths)
+        if not folder_paths:
+            print("[错误] 请求中没有有效的文件夹")
+            return False
+        return open_folders_with_obsidian(folder_paths, self.resolve_obsidian_exe(),
+                                          interactive=False)
+
+    def process_forever(self):
+        """处理线程：逐批打开队列中的文件夹"""
+        while True:
+            folder_paths = self.take_batch()
+            try:
+                self.open_folders(folder_paths)
+            except Exception as e:
+                print(f"[错误] 处理请求失败: {e}")
+
+    def read_request(self, conn, token):
+        """读取一个客户端请求，返回其中的文件夹列表，请求无效时返回None"""
+        conn.settimeout(ACK_TIMEOUT)
+        try:
+            line = conn.makefile('rb').readline()
+            request = json.loads(line.decode('utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"[警告] 无效的请求: {e}")
+            return None
+
+        if request.get('token') != token:
+            print("[警告] 令牌不匹配，已拒绝请求")
+            return None
+        return [path for path in request.get('folders', []) if isinstance(path, str)]
+
+    def handle_connection(self, conn, token):
+        """读取请求，放入队列后立即回复确认"""
+        with conn:
+            folders = self.read_request(conn, token)
+            if folders:
+                self.enqueue(folders)
+            try:
+                conn.sendall(json.dumps({'ok': bool(folders)}).encode('utf-8') + b"\n")
+            except OSError:
+                pass
+
+    def preload(self):
+        """预热：导入打开流程用到的模块，开启obsidian.json缓存，查找并缓存Obsidian.exe"""
+        import importlib
+        from main import enable_obsidian_config_cache, read_obsidian_config
+        for name in PRELOAD_MODULES:
+            importlib.import_module(name)
+        enable_obsidian_config_cache()
+        read_obsidian_config()
+        self.resolve_obsidian_exe()
+
+    def serve_forever(self):
+        """监听本地端口并写入服务信息文件，接收请求交给处理线程"""
+        import socket
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        token = os.urandom(16).hex()
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind((SERVICE_HOST, 0))
+        server.listen(LISTEN_BACKLOG)
+        port = server.getsockname()[1]
+
+        self.preload()
+        threading.Thread(target=self.process_forever, name='opener-service', daemon=True).start()
+
+        info_path = get_service_info_path()
+        os.makedirs(os.path.dirname(info_path), exist_ok=True)
+        with open(info_path, 'w', encoding='utf-8') as f:
+            json.dump({'port': port, 'token': token, 'pid': os.getpid()}, f)
+        print(f"[服务] 已在 {SERVICE_HOST}:{port} 上启动")
+
+        pool = ThreadPoolExecutor(max_workers=CONNECTION_WORKERS,
+                                  thread_name_prefix='opener-connection')
+        try:
+            while True:
+                conn, _ = server.accept()
+                pool.submit(self.handle_connection, conn, token)
+        except KeyboardInterrupt:
+            print("[服务] 已停止")
+        finally:
+            server.close()
+            pool.shutdown(wait=False)
+            try:
+                with open(info_path, 'r', encoding='utf-8') as f:
+                    if json.load(f).get('pid') == os.getpid():
+                        os.remove(info_path)
+            except (OSError, ValueError):
+                pass
+
+def run_service():
+    """以前台方式运行常驻服务"""
+    OpenerService().serve_forever()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+阶段计时模块
+用 --profile 运行时记录各阶段（读取配置、写入、注册表查找、启动进程等）的耗时，
+每次运行向配置目录下的profile.log追加一行JSON；未开启时span几乎没有开销
+"""
+import os
+import json
+import time
+from _thread import get_ident
+
+PROFILE_LOG_NAME = 'profile.log'
+
+class _NullSpan:
+    """未开启计时时使用的空span"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    """一个计时区间，同一线程中嵌套的span名称用 / 连接"""
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+        self.stack = None
+        self.start = None
+
+    def __enter__(self):
+        self.stack = self.recorder.stacks.setdefault(get_ident(), [])
+        self.stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.recorder.record('/'.join(self.stack), elapsed, self.start)
+        self.stack.pop()
+        return False
+
+class SpanRecorder:
+    """记录一次运行中所有span的耗时"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        # 线程ID -> 当前打开的span名称栈
+        self.stacks = {}
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def record(self, name, seconds, start=None):
+        span_record = {'name': name, 'ms': round(seconds * 1000, 3)}
+        if start is not None:
+            # 相对运行开始的时刻，用于判断并行阶段是否重叠
+            span_record['start_ms'] = round((start - self.started) * 1000, 3)
+        self.spans.append(span_record)
+
+    def to_record(self, **fields):
+        """生成一行日志记录"""
+        record = {
+            'ts': int(time.time() * 1000),
+            'pid': os.getpid(),
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 3),
+        }
+        record.update(fields)
+        record['spans'] = self.spans
+        return record
+
+_recorder = None
+
+def start_profiling():
+    """开启计时，返回记录器"""
+    global _recorder
+    _recorder = SpanRecorder()
+    return _recorder
+
+def span(name):
+    """
+    返回计时区间，用于with语句：
+        with span('read_config'):
+            ...
+    未开启计时时返回空span
+    """
+    if _recorder is None:
+        return _NULL_SPAN
+    return _recorder.span(name)
+
+def get_profile_log_path():
+    """获取计时日志路径"""
+    from config_manager import get_config_dir
+    return os.path.join(get_config_dir(), PROFILE_LOG_NAME)
+
+def write_profile(**fields):
+    """
+    把本次运行的计时结果追加到profile.log，返回日志路径
+    未开启计时或写入失败时返回None
+    """
+    if _recorder is None:
+        return None
+    log_path = get_profile_log_path()
+    try:
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(_recorder.to_record(**fields), ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"[警告] 写入计时日志失败: {e}")
+        return None
+    return log_path
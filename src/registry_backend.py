@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+注册表后端模块
+registry_utils和context_menu通过这里的接口访问注册表：Windows下使用winreg实现，
+测试和基准测试中可以换成内存注册表，从而在Linux上运行查找和右键菜单注册逻辑
+"""
+import time
+
+HKEY_LOCAL_MACHINE = "HKLM"
+HKEY_CURRENT_USER = "HKCU"
+HKEY_CLASSES_ROOT = "HKCR"
+
+REG_SZ = 1
+
+UNINSTALL_SUBKEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+WOW64_UNINSTALL_SUBKEY = r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"
+CURRENT_VERSION_SUBKEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion"
+
+class RegistryBackend:
+    """
+    注册表后端接口
+    方法与winreg的OpenKey/EnumKey/QueryValueEx/CloseKey以及
+    CreateKeyEx/SetValueEx/DeleteKey一一对应，
+    根键使用 "HKLM"、"HKCU"、"HKCR" 字符串表示；
+    打开的键支持with语句，键或值不存在时抛出FileNotFoundError
+    """
+
+    def open_key(self, parent, subkey):
+        """打开子键，parent为根键名称或已打开的键"""
+        raise NotImplementedError
+
+    def enum_key(self, key, index):
+        """返回第index个子键名称，超出范围时抛出OSError"""
+        raise NotImplementedError
+
+    def query_value(self, key, name):
+        """返回 (值, 类型)"""
+        raise NotImplementedError
+
+    def close_key(self, key):
+        """关闭键"""
+        raise NotImplementedError
+
+    def create_key(self, parent, subkey):
+        """打开子键用于读写，不存在时逐级创建"""
+        raise NotImplementedError
+
+    def set_value_ex(self, key, name, value):
+        """写入字符串值（REG_SZ），name为空字符串时写入默认值"""
+        raise NotImplementedError
+
+    def delete_key(self, parent, subkey):
+        """删除没有子键的键，键仍有子键时抛出OSError"""
+        raise NotImplementedError
+
+class WinregBackend(RegistryBackend):
+    """基于winreg的真实注册表后端"""
+
+    def __init__(self):
+        import winreg
+        self.winreg = winreg
+        self.roots = {
+            HKEY_LOCAL_MACHINE: winreg.HKEY_LOCAL_MACHINE,
+            HKEY_CURRENT_USER: winreg.HKEY_CURRENT_USER,
+            HKEY_CLASSES_ROOT: winreg.HKEY_CLASSES_ROOT,
+        }
+
+    def open_key(self, parent, subkey):
+        return self.winreg.OpenKey(self.roots.get(parent, parent), subkey)
+
+    def enum_key(self, key, index):
+        return self.winreg.EnumKey(key, index)
+
+    def query_value(self, key, name):
+        return self.winreg.QueryValueEx(key, name)
+
+    def close_key(self, key):
+        self.winreg.CloseKey(key)
+
+    def create_key(self, parent, subkey):
+        return self.winreg.CreateKeyEx(self.roots.get(parent, parent), subkey, 0,
+                                       self.winreg.KEY_READ | self.winreg.KEY_WRITE)
+
+    def set_value_ex(self, key, name, value):
+        self.winreg.SetValueEx(key, name, 0, self.winreg.REG_SZ, value)
+
+    def delete_key(self, parent, subkey):
+        self.winreg.DeleteKey(self.roots.get(parent, parent), subkey)
+
+class _FakeNode:
+    """内存注册表中的一个键"""
+
+    def __init__(self, name):
+        self.name = name
+        self.subkeys = {}
+        self.values = {}
+        # 按创建顺序排列的子键名称，供enum_key按下标读取；创建或删除子键时置为None
+        self.subkey_names = None
+
+class _FakeKey:
+    """内存注册表中已打开的键，支持with语句"""
+
+    def __init__(self, node):
+        self.node = node
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+class InMemoryRegistry(RegistryBackend):
+    """
+    内存注册表
+    键名不区分大小写（与Windows一致），每次调用可以附加固定延迟，
+    用于在Linux上测试和测量注册表查找
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.roots = {name: _FakeNode(name) for name in
+                      (HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER, HKEY_CLASSES_ROOT)}
+
+    def _delay(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _resolve(self, parent, subkey, create=False):
+        node = parent.node if isinstance(parent, _FakeKey) else self.roots[parent]
+        for part in filter(None, subkey.split("\\")):
+            child = node.subkeys.get(part.lower())
+            if child is None:
+                if not create:
+                    raise FileNotFoundError(f"注册表键不存在: {subkey}")
+                child = _FakeNode(part)
+                node.subkeys[part.lower()] = child
+                node.subkey_names = None
+            node = child
+        return node
+
+    def open_key(self, parent, subkey):
+        self._delay()
+        return _FakeKey(self._resolve(parent, subkey))
+
+    def enum_key(self, key, index):
+        self._delay()
+        node = key.node
+        if node.subkey_names is None:
+            node.subkey_names = [child.name for child in node.subkeys.values()]
+        if index >= len(node.subkey_names):
+            raise OSError("没有更多的子键")
+        return node.subkey_names[index]
+
+    def query_value(self, key, name):
+        self._delay()
+        try:
+            return key.node.values[name.lower()][1], REG_SZ
+        except KeyError:
+            raise FileNotFoundError(f"注册表值不存在: {name}")
+
+    def close_key(self, key):
+        self._delay()
+
+    def create_key(self, parent, subkey):
+        self._delay()
+        return _FakeKey(self._resolve(parent, subkey, create=True))
+
+    def set_value_ex(self, key, name, value):
+        self._delay()
+        key.node.values[name.lower()] = (name, value)
+
+    def delete_key(self, parent, subkey):
+        self._delay()
+        parent_path, _, name = subkey.rstrip("\\").rpartition("\\")
+        parent_node = self._resolve(parent, parent_path)
+        node = parent_node.subkeys.get(name.lower())
+        if node is None:
+            raise FileNotFoundError(f"注册表键不存在: {subkey}")
+        if node.subkeys:
+            raise PermissionError(f"注册表键仍有子键: {subkey}")
+        del parent_node.subkeys[name.lower()]
+        parent_node.subkey_names = None
+
+    def set_value(self, root, subkey, name, value):
+        """写入值（用于构造测试数据，不计入调用次数）"""
+        node = self._resolve(root, subkey, create=True)
+        node.values[name.lower()] = (name, value)
+
+    @classmethod
+    def with_uninstall_entries(cls, count, obsidian_dir=None, obsidian_hive=HKEY_CURRENT_USER,
+                               latency=0.0):
+        """
+        构造包含count个卸载信息条目的内存注册表，平均分布在三个Uninstall键下
+        obsidian_dir不为None时，在obsidian_hive的Uninstall键末尾加入Obsidian条目
+        """
+        registry = cls(latency)
+        registry.set_value(HKEY_LOCAL_MACHINE, CURRENT_VERSION_SUBKEY,
+                           "ProgramFilesDir", r"C:\Program Files")
+        registry.set_value(HKEY_LOCAL_MACHINE, CURRENT_VERSION_SUBKEY,
+                           "ProgramFilesDir (x86)", r"C:\Program Files (x86)")
+        registry.set_value(HKEY_LOCAL_MACHINE, CURRENT_VERSION_SUBKEY,
+                           "ProgramW6432Dir", r"C:\Program Files")
+
+        locations = [
+            (HKEY_LOCAL_MACHINE, UNINSTALL_SUBKEY),
+            (HKEY_CURRENT_USER, UNINSTALL_SUBKEY),
+            (HKEY_LOCAL_MACHINE, WOW64_UNINSTALL_SUBKEY),
+        ]
+        for i in range(count):
+            root, subkey = locations[i % len(locations)]
+            entry = f"{subkey}\\{{{i:08d}-0000-0000-0000-000000000000}}"
+            registry.set_value(root, entry, "DisplayName", f"Product {i}")
+            registry.set_value(root, entry, "InstallLocation", rf"C:\Program Files\Product {i}")
+
+        if obsidian_dir is not None:
+            entry = f"{UNINSTALL_SUBKEY}\\zzzz-obsidian"
+            registry.set_value(obsidian_hive, entry, "DisplayName", "Obsidian 1.6.7")
+            registry.set_value(obsidian_hive, entry, "InstallLocation", obsidian_dir)
+        return registry
+
+_backend = None
+
+def get_backend():
+    """获取当前使用的注册表后端，默认为winreg实现"""
+    global _backend
+    if _backend is None:
+        _backend = WinregBackend()
+    return _backend
+
+def set_backend(backend):
+    """替换注册表后端，返回之前的后端"""
+    global _backend
+    previous = _backend
+    _backend = backend
+    return previous
@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 """
 注册表工具模块
-用于查询Windows注册表信息
+用于查询Windows注册表信息，注册表访问通过registry_backend进行
 """
-import winreg
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import fs_probe
+from profiler import span
+from registry_backend import (get_backend, HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER,
+                              UNINSTALL_SUBKEY, WOW64_UNINSTALL_SUBKEY, CURRENT_VERSION_SUBKEY)
 
 def get_program_files_paths():
     """
@@ -12,15 +17,15 @@ def get_program_files_paths():
     返回包含各种Program Files路径的字典
     """
     paths = {}
+    backend = get_backend()
     
     try:
         # 打开注册表键
-        key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
-                            r"SOFTWARE\Microsoft\Windows\CurrentVersion")
+        key = backend.open_key(HKEY_LOCAL_MACHINE, CURRENT_VERSION_SUBKEY)
         
         # 查询Program Files目录
         try:
-            program_files_dir, _ = winreg.QueryValueEx(key, "ProgramFilesDir")
+            program_files_dir, _ = backend.query_value(key, "ProgramFilesDir")
             paths["ProgramFilesDir"] = program_files_dir
             print(f"Program Files目录: {program_files_dir}")
         except FileNotFoundError:
@@ -29,7 +34,7 @@ def get_program_files_paths():
         
         # 查询Program Files (x86)目录
         try:
-            program_files_x86, _ = winreg.QueryValueEx(key, "ProgramFilesDir (x86)")
+            program_files_x86, _ = backend.query_value(key, "ProgramFilesDir (x86)")
             paths["ProgramFilesDirX86"] = program_files_x86
             print(f"Program Files (x86)目录: {program_files_x86}")
         except FileNotFoundError:
@@ -38,7 +43,7 @@ def get_program_files_paths():
         
         # 查询Program W6432目录
         try:
-            program_w6432, _ = winreg.QueryValueEx(key, "ProgramW6432Dir")
+            program_w6432, _ = backend.query_value(key, "ProgramW6432Dir")
             paths["ProgramW6432Dir"] = program_w6432
             print(f"Program W6432目录: {program_w6432}")
         except FileNotFoundError:
@@ -46,7 +51,7 @@ def get_program_files_paths():
             print("未找到ProgramW6432Dir")
         
         # 关闭键
-        winreg.CloseKey(key)
+        backend.close_key(key)
         
     except Exception as e:
         print(f"读取注册表时出错: {e}")
@@ -59,87 +64,208 @@ def get_program_files_paths():
     
     return paths
 
-def find_obsidian_in_registry():
+UNINSTALL_KEYS = [
+    (HKEY_LOCAL_MACHINE, UNINSTALL_SUBKEY),
+    (HKEY_CURRENT_USER, UNINSTALL_SUBKEY),
+    (HKEY_LOCAL_MACHINE, WOW64_UNINSTALL_SUBKEY),
+]
+
+def _read_obsidian_exe(app_key):
+    """
+    从卸载信息键中读取Obsidian.exe路径，优先使用InstallLocation，其次DisplayIcon
+    """
+    backend = get_backend()
+    try:
+        install_location, _ = backend.query_value(app_key, "InstallLocation")
+        exe_path = os.path.join(install_location, "Obsidian.exe")
+        if fs_probe.exists(exe_path):
+            print(f"从注册表找到Obsidian: {exe_path}")
+            return exe_path
+    except FileNotFoundError:
+        # 尝试从DisplayIcon获取路径
+        try:
+            icon_path, _ = backend.query_value(app_key, "DisplayIcon")
+            if icon_path.endswith("Obsidian.exe"):
+                if fs_probe.exists(icon_path):
+                    print(f"从注册表图标路径找到Obsidian: {icon_path}")
+                    return icon_path
+        except FileNotFoundError:
+            pass
+    return None
+
+def _check_uninstall_key(source):
+    """
+    直接检查一个已知的卸载信息键（格式为 "HKLM\\路径"）
+    返回Obsidian.exe路径，键不存在或已不是Obsidian时返回None
+    """
+    backend = get_backend()
+    try:
+        hive_name, key_path = source.split("\\", 1)
+        with backend.open_key(hive_name, key_path) as app_key:
+            display_name, _ = backend.query_value(app_key, "DisplayName")
+            if "Obsidian" in display_name:
+                return _read_obsidian_exe(app_key)
+    except (OSError, KeyError, ValueError):
+        pass
+    return None
+
+def _scan_uninstall_key(hive_name, subkey, cancel_event):
+    """
+    遍历一个Uninstall键下的所有子键
+    返回 (Obsidian.exe路径, 来源注册表键, DisplayName)，未找到或被取消时路径为None
+    """
+    backend = get_backend()
+    try:
+        with backend.open_key(hive_name, subkey) as key:
+            i = 0
+            while not cancel_event.is_set():
+                try:
+                    subkey_name = backend.enum_key(key, i)
+                except OSError:
+                    break
+                i += 1
+                try:
+                    with backend.open_key(key, subkey_name) as app_key:
+                        display_name, _ = backend.query_value(app_key, "DisplayName")
+                        if "Obsidian" in display_name:
+                            exe_path = _read_obsidian_exe(app_key)
+                            if exe_path:
+                                return exe_path, f"{hive_name}\\{subkey}\\{subkey_name}", display_name
+                except OSError:
+                    pass
+    except Exception:
+        pass
+    return None, None, None
+
+def _scan_sequential():
+    """按顺序遍历三个Uninstall键，返回第一个找到的结果"""
+    cancel_event = threading.Event()
+    for hive_name, subkey in UNINSTALL_KEYS:
+        found = _scan_uninstall_key(hive_name, subkey, cancel_event)
+        if found[0]:
+            return found
+    return None, None, None
+
+def _scan_parallel():
+    """用线程池并行遍历三个Uninstall键，任意一个找到后通知其余线程停止"""
+    cancel_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=len(UNINSTALL_KEYS))
+    futures = [executor.submit(_scan_uninstall_key, hive_name, subkey, cancel_event)
+               for hive_name, subkey in UNINSTALL_KEYS]
+    try:
+        for future in as_completed(futures):
+            try:
+                found = future.result()
+            except Exception:
+                continue
+            if found[0]:
+                return found
+    finally:
+        cancel_event.set()
+        executor.shutdown(wait=True)
+    return None, None, None
+
+def find_obsidian_in_registry_with_source(parallel=True, use_index=True):
     """
     从注册表中查找Obsidian的安装路径
+    先检查上次记录的DisplayName -> 注册表键索引，未命中时遍历三个Uninstall键（默认并行）
+    返回 (Obsidian.exe路径, 来源注册表键)，未找到时返回 (None, None)
     """
-    possible_keys = [
-        (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"),
-        (winreg.HKEY_CURRENT_USER, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"),
-        (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"),
-    ]
+    from config_manager import get_registry_index, save_registry_index
     
-    for hkey, subkey in possible_keys:
-        try:
-            with winreg.OpenKey(hkey, subkey) as key:
-                i = 0
-                while True:
-                    try:
-                        subkey_name = winreg.EnumKey(key, i)
-                        with winreg.OpenKey(key, subkey_name) as app_key:
-                            try:
-                                display_name, _ = winreg.QueryValueEx(app_key, "DisplayName")
-                                if "Obsidian" in display_name:
-                                    try:
-                                        install_location, _ = winreg.QueryValueEx(app_key, "InstallLocation")
-                                        exe_path = os.path.join(install_location, "Obsidian.exe")
-                                        if os.path.exists(exe_path):
-                                            print(f"从注册表找到Obsidian: {exe_path}")
-                                            return exe_path
-                                    except FileNotFoundError:
-                                        # 尝试从DisplayIcon获取路径
-                                        try:
-                                            icon_path, _ = winreg.QueryValueEx(app_key, "DisplayIcon")
-                                            if icon_path.endswith("Obsidian.exe"):
-                                                if os.path.exists(icon_path):
-                                                    print(f"从注册表图标路径找到Obsidian: {icon_path}")
-                                                    return icon_path
-                                        except FileNotFoundError:
-                                            pass
-                            except FileNotFoundError:
-                                pass
-                        i += 1
-                    except OSError:
-                        break
-        except Exception as e:
-            continue
+    # 先检查上次找到Obsidian的注册表键
+    if use_index:
+        registry_index = get_registry_index()
+        for display_name, source in registry_index.items():
+            exe_path = _check_uninstall_key(source)
+            if exe_path:
+                return exe_path, source
+    
+    exe_path, source, display_name = _scan_parallel() if parallel else _scan_sequential()
+    if exe_path:
+        # 记录命中的键，下次直接检查
+        save_registry_index({display_name: source})
+        return exe_path, source
     
     print("未在注册表中找到Obsidian")
-    return None
+    return None, None
 
-def get_enhanced_obsidian_paths():
+def find_obsidian_in_registry():
     """
-    获取增强的Obsidian路径列表，结合注册表查询和常规路径
+    从注册表中查找Obsidian的安装路径
     """
-    paths = []
-    
-    # 首先尝试从注册表获取
-    registry_path = find_obsidian_in_registry()
-    if registry_path:
-        paths.append(registry_path)
+    exe_path, _ = find_obsidian_in_registry_with_source()
+    return exe_path
+
+REGISTRY_SOURCE = "registry"
+
+def _unique_candidates(candidates):
+    """去重，保留第一次出现的来源"""
+    unique_candidates = []
+    seen = set()
+    for path, source in candidates:
+        if path not in seen:
+            seen.add(path)
+            unique_candidates.append((path, source))
+    return unique_candidates
+
+def get_filesystem_candidates():
+    """
+    获取常规安装位置的Obsidian路径，不遍历注册表卸载信息
+    返回 [(路径, 来源)] 列表，来源为 "common"/"ProgramFilesDir" 等
+    """
+    candidates = []
     
     # 获取Program Files路径
     program_paths = get_program_files_paths()
     
     # 添加常规路径
-    common_paths = [
-        fr'C:\Users\{os.getlogin()}\AppData\Local\Obsidian\Obsidian.exe',
-    ]
+    # os.getlogin()在没有控制台的进程中可能失败，优先使用LOCALAPPDATA
+    local_appdata = os.getenv("LOCALAPPDATA") or os.path.expanduser(r"~\AppData\Local")
+    candidates.append((os.path.join(local_appdata, "Obsidian", "Obsidian.exe"), "common"))
     
     # 添加Program Files相关路径
     for key, program_dir in program_paths.items():
         if program_dir:
             obsidian_path = os.path.join(program_dir, "Obsidian", "Obsidian.exe")
-            common_paths.append(obsidian_path)
+            candidates.append((obsidian_path, key))
+    
+    return _unique_candidates(candidates)
+
+def order_candidates(candidates, hits):
+    """按来源的历史命中次数从高到低排序，次数相同时保持原有顺序"""
+    return sorted(candidates, key=lambda candidate: -hits.get(candidate[1], 0))
+
+def find_obsidian_adaptive():
+    """
+    按历史命中次数的顺序检查常规安装位置，全部未命中时才遍历注册表
+    命中的来源会记入config.json的candidate_hits
+    返回 (Obsidian.exe路径, 已检查的候选 [(路径, 来源)])，未找到时路径为None
+    """
+    from config_manager import get_candidate_hits, record_candidate_hit
     
-    # 合并路径并去重
-    paths.extend(common_paths)
-    unique_paths = []
-    for path in paths:
-        if path not in unique_paths:
-            unique_paths.append(path)
+    candidates = order_candidates(get_filesystem_candidates(), get_candidate_hits())
+    fs_probe.get_probe().prefetch([path for path, _ in candidates])
     
-    return unique_paths
+    checked = []
+    for path, source in candidates:
+        print(f"正在检查路径: {path}")
+        checked.append((path, source))
+        if fs_probe.exists(path):
+            print(f"[成功找到] {path}（来源: {source}）")
+            record_candidate_hit(source)
+            return path, checked
+        print(f"[未找到] {path}")
+    
+    # 常规位置都未命中才遍历卸载信息
+    print("常规安装位置均未找到，查找注册表...")
+    with span('registry_scan'):
+        registry_path, registry_key = find_obsidian_in_registry_with_source()
+    if registry_path:
+        checked.insert(0, (registry_path, registry_key))
+        record_candidate_hit(REGISTRY_SOURCE)
+        return registry_path, checked
+    return None, checked
 
 if __name__ == "__main__":
     print("=" * 50)
@@ -152,9 +278,9 @@ if __name__ == "__main__":
     
     # 测试查找Obsidian
     print("\n2. 查找Obsidian安装路径:")
-    obsidian_paths = get_enhanced_obsidian_paths()
+    obsidian_path, checked = find_obsidian_adaptive()
     
-    print(f"\n找到 {len(obsidian_paths)} 个可能的Obsidian路径:")
-    for i, path in enumerate(obsidian_paths, 1):
+    print(f"\n检查了 {len(checked)} 个可能的Obsidian路径:")
+    for i, (path, source) in enumerate(checked, 1):
         exists = "✓" if os.path.exists(path) else "✗"
-        print(f"{i}. {exists} {path}")
+        print(f"{i}. {exists} {path}（来源: {source}）")
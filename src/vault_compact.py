@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+vault清理模块
+obsidian.json中的vault只增不减，文件夹被删除或移动后条目仍然保留，读写越来越慢；
+这里并行检查所有vault路径，移除（默认归档到vault_archive.json）已不存在的vault，
+并可以只保留按ts最近使用的N个vault
+"""
+import os
+import json
+import time
+import ntpath
+from fs_probe import PathProbe
+
+COMPACT_WORKERS = 16
+ARCHIVE_FILE_NAME = 'vault_archive.json'
+# 自动清理后文件再增长这一比例才会再次触发，避免无可清理时每次打开都检查
+AUTO_COMPACT_GROWTH = 1.1
+
+ALIVE = 'alive'
+DEAD = 'dead'
+UNAVAILABLE = 'unavailable'
+
+def _root_available(probe, path):
+    """路径所在的驱动器或共享是否可以访问；不可访问时（U盘拔出、网络断开）不能判定vault已删除"""
+    drive = ntpath.splitdrive(path)[0]
+    if not drive:
+        return True
+    if drive.lower() in probe.unreachable_roots:
+        return False
+    return probe.isdir(drive + '\\')
+
+def check_vaults(vaults, workers=COMPACT_WORKERS, probe=None):
+    """
+    用最多workers个线程并行检查所有vault路径，网络路径的检查受探测超时限制
+    返回 {vault ID: ALIVE/DEAD/UNAVAILABLE}
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if probe is None:
+        probe = PathProbe()
+
+    def check(item):
+        vault_id, info = item
+        path = info.get('path')
+        if not isinstance(path, str) or probe.isdir(path):
+            return vault_id, ALIVE
+        if _root_available(probe, path):
+            return vault_id, DEAD
+        return vault_id, UNAVAILABLE
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(check, list(vaults.items())))
+
+def select_evictions(vaults, max_vaults):
+    """
+    vault数量超过max_vaults时，按ts从旧到新选出需要移除的vault ID
+    设置了open标志的vault不会被移除
+    """
+    excess = len(vaults) - max_vaults
+    if excess <= 0:
+        return []
+
+    def last_used(vault_id):
+        ts = vaults[vault_id].get('ts')
+        return ts if isinstance(ts, (int, float)) else 0
+
+    candidates = sorted((vault_id for vault_id, info in vaults.items() if 'open' not in info),
+                        key=last_used)
+    return candidates[:excess]
+
+def compact_config(config, max_vaults=None, workers=COMPACT_WORKERS, probe=None):
+    """
+    从配置中移除已不存在的vault，指定max_vaults时再按ts只保留最近使用的vault
+    打开状态的vault和所在驱动器无法访问的vault都会保留
+    返回 {'dead': [...], 'evicted': [...], 'unavailable': [...], 'removed': {vault ID: 原条目}}
+    """
+    vaults = config.setdefault('vaults', {})
+    states = check_vaults(vaults, workers, probe)
+
+    dead = [vault_id for vault_id, state in states.items()
+            if state == DEAD and 'open' not in vaults[vault_id]]
+    unavailable = [vault_id for vault_id, state in states.items() if state == UNAVAILABLE]
+
+    removed = {}
+    for vault_id in dead:
+        removed[vault_id] = vaults.pop(vault_id)
+
+    evicted = []
+    if max_vaults is not None:
+        evicted = select_evictions(vaults, max_vaults)
+        for vault_id in evicted:
+            removed[vault_id] = vaults.pop(vault_id)
+
+    return {'dead': dead, 'evicted': evicted, 'unavailable': unavailable, 'removed': removed}
+
+def get_archive_path():
+    """获取归档文件路径"""
+    from config_manager import get_config_dir
+    return os.path.join(get_config_dir(), ARCHIVE_FILE_NAME)
+
+def archive_vaults(removed):
+    """把移除的vault条目合并写入归档文件，以便需要时手动恢复，成功返回True"""
+    from config_lock import atomic_write_text
+    archive_path = get_archive_path()
+
+    archive = {}
+    try:
+        with open(archive_path, 'r', encoding='utf-8') as f:
+            archive = json.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[警告] 读取归档文件失败，将重新创建: {e}")
+
+    archived_at = int(time.time() * 1000)
+    archived = archive.setdefault('vaults', {})
+    for vault_id, info in removed.items():
+        archived[vault_id] = dict(info, archived=archived_at)
+
+    try:
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        atomic_write_text(archive_path, json.dumps(archive, ensure_ascii=False, indent=2))
+    except Exception as e:
+        print(f"[错误] 写入归档文件失败: {e}")
+        return False
+    print(f"[信息] 已归档 {len(removed)} 个vault: {archive_path}")
+    return True
+
+def compact_obsidian_config(config_path, max_vaults=None, archive=True, dry_run=False,
+                            workers=COMPACT_WORKERS):
+    """
+    清理obsidian.json，调用方需要持有ConfigLock
+    返回清理结果（在compact_config的结果上增加bytes_before、bytes_after和reclaimed），失败时返回None
+    """
+    from config_lock import atomic_write_text
+
+    try:
+        with open(config_path, 'rb') as f:
+            raw = f.read()
+        config = json.loads(raw)
+    except Exception as e:
+        print(f"[错误] 读取配置文件失败: {e}")
+        return None
+
+    total = len(config.get('vaults', {}))
+    print(f"[信息] 正在检查 {total} 个vault...")
+    result = compact_config(config, max_vaults, workers)
+
+    result['bytes_before'] = len(raw)
+    result['bytes_after'] = len(raw)
+    if result['removed']:
+        text = json.dumps(config, ensure_ascii=False, separators=(',', ':'))
+        result['bytes_after'] = len(text.encode('utf-8'))
+    result['reclaimed'] = result['bytes_before'] - result['bytes_after']
+
+    print(f"  不存在的vault: {len(result['dead'])}")
+    if max_vaults is not None:
+        print(f"  超出 {max_vaults} 个上限、最久未使用的vault: {len(result['evicted'])}")
+    if result['unavailable']:
+        print(f"  所在驱动器或网络共享无法访问（已保留）: {len(result['unavailable'])}")
+
+    if not result['removed']:
+        print("[信息] 没有需要清理的vault")
+        return result
+    if dry_run:
+        print(f"[信息] 试运行：将移除 {len(result['removed'])} 个vault，"
+              f"可回收 {result['reclaimed']} 字节，未修改任何文件")
+        return result
+
+    # 先归档再写入，归档失败时不修改obsidian.json
+    if archive and not archive_vaults(result['removed']):
+        return None
+    try:
+        atomic_write_text(config_path, text)
+    except Exception as e:
+        print(f"[错误] 写入配置文件失败: {e}")
+        return None
+
+    from config_manager import save_last_compact_size
+    save_last_compact_size(result['bytes_after'])
+    print(f"[成功] 已移除 {len(result['removed'])} 个vault，剩余 {total - len(result['removed'])} 个，"
+          f"回收 {result['reclaimed']} 字节（{result['bytes_before']} -> {result['bytes_after']}）")
+    return result
+
+def auto_compact(config_path, threshold_kb, max_vaults=None):
+    """
+    obsidian.json超过threshold_kb且比上次清理后增长了AUTO_COMPACT_GROWTH倍以上时自动清理
+    调用方需要持有ConfigLock；未触发、清理失败或没有移除任何vault时返回None
+    """
+    from config_manager import get_last_compact_size
+    try:
+        size = os.path.getsize(config_path)
+    except OSError:
+        return None
+    if size <= threshold_kb * 1024 or size <= get_last_compact_size() * AUTO_COMPACT_GROWTH:
+        return None
+
+    print(f"\n[信息] obsidian.json已达 {size // 1024} KB，超过自动清理阈值 {threshold_kb} KB")
+    result = compact_obsidian_config(config_path, max_vaults)
+    if result is None:
+        return None
+    if not result['removed']:
+        # 没有可清理的vault时也记录大小，文件继续增长后才会再次检查
+        from config_manager import save_last_compact_size
+        save_last_compact_size(size)
+        return None
+    return result
+
+def _vault_limit(value):
+    """--max-vaults的参数类型：至少为1，0或负数会移除所有未打开的vault"""
+    import argparse
+    try:
+        limit = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"不是整数: {value}")
+    if limit < 1:
+        raise argparse.ArgumentTypeError(f"至少需要保留1个vault: {value}")
+    return limit
+
+def run_compact_command(args):
+    """
+    处理compact子命令，返回退出码
+    用法: compact [--max-vaults N] [--drop] [--dry-run] [--workers N]
+    """
+    import argparse
+    from main import get_obsidian_config_path
+    from config_lock import ConfigLock
+    from config_manager import get_compact_max_vaults
+
+    parser = argparse.ArgumentParser(prog='open_folder_with_obsidian.exe compact',
+                                     description="清理obsidian.json中已不存在的vault")
+    parser.add_argument('--max-vaults', type=_vault_limit, default=None,
+                        help="只保留按ts最近使用的N个vault（默认使用config.json中的compact_max_vaults）")
+    parser.add_argument('--drop', action='store_true', help="直接丢弃移除的vault，不写入归档文件")
+    parser.add_argument('--dry-run', action='store_true', help="只报告将移除的vault，不修改文件")
+    parser.add_argument('--workers', type=int, default=COMPACT_WORKERS, help="并行检查的线程数")
+    options = parser.parse_args(args)
+
+    max_vaults = options.max_vaults if options.max_vaults is not None else get_compact_max_vaults()
+    config_path = get_obsidian_config_path()
+    if not os.path.exists(config_path):
+        print(f"[错误] 未找到obsidian.json配置文件: {config_path}")
+        return 1
+
+    lock = ConfigLock()
+    if not lock.acquire():
+        print("[错误] 等待配置文件锁超时，请稍后再试")
+        return 1
+    try:
+        result = compact_obsidian_config(config_path, max_vaults, archive=not options.drop,
+                                         dry_run=options.dry_run, workers=max(1, options.workers))
+    finally:
+        lock.release()
+    return 0 if result is not None else 1
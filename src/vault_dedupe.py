@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+跨vault插件去重模块
+obsidian.json中的每个vault都在.obsidian/plugins下保存一份插件代码，同一版本的插件
+在几百个vault中重复存放。这里找出内容相同的插件代码文件（只有PLUGIN_CODE_FILES，
+它们只随插件更新整体替换；主题、CSS片段和设置文件可能被原地编辑，不合并）（先比较大小，再比较开头部分的哈希，
+最后才计算完整哈希，尽量少读文件），用硬链接替换重复的副本。
+每次替换前先写入日志，可以用 --rollback 把硬链接恢复为独立的文件
+"""
+import os
+import json
+import time
+import stat as stat_module
+
+DEDUPE_WORKERS = 8
+# 小于一个磁盘块的文件去重节省不了空间
+MIN_FILE_SIZE = 4096
+PARTIAL_BYTES = 64 * 1024
+HASH_CHUNK = 1024 * 1024
+JOURNAL_FILE_NAME = 'dedupe_journal.json'
+PLUGINS_DIR_NAME = 'plugins'
+# .obsidian/plugins/<插件>/下由Obsidian安装和更新的代码文件；data.json等保存各vault自己的设置
+PLUGIN_CODE_FILES = {'main.js', 'manifest.json', 'styles.css'}
+
+def collect_plugin_files(vault_paths, min_size=MIN_FILE_SIZE, workers=DEDUPE_WORKERS):
+    """
+    并行列出所有vault中的插件代码文件（.obsidian/plugins/<插件>/下的PLUGIN_CODE_FILES）
+    返回 [(路径, os.stat结果)]
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def list_vault(vault_path):
+        files = []
+        plugins_dir = os.path.join(vault_path, '.obsidian', PLUGINS_DIR_NAME)
+        try:
+            plugin_dirs = [entry.path for entry in os.scandir(plugins_dir)
+                           if entry.is_dir(follow_symlinks=False)]
+        except OSError:
+            return files
+        for plugin_dir in plugin_dirs:
+            for name in PLUGIN_CODE_FILES:
+                path = os.path.join(plugin_dir, name)
+                try:
+                    st = os.stat(path, follow_symlinks=False)
+                except OSError:
+                    continue
+                if st.st_size >= min_size and stat_module.S_ISREG(st.st_mode):
+                    files.append((path, st))
+        return files
+
+    collected = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dedupe-scan') as pool:
+        for files in pool.map(list_vault, vault_paths):
+            collected.extend(files)
+    return collected
+
+def _hash_file(path, digest=None, offset=0, limit=None):
+    """
+    从offset开始读取文件（最多limit字节）更新SHA-256，返回哈希对象，读取失败时返回None
+    传入之前计算开头部分得到的digest可以继续计算完整哈希，不必重新读取开头
+    """
+    import hashlib
+    if digest is None:
+        digest = hashlib.sha256()
+    remaining = limit
+    try:
+        with open(path, 'rb') as f:
+            if offset:
+                f.seek(offset)
+            while remaining is None or remaining > 0:
+                chunk = f.read(HASH_CHUNK if remaining is None else min(HASH_CHUNK, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+    except OSError:
+        return None
+    return digest
+
+def _refine(groups, key_func, pool):
+    """用key_func（在线程池中计算）把每组文件再细分，只保留仍有多个不同文件的组"""
+    members = [item for group in groups for item in group]
+    keys = pool.map(lambda item: key_func(item[0], item[1]), members)
+    refined = {}
+    for item, key in zip(members, keys):
+        if key is not None:
+            refined.setdefault((item[1].st_dev, item[1].st_size, key), []).append(item)
+    return [group for group in refined.values() if len(group) > 1]
+
+def find_duplicates(files, workers=DEDUPE_WORKERS):
+    """
+    找出内容相同的文件组
+    已经是同一个文件（硬链接，inode相同）的只保留一个；按 大小 -> 开头部分哈希 -> 完整哈希 逐步缩小范围
+    返回 ([[(路径, stat), ...], ...], 读取的字节数)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    by_size = {}
+    for path, st in files:
+        by_size.setdefault((st.st_dev, st.st_size), {}).setdefault(st.st_ino, (path, st))
+    groups = [list(inodes.values()) for inodes in by_size.values() if len(inodes) > 1]
+
+    # 开头部分的哈希对象，需要完整哈希时从PARTIAL_BYTES处继续读取，每个文件最多只读一遍
+    partial = {}
+
+    def partial_key(path, st):
+        digest = _hash_file(path, limit=PARTIAL_BYTES)
+        if digest is None:
+            return None
+        partial[path] = digest
+        return digest.hexdigest()
+
+    def full_key(path, st):
+        digest = _hash_file(path, partial[path].copy(), offset=PARTIAL_BYTES)
+        return digest.hexdigest() if digest is not None else None
+
+    bytes_read = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dedupe-hash') as pool:
+        bytes_read += sum(min(st.st_size, PARTIAL_BYTES) for group in groups for _, st in group)
+        groups = _refine(groups, partial_key, pool)
+
+        # 开头部分已经是整个文件时不需要再读
+        small = [group for group in groups if group[0][1].st_size <= PARTIAL_BYTES]
+        large = [group for group in groups if group[0][1].st_size > PARTIAL_BYTES]
+        bytes_read += sum(st.st_size - PARTIAL_BYTES for group in large for _, st in group)
+        groups = small + _refine(large, full_key, pool)
+    return groups, bytes_read
+
+def get_journal_path():
+    """获取去重日志路径"""
+    from config_manager import get_config_dir
+    return os.path.join(get_config_dir(), JOURNAL_FILE_NAME)
+
+def _read_journal():
+    journal_path = get_journal_path()
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'runs': []}
+    except ValueError as e:
+        print(f"[警告] 去重日志已损坏，将重新记录: {journal_path} ({e})")
+        return {'runs': []}
+
+def _write_journal(journal):
+    from config_lock import atomic_write_text
+    journal_path = get_journal_path()
+    os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+    atomic_write_text(journal_path, json.dumps(journal, ensure_ascii=False, indent=2))
+
+def _same_file_state(path, st):
+    """文件自扫描以来是否未被修改"""
+    try:
+        current = os.stat(path)
+    except OSError:
+        return False
+    return (current.st_ino, current.st_size, current.st_mtime_ns) == (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def link_duplicates(groups):
+    """
+    把每组中的其他文件替换为第一个文件的硬链接：先在同目录创建临时硬链接，再原子替换
+    替换前写入日志（原路径、原权限、修改时间和链接目标），中途退出时也能撤销；
+    结束后日志中只保留实际替换的文件，返回 (替换的文件数, 节省的字节数)
+    """
+    planned = []
+    for group in groups:
+        for path, st in group[1:]:
+            planned.append({'path': path, 'mode': st.st_mode, 'mtime_ns': st.st_mtime_ns,
+                            'target': group[0][0]})
+    journal = _read_journal()
+    run = {'ts': int(time.time() * 1000), 'entries': planned}
+    journal['runs'].append(run)
+    _write_journal(journal)
+
+    entries = []
+    saved = 0
+    for group in groups:
+        canonical = group[0][0]
+        if not _same_file_state(canonical, group[0][1]):
+            print(f"[警告] 文件在扫描后被修改，跳过这一组: {canonical}")
+            continue
+        for path, st in group[1:]:
+            if not _same_file_state(path, st):
+                print(f"[警告] 文件在扫描后被修改，跳过: {path}")
+                continue
+            tmp_path = f"{path}.{os.getpid()}.dedupe"
+            try:
+                os.link(canonical, tmp_path)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                # 硬链接数达到上限、跨卷等情况：以当前文件作为后续文件的链接目标
+                print(f"[警告] 无法创建硬链接 {path}: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                canonical = path
+                continue
+            entries.append({'path': path, 'mode': st.st_mode, 'mtime_ns': st.st_mtime_ns,
+                            'target': canonical})
+            saved += st.st_size
+
+    if entries:
+        run['entries'] = entries
+    else:
+        journal['runs'].remove(run)
+    _write_journal(journal)
+    return len(entries), saved
+
+def rollback_last_run():
+    """
+    撤销最近一次去重：把日志中仍与链接目标是同一文件的替换为独立的副本，并恢复原权限和修改时间
+    去重前就已是硬链接（如按模板生成）而未被替换的文件保持不变；返回恢复的文件数，没有可撤销的记录时返回None
+    """
+    import shutil
+    journal = _read_journal()
+    if not journal['runs']:
+        return None
+    run = journal['runs'][-1]
+
+    restored = 0
+    for entry in run['entries']:
+        path = entry['path']
+        try:
+            if os.stat(path).st_nlink < 2:
+                continue
+            if 'target' in entry and not os.path.samefile(path, entry['target']):
+                continue
+        except OSError:
+            continue
+        tmp_path = f"{path}.{os.getpid()}.restore"
+        try:
+            shutil.copyfile(path, tmp_path)
+            os.chmod(tmp_path, entry['mode'] & 0o7777)
+            os.utime(tmp_path, ns=(entry['mtime_ns'], entry['mtime_ns']))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[错误] 恢复失败 {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            continue
+        restored += 1
+
+    journal['runs'].pop()
+    _write_journal(journal)
+    return restored
+
+def run_dedupe_command(args):
+    """
+    处理dedupe子命令，返回退出码
+    用法: dedupe [--dry-run] [--rollback] [--min-size N] [--workers N]
+    """
+    import argparse
+    from main import read_obsidian_config
+
+    parser = argparse.ArgumentParser(prog='open_folder_with_obsidian.exe dedupe',
+                                     description="用硬链接合并各vault中相同的插件文件")
+    parser.add_argument('--dry-run', action='store_true', help="只报告可以合并的文件，不修改")
+    parser.add_argument('--rollback', action='store_true', help="撤销最近一次去重")
+    parser.add_argument('--min-size', type=int, default=MIN_FILE_SIZE, help="只处理不小于该字节数的文件")
+    parser.add_argument('--workers', type=int, default=DEDUPE_WORKERS, help="并行扫描和计算哈希的线程数")
+    options = parser.parse_args(args)
+    workers = max(1, options.workers)
+
+    if options.rollback:
+        restored = rollback_last_run()
+        if restored is None:
+            print("[信息] 没有可撤销的去重记录")
+            return 0
+        print(f"[成功] 已恢复 {restored} 个文件为独立副本")
+        return 0
+
+    config = read_obsidian_config()
+    if config is None:
+        return 1
+    vault_paths = [info['path'] for info in config.get('vaults', {}).values()
+                   if isinstance(info.get('path'), str)]
+
+    start = time.perf_counter()
+    files = collect_plugin_files(vault_paths, options.min_size, workers)
+    total_bytes = sum(st.st_size for _, st in files)
+    groups, bytes_read = find_duplicates(files, workers)
+    duplicates = sum(len(group) - 1 for group in groups)
+    reclaimable = sum(group[0][1].st_size * (len(group) - 1) for group in groups)
+    elapsed = time.perf_counter() - start
+
+    print(f"[信息] {len(vault_paths)} 个vault，{len(files)} 个插件文件（{total_bytes // (1024 * 1024)} MB），"
+          f"读取 {bytes_read // (1024 * 1024)} MB 完成比较，耗时 {elapsed:.1f} 秒")
+    print(f"[信息] 发现 {len(groups)} 组相同的文件，{duplicates} 个重复副本，"
+          f"可节省 {reclaimable // (1024 * 1024)} MB")
+
+    if options.dry_run:
+        for group in sorted(groups, key=lambda g: -g[0][1].st_size * (len(g) - 1))[:10]:
+            print(f"  {group[0][1].st_size // 1024:8d} KB x {len(group)}  {group[0][0]}")
+        print("[信息] 试运行，未修改任何文件")
+        return 0
+    if not groups:
+        return 0
+
+    linked, saved = link_duplicates(groups)
+    print(f"[成功] 已把 {linked} 个重复文件替换为硬链接，节省 {saved // (1024 * 1024)} MB")
+    print("[信息] 可以用 dedupe --rollback 撤销")
+    return 0
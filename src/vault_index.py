@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+vault索引模块
+为obsidian.json中的vault表建立按路径查找的索引，避免每次打开都线性扫描所有vault
+"""
+import os
+
+# 文件系统路径是否不区分大小写（Windows）
+CASE_INSENSITIVE_PATHS = os.path.normcase('A') != 'A'
+
+def _path_key(path):
+    """路径映射的键：绝对路径，在Windows上不区分大小写、统一分隔符"""
+    return os.path.normcase(os.path.abspath(path))
+
+class VaultIndex:
+    """
+    vault索引
+    每次读取配置后构建一次，记录当前设置了open标志的vault ID集合，清理open标志为O(打开的vault数)
+    路径 -> vault ID 的映射在第二次查找时才构建：单次打开只查找一次，线性扫描比构建映射更快；
+    常驻服务和批量打开会多次查找，之后的查找为O(1)
+    同时记录自读取以来的修改：新增vault或open标志集合变化才算实质修改，只更新ts不算，此时不重写文件
+    """
+
+    def __init__(self, config):
+        self.vaults = config.setdefault('vaults', {})
+        self.open_ids = {vault_id for vault_id, info in self.vaults.items() if 'open' in info}
+        self._path_to_id = None
+        self._lookups = 0
+        self._loaded_open_ids = frozenset(self.open_ids)
+        self.added_ids = set()
+
+    def __len__(self):
+        return len(self.vaults)
+
+    def _build_path_map(self):
+        """
+        构建路径映射，出现重复路径时保留第一个，与原来的线性查找行为一致
+        obsidian.json中保存的已是绝对路径，这里只做normcase，不再逐个abspath
+        """
+        normcase = os.path.normcase
+        self._path_to_id = {}
+        for vault_id, info in self.vaults.items():
+            path = info.get('path')
+            if isinstance(path, str) and path:
+                self._path_to_id.setdefault(normcase(path), vault_id)
+
+    def _scan(self, folder_path):
+        """
+        单次查找的线性扫描：先按原样比较（与原来的线性查找相同，已有vault不多花时间），
+        找不到且路径不区分大小写时，再对长度相同的路径做normcase比较
+        """
+        folder_path = os.path.abspath(folder_path)
+        for vault_id, info in self.vaults.items():
+            if info.get('path') == folder_path:
+                return vault_id
+        if not CASE_INSENSITIVE_PATHS:
+            return None
+
+        normcase = os.path.normcase
+        key = normcase(folder_path)
+        size = len(key)
+        for vault_id, info in self.vaults.items():
+            path = info.get('path')
+            if isinstance(path, str) and len(path) == size and normcase(path) == key:
+                return vault_id
+        return None
+
+    def find(self, folder_path):
+        """按路径查找vault ID（Windows上不区分大小写），不存在时返回None"""
+        if self._path_to_id is None:
+            self._lookups += 1
+            if self._lookups == 1:
+                return self._scan(folder_path)
+            self._build_path_map()
+        return self._path_to_id.get(_path_key(folder_path))
+
+    def add(self, vault_id, vault_info):
+        """添加vault并更新索引"""
+        self.vaults[vault_id] = vault_info
+        path = vault_info.get('path')
+        if self._path_to_id is not None and isinstance(path, str) and path:
+            self._path_to_id.setdefault(_path_key(path), vault_id)
+        if 'open' in vault_info:
+            self.open_ids.add(vault_id)
+        self.added_ids.add(vault_id)
+
+    def mark_open(self, vault_id):
+        """为指定vault设置open标志"""
+        self.vaults[vault_id]['open'] = True
+        self.open_ids.add(vault_id)
+
+    def touch(self, vault_id, timestamp):
+        """更新vault的时间戳（只更新时间戳不算实质修改，不会触发写入）"""
+        self.vaults[vault_id]['ts'] = timestamp
+
+    def clear_open_flags(self):
+        """移除所有vault的open标志，返回被清理的vault ID列表"""
+        cleared = []
+        for vault_id in self.open_ids:
+            vault_info = self.vaults.get(vault_id)
+            if vault_info is not None and 'open' in vault_info:
+                del vault_info['open']
+                cleared.append(vault_id)
+        self.open_ids.clear()
+        return cleared
+
+    def is_dirty(self):
+        """自读取以来是否有实质修改（新增vault或打开的vault发生变化）"""
+        return bool(self.added_ids) or self.open_ids != self._loaded_open_ids
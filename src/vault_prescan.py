@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+新vault预扫描模块
+右键打开的常常是项目根目录，其中的node_modules、构建输出和数据文件会让Obsidian花几分钟
+为成千上万个无关文件建立索引。注册新vault之前，这里并行扫描文件夹，统计各子树的文件数和
+字节数，找出依赖目录、构建目录和大量非笔记文件的子树，写入新vault的.obsidian/app.json
+的userIgnoreFilters（即Obsidian设置中的"已排除的文件"）
+
+Obsidian本身不索引以.开头的隐藏文件夹（.git等），这些文件夹不扫描也不需要排除
+"""
+import os
+import json
+import time
+
+PRESCAN_WORKERS = 8
+# 整体扫描预算：超过后按已扫描的部分做判断
+PRESCAN_SECONDS = 1.0
+PRESCAN_MAX_ENTRIES = 300000
+# 子树中非笔记、非附件的文件超过这些数量或大小，且笔记和附件不到1%时视为应排除的数据目录
+HEAVY_FILES = 2000
+HEAVY_BYTES = 256 * 1024 * 1024
+HEAVY_NOTE_RATIO = 0.01
+# 排除项超过此数量时只保留最重的：依赖目录优先，其余按文件数、字节数从多到少
+MAX_FILTERS = 50
+
+APP_CONFIG_NAME = 'app.json'
+CONFIG_DIR_NAME = '.obsidian'
+IGNORE_FILTERS_KEY = 'userIgnoreFilters'
+
+# 依赖目录：直接排除，不扫描
+DEPENDENCY_DIR_NAMES = {
+    'node_modules', 'bower_components', 'jspm_packages', '__pycache__', 'site-packages',
+    'Pods', 'DerivedData',
+}
+# 构建输出目录：扫描后其中没有笔记时排除
+BUILD_DIR_NAMES = {'build', 'dist', 'out', 'target', 'bin', 'obj', 'vendor', 'venv', 'coverage'}
+
+NOTE_EXTENSIONS = {'.md', '.canvas'}
+ATTACHMENT_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.svg', '.webp', '.avif',
+    '.pdf', '.mp3', '.wav', '.m4a', '.ogg', '.mp4', '.webm', '.ogv', '.mov', '.mkv',
+}
+
+class _Subtree:
+    """一个目录及其已扫描部分的统计"""
+    __slots__ = ('path', 'rel', 'parent', 'depth', 'build', 'files', 'bytes',
+                 'notes', 'other_files', 'other_bytes', 'excluded', 'partial')
+
+    def __init__(self, path, rel, parent, build=False):
+        self.path = path
+        self.rel = rel
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.build = build
+        self.files = 0
+        self.bytes = 0
+        self.notes = 0
+        self.other_files = 0
+        self.other_bytes = 0
+        self.excluded = False
+        # 超出预算时自身或其下有目录未扫描
+        self.partial = False
+
+    def under_excluded(self):
+        """自身或任一上级目录已被排除"""
+        node = self
+        while node is not None:
+            if node.excluded:
+                return True
+            node = node.parent
+        return False
+
+    def is_heavy(self):
+        """非笔记文件已超出预算且几乎没有笔记和附件"""
+        if self.other_files < HEAVY_FILES and self.other_bytes < HEAVY_BYTES:
+            return False
+        return self.files - self.other_files <= self.files * HEAVY_NOTE_RATIO
+
+def _scan_dir(path):
+    """
+    列出一个目录，返回 (子目录 [(名称, 路径)], 文件数, 字节数, 笔记数, 其他文件数, 其他文件字节数)
+    """
+    subdirs = []
+    files = size = notes = other_files = other_bytes = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append((entry.name, entry.path))
+                        continue
+                    file_size = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+                files += 1
+                size += file_size
+                ext = os.path.splitext(entry.name)[1].lower()
+                if ext in NOTE_EXTENSIONS:
+                    notes += 1
+                elif ext not in ATTACHMENT_EXTENSIONS:
+                    other_files += 1
+                    other_bytes += file_size
+    except OSError:
+        pass
+    return subdirs, files, size, notes, other_files, other_bytes
+
+def prescan_folder(folder_path, seconds=PRESCAN_SECONDS, max_entries=PRESCAN_MAX_ENTRIES,
+                   workers=PRESCAN_WORKERS):
+    """
+    按层并行扫描文件夹，返回
+    {'filters': [相对路径/], 'files': 文件数, 'bytes': 字节数, 'complete': 是否在预算内扫描完}
+    filters按从重到轻排列，最多MAX_FILTERS个；已判定排除的子树不再继续扫描
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    deadline = time.monotonic() + seconds
+    root = _Subtree(folder_path, '', None)
+    build_nodes = []
+    # 排除项 -> 权重 (是否依赖目录, 文件数, 字节数)，依赖目录不扫描，总是视为最重
+    weights = {}
+    entries = 0
+
+    level = [root]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='vault-prescan') as pool:
+        while level:
+            if time.monotonic() >= deadline or entries >= max_entries:
+                break
+            next_level = []
+            # 本层计数有变化的目录：只有它们可能新超出预算
+            touched = {}
+            for node, result in zip(level, pool.map(_scan_dir, [node.path for node in level])):
+                subdirs, files, size, notes, other_files, other_bytes = result
+                entries += files + len(subdirs)
+                # 计入自身和所有上级目录
+                ancestor = node
+                while ancestor is not None:
+                    ancestor.files += files
+                    ancestor.bytes += size
+                    ancestor.notes += notes
+                    ancestor.other_files += other_files
+                    ancestor.other_bytes += other_bytes
+                    if ancestor.parent is not None:
+                        touched[ancestor] = None
+                    ancestor = ancestor.parent
+                for name, path in subdirs:
+                    if name.startswith('.'):
+                        continue
+                    if name in DEPENDENCY_DIR_NAMES:
+                        weights[node.rel + name + '/'] = (1, 0, 0)
+                        continue
+                    child = _Subtree(path, node.rel + name + '/', node, build=name in BUILD_DIR_NAMES)
+                    if child.build:
+                        build_nodes.append(child)
+                    next_level.append(child)
+
+            # 从外层到内层检查已超出预算的子树，排除后其下的目录不再扫描
+            for node in sorted(touched, key=lambda node: node.depth):
+                if not node.excluded and node.is_heavy() and not node.under_excluded():
+                    node.excluded = True
+                    weights[node.rel] = (0, node.files, node.bytes)
+            level = [node for node in next_level if not node.under_excluded()]
+
+    # 超出预算时未扫描的目录使其所有上级的统计不完整
+    for node in level:
+        ancestor = node
+        while ancestor is not None and not ancestor.partial:
+            ancestor.partial = True
+            ancestor = ancestor.parent
+
+    # 只排除完整扫描过且没有笔记的构建目录
+    for node in build_nodes:
+        if node.notes == 0 and not node.partial and not node.under_excluded():
+            node.excluded = True
+            weights[node.rel] = (0, node.files, node.bytes)
+
+    # 去掉位于其他排除项之下的重复项，再按权重从重到轻排列（权重相同时按路径）
+    filters = sorted(weights)
+    filters = [rel for rel in filters
+               if not any(rel != other and rel.startswith(other) for other in filters)]
+    filters.sort(key=weights.get, reverse=True)
+    return {
+        'filters': filters[:MAX_FILTERS],
+        'files': root.files,
+        'bytes': root.bytes,
+        'complete': not level,
+    }
+
+def write_ignore_filters(folder_path, filters):
+    """
+    把排除项写入 <文件夹>/.obsidian/app.json 的userIgnoreFilters，保留已有的设置和排除项
+    成功返回True
+    """
+    config_dir = os.path.join(folder_path, CONFIG_DIR_NAME)
+    app_config_path = os.path.join(config_dir, APP_CONFIG_NAME)
+
+    app_config = {}
+    try:
+        with open(app_config_path, 'r', encoding='utf-8') as f:
+            app_config = json.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[警告] 读取 {app_config_path} 失败，不写入排除项: {e}")
+        return False
+
+    existing = app_config.get(IGNORE_FILTERS_KEY) or []
+    merged = existing + [rel for rel in filters if rel not in existing]
+    if merged == existing:
+        return True
+    app_config[IGNORE_FILTERS_KEY] = merged
+
+    try:
+        from config_lock import atomic_write_text
+        os.makedirs(config_dir, exist_ok=True)
+        atomic_write_text(app_config_path, json.dumps(app_config, ensure_ascii=False, indent=2))
+    except Exception as e:
+        print(f"[警告] 写入 {app_config_path} 失败: {e}")
+        return False
+    return True
+
+def prescan_vault(folder_path):
+    """
+    预扫描新vault，找到需要排除的子树时合并写入app.json，返回扫描结果
+    只应对新注册的vault调用（可以已按模板生成了.obsidian），不修改已在使用的vault
+    """
+    start = time.perf_counter()
+    result = prescan_folder(folder_path)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    scanned = f"{result['files']} 个文件，{result['bytes'] // (1024 * 1024)} MB"
+    if not result['complete']:
+        scanned += "（超出扫描预算，只扫描了一部分）"
+    print(f"[信息] 预扫描新vault: {scanned}，耗时 {elapsed_ms:.0f} ms")
+
+    if result['filters'] and write_ignore_filters(folder_path, result['filters']):
+        print(f"[成功] 已在Obsidian中排除 {len(result['filters'])} 个目录: {', '.join(result['filters'][:5])}"
+              + (" ..." if len(result['filters']) > 5 else ""))
+    return result
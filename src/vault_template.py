@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+vault模板模块
+新vault默认没有任何配置，每个vault都要重新安装、下载同一组插件。
+在config.json中用vault_template指定一个模板（.obsidian目录，或包含.obsidian的vault），
+新注册的vault会按模板生成.obsidian：插件的代码文件（main.js、manifest.json、styles.css）
+用硬链接代替复制，几乎不占额外磁盘空间；设置文件、主题和CSS片段仍然复制，每个vault可以独立修改
+"""
+import os
+
+CONFIG_DIR_NAME = '.obsidian'
+LINK_MODE = 'hardlink'
+COPY_MODE = 'copy'
+TEMPLATE_MODES = (LINK_MODE, COPY_MODE)
+
+PLUGINS_DIR_NAME = 'plugins'
+# .obsidian/plugins/<插件>/下的代码文件只随插件更新整体替换，可以在vault之间共享；
+# data.json保存各vault自己的设置，主题和CSS片段常被原地编辑，都必须复制
+LINKED_PLUGIN_FILES = {'main.js', 'manifest.json', 'styles.css'}
+# 记录模板vault自身打开的文件和窗口布局，不复制到新vault
+SKIPPED_FILES = {'workspace.json', 'workspace-mobile.json'}
+
+def resolve_template_dir(template_path):
+    """模板路径可以是.obsidian目录本身或包含.obsidian的vault，返回.obsidian目录，无效时返回None"""
+    if not template_path:
+        return None
+    nested = os.path.join(template_path, CONFIG_DIR_NAME)
+    if os.path.isdir(nested):
+        return nested
+    if os.path.isdir(template_path):
+        return template_path
+    return None
+
+def _is_shared(rel_parts):
+    """模板中的文件是否属于可以硬链接共享的插件代码"""
+    return (len(rel_parts) == 3 and rel_parts[0] == PLUGINS_DIR_NAME
+            and rel_parts[2] in LINKED_PLUGIN_FILES)
+
+def materialize_template(template_dir, target_dir, mode=LINK_MODE):
+    """
+    把模板目录生成到target_dir（不能已存在）
+    返回 {'linked': 文件数, 'copied': 文件数, 'linked_bytes': ..., 'copied_bytes': ...}
+    硬链接失败（模板与目标不在同一卷、文件系统不支持等）时改为复制
+    """
+    import shutil
+    stats = {'linked': 0, 'copied': 0, 'linked_bytes': 0, 'copied_bytes': 0}
+    link = mode == LINK_MODE
+
+    for directory, dirnames, filenames in os.walk(template_dir):
+        rel_dir = os.path.relpath(directory, template_dir)
+        rel_parts = [] if rel_dir == os.curdir else rel_dir.split(os.sep)
+        os.makedirs(os.path.join(target_dir, *rel_parts), exist_ok=True)
+        for name in filenames:
+            if not rel_parts and name in SKIPPED_FILES:
+                continue
+            source = os.path.join(directory, name)
+            target = os.path.join(target_dir, *rel_parts, name)
+            size = os.path.getsize(source)
+            if link and _is_shared(rel_parts + [name]):
+                try:
+                    os.link(source, target)
+                    stats['linked'] += 1
+                    stats['linked_bytes'] += size
+                    continue
+                except OSError as e:
+                    print(f"[信息] 无法创建硬链接，改为复制: {e}")
+                    link = False
+            shutil.copy2(source, target)
+            stats['copied'] += 1
+            stats['copied_bytes'] += size
+    return stats
+
+def seed_vault(template_path, folder_path, mode=LINK_MODE):
+    """
+    按模板为新vault生成.obsidian目录；先生成到临时目录再重命名，Obsidian不会读到一半的配置
+    返回materialize_template的统计，模板无效、目标已有.obsidian或失败时返回None
+    """
+    import shutil
+    template_dir = resolve_template_dir(template_path)
+    if template_dir is None:
+        print(f"[警告] vault模板不存在: {template_path}")
+        return None
+
+    config_dir = os.path.join(folder_path, CONFIG_DIR_NAME)
+    if os.path.exists(config_dir):
+        return None
+    if os.path.abspath(template_dir) == os.path.abspath(config_dir):
+        return None
+
+    tmp_dir = f"{config_dir}.{os.getpid()}.tmp"
+    try:
+        stats = materialize_template(template_dir, tmp_dir, mode)
+        os.replace(tmp_dir, config_dir)
+    except OSError as e:
+        print(f"[警告] 按模板生成vault配置失败: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return None
+
+    print(f"[成功] 已按模板生成vault配置: 硬链接 {stats['linked']} 个文件"
+          f"（{stats['linked_bytes'] // 1024} KB），复制 {stats['copied']} 个文件"
+          f"（{stats['copied_bytes'] // 1024} KB）")
+    return stats
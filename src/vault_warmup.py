@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+vault预读模块
+Obsidian第一次打开一个大文件夹时要为每篇笔记建立索引，耗时主要在冷盘读取上；
+本工具在Obsidian启动之前就知道要打开的文件夹，可以在后台线程中先读一遍笔记和附件，
+把文件内容预先载入系统页缓存。预读受字节数和时间预算限制，默认关闭
+"""
+import os
+import time
+
+WARMUP_WORKERS = 8
+WARMUP_MAX_MB = 512
+WARMUP_SECONDS = 10
+READ_CHUNK = 1024 * 1024
+
+NOTE_EXTENSIONS = {'.md', '.canvas'}
+ATTACHMENT_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.svg', '.webp', '.avif',
+    '.pdf', '.mp3', '.wav', '.m4a', '.ogg', '.mp4', '.webm', '.ogv', '.mov', '.mkv',
+}
+# .obsidian目录中的配置Obsidian启动时就会读取，其他隐藏目录（.git、.trash等）跳过
+CONFIG_DIR_NAME = '.obsidian'
+
+class VaultWarmup:
+    """
+    一次预读：先并行遍历文件夹，再按 配置和笔记 -> 附件 的顺序并行读取文件，
+    读满max_bytes或超过seconds秒时停止
+    """
+
+    def __init__(self, folder_paths, max_bytes=WARMUP_MAX_MB * 1024 * 1024,
+                 seconds=WARMUP_SECONDS, workers=WARMUP_WORKERS):
+        import threading
+        self.folder_paths = list(folder_paths)
+        self.max_bytes = max_bytes
+        self.seconds = seconds
+        self.workers = workers
+        self.deadline = None
+        self.lock = threading.Lock()
+        # 每个工作线程复用一个读取缓冲区
+        self.local = threading.local()
+        self.thread = None
+        self.bytes_read = 0
+        self.files_read = 0
+        self.dirs_scanned = 0
+        self.elapsed = None
+
+    def _exhausted(self):
+        """预算是否已用完"""
+        return self.bytes_read >= self.max_bytes or time.monotonic() >= self.deadline
+
+    def _scan_dir(self, path):
+        """列出一个目录，返回 (子目录, 笔记和配置文件, 附件)"""
+        subdirs, notes, attachments = [], [], []
+        if self._exhausted():
+            return subdirs, notes, attachments
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not name.startswith('.') or name == CONFIG_DIR_NAME:
+                                subdirs.append(entry.path)
+                            continue
+                    except OSError:
+                        continue
+                    ext = os.path.splitext(name)[1].lower()
+                    if ext in NOTE_EXTENSIONS or os.path.basename(path) == CONFIG_DIR_NAME:
+                        notes.append(entry.path)
+                    elif ext in ATTACHMENT_EXTENSIONS:
+                        attachments.append(entry.path)
+        except OSError:
+            pass
+        return subdirs, notes, attachments
+
+    def _read_file(self, path):
+        """读取文件内容（丢弃），不超过剩余的字节预算"""
+        if self._exhausted():
+            return
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None:
+            buffer = self.local.buffer = bytearray(READ_CHUNK)
+        try:
+            with open(path, 'rb', buffering=0) as f:
+                while not self._exhausted():
+                    n = f.readinto(buffer)
+                    if not n:
+                        break
+                    with self.lock:
+                        self.bytes_read += n
+        except OSError:
+            return
+        with self.lock:
+            self.files_read += 1
+
+    def run(self):
+        """执行预读（阻塞），返回本次预读的统计"""
+        from concurrent.futures import ThreadPoolExecutor
+        start = time.monotonic()
+        self.deadline = start + self.seconds
+
+        notes, attachments = [], []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='vault-warmup') as pool:
+            # 按层并行遍历；同时得到的笔记按遍历顺序（浅层优先）读取
+            level = self.folder_paths
+            while level and not self._exhausted():
+                next_level = []
+                for subdirs, dir_notes, dir_attachments in pool.map(self._scan_dir, level):
+                    next_level.extend(subdirs)
+                    notes.extend(dir_notes)
+                    attachments.extend(dir_attachments)
+                self.dirs_scanned += len(level)
+                level = next_level
+
+            for files in (notes, attachments):
+                if self._exhausted():
+                    break
+                for _ in pool.map(self._read_file, files):
+                    pass
+
+        self.elapsed = time.monotonic() - start
+        return self.stats()
+
+    def start(self):
+        """在后台线程中开始预读"""
+        import threading
+        self.thread = threading.Thread(target=self.run, name='vault-warmup', daemon=True)
+        self.thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """等待后台预读结束，返回是否已结束"""
+        if self.thread is None:
+            return True
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+    def stats(self):
+        return {
+            'dirs': self.dirs_scanned,
+            'files': self.files_read,
+            'bytes': self.bytes_read,
+            'seconds': self.elapsed,
+        }
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共设置：把src加入导入路径（与benchmarks/common.py相同）
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+自动清理的检查：在启动Obsidian之后、释放obsidian.json写入锁之后执行
+"""
+import os
+import json
+
+import pytest
+
+import main
+import vault_compact
+from config_lock import ConfigLock
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path))
+    config_path = main.get_obsidian_config_path()
+    os.makedirs(os.path.dirname(config_path))
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({'vaults': {}}, f)
+    tool_dir = tmp_path / 'ObsidianFolderOpener'
+    tool_dir.mkdir()
+    (tool_dir / 'config.json').write_text(json.dumps({'auto_compact_kb': 1}))
+    folder = tmp_path / 'notes'
+    folder.mkdir()
+
+    events = []
+
+    def launch(exe_path, from_saved, folder_paths=None, interactive=True):
+        events.append('launch')
+        return True
+
+    def compact(config_path, threshold_kb, max_vaults=None):
+        other = ConfigLock()
+        assert other.acquire(blocking=False) is False
+        events.append('compact')
+    monkeypatch.setattr(main, 'start_discovered_obsidian', launch)
+    monkeypatch.setattr(vault_compact, 'auto_compact', compact)
+    return str(folder), events
+
+def test_compacts_after_launch_holding_its_own_lock(setup):
+    folder, events = setup
+    assert main.open_folders_with_obsidian([folder], ('/opt/Obsidian.exe', True))
+    assert events == ['launch', 'compact']
+    lock = ConfigLock()
+    assert lock.acquire(blocking=False)
+    lock.release()
+
+def test_skips_compaction_while_another_process_writes(setup):
+    _, events = setup
+    holder = ConfigLock()
+    assert holder.acquire(blocking=False)
+    try:
+        assert main.auto_compact_if_needed() is None
+    finally:
+        holder.release()
+    assert events == []
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+跨进程锁和请求队列的检查：锁争用、持锁进程处理排队请求、遗留凭据的清理
+"""
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+
+import pytest
+
+import config_lock
+from config_lock import (ConfigLock, acquire_or_enqueue, drain_queue, complete_requests,
+                         enqueue_request, get_queue_dir)
+
+@pytest.fixture(autouse=True)
+def appdata(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path))
+    return tmp_path
+
+def write_ticket(name, folders):
+    os.makedirs(get_queue_dir(), exist_ok=True)
+    path = os.path.join(get_queue_dir(), name)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'folders': folders}, file)
+    return path
+
+def queued_tickets():
+    try:
+        return [name for name in os.listdir(get_queue_dir()) if name.endswith('.json')]
+    except FileNotFoundError:
+        return []
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+def test_lock_contention():
+    holder = ConfigLock()
+    other = ConfigLock()
+    assert holder.acquire(blocking=False)
+    try:
+        assert not other.acquire(blocking=False)
+        assert not other.acquire(timeout=0.05)
+    finally:
+        holder.release()
+    assert other.acquire(blocking=False)
+    other.release()
+
+def test_holder_handles_queued_request():
+    holder = ConfigLock()
+    assert holder.acquire(blocking=False)
+    outcome = []
+
+    def wait_for_lock():
+        outcome.append(acquire_or_enqueue(['/vaults/a']))
+    waiter = threading.Thread(target=wait_for_lock)
+    waiter.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not queued_tickets():
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        folders, tickets = drain_queue()
+        assert folders == ['/vaults/a']
+        complete_requests(tickets)
+    finally:
+        holder.release()
+        waiter.join(5)
+    assert outcome == [(None, True)]
+
+def test_drain_returns_requests_in_order():
+    first = enqueue_request(['/vaults/a', '/vaults/b'])
+    second = enqueue_request(['/vaults/c'])
+    folders, tickets = drain_queue()
+    assert folders == ['/vaults/a', '/vaults/b', '/vaults/c']
+    assert tickets == [first, second]
+    complete_requests(tickets)
+    assert drain_queue() == ([], [])
+
+def test_stale_tickets_are_pruned():
+    now_ns = time.time_ns()
+    old_age_ns = (config_lock.QUEUE_TICKET_MAX_AGE + 1) * 1_000_000_000
+    too_old = write_ticket(f"{now_ns - old_age_ns}-{os.getpid()}.json", ['/vaults/old'])
+    orphaned = write_ticket(f"{now_ns}-{dead_pid()}.json", ['/vaults/orphan'])
+    unnamed = write_ticket("garbage.json", ['/vaults/garbage'])
+    fresh = write_ticket(f"{now_ns}-{os.getpid()}.json", ['/vaults/fresh'])
+
+    folders, tickets = drain_queue()
+    assert folders == ['/vaults/fresh']
+    assert tickets == [fresh]
+    for path in (too_old, orphaned, unnamed):
+        assert not os.path.exists(path)
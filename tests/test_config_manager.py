@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+ConfigStore的检查：batch中合并写入，写入经原子替换，失败时原文件不变
+"""
+import os
+import json
+
+import pytest
+
+import config_lock
+from config_manager import ConfigStore
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path))
+    return ConfigStore()
+
+def config_files(store):
+    return sorted(os.listdir(os.path.dirname(store.config_file)))
+
+def test_batch_writes_once(store, monkeypatch):
+    writes = []
+    real_write = config_lock.atomic_write_text
+
+    def write(path, content):
+        writes.append(path)
+        real_write(path, content)
+    monkeypatch.setattr(config_lock, 'atomic_write_text', write)
+    with store.batch():
+        for i in range(3):
+            config = store.load()
+            config['count'] = i
+            store.save(config)
+    assert writes == [store.config_file]
+    with open(store.config_file, encoding='utf-8') as f:
+        assert json.load(f)['count'] == 2
+    assert config_files(store) == ['config.json']
+
+def test_failed_replace_keeps_previous_file(store, monkeypatch):
+    config = store.load()
+    config['obsidian_path'] = 'C:\\Obsidian'
+    assert store.save(config)
+
+    def fail(src, dst):
+        raise PermissionError("locked")
+    with monkeypatch.context() as patch:
+        patch.setattr(config_lock, 'REPLACE_RETRIES', 1)
+        patch.setattr(config_lock.os, 'replace', fail)
+        config = store.load()
+        config['obsidian_path'] = 'D:\\Obsidian'
+        assert not store.save(config)
+
+    with open(store.config_file, encoding='utf-8') as f:
+        assert json.load(f)['obsidian_path'] == 'C:\\Obsidian'
+    assert config_files(store) == ['config.json']
+    assert store.load()['obsidian_path'] == 'C:\\Obsidian'
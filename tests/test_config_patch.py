@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+obsidian.json文本补丁的回归检查
+补丁后的文本经json.loads后必须与完整解析（VaultIndex + add_vault_to_config）的结果一致，
+不支持的结构必须抛出PatchFallback
+"""
+import os
+import json
+import time
+
+import pytest
+
+import main
+import config_patch
+from config_patch import build_patched_text, PatchFallback
+from vault_index import VaultIndex
+
+NOW = 1700000000.0
+
+@pytest.fixture(autouse=True)
+def fixed_time(monkeypatch):
+    monkeypatch.setattr(time, 'time', lambda: NOW)
+
+@pytest.fixture
+def folders(tmp_path):
+    paths = []
+    for name in ('alpha', 'beta', 'gamma', 'zeta'):
+        path = tmp_path / name
+        path.mkdir()
+        paths.append(str(path))
+    return paths
+
+def make_text(folders, open_names=('alpha',), extra=None):
+    """Obsidian写出的紧凑格式，前三个文件夹已是vault"""
+    vaults = {}
+    for i, path in enumerate(folders[:3]):
+        info = {'path': path, 'ts': 1000 + i}
+        if os.path.basename(path) in open_names:
+            info['open'] = True
+        vaults[main.generate_vault_id(path)] = info
+    config = {'vaults': vaults}
+    config.update(extra or {})
+    return json.dumps(config, ensure_ascii=False, separators=(',', ':'))
+
+def full_parse(text, folder_paths):
+    config = json.loads(text)
+    index = VaultIndex(config)
+    main.clean_existing_open_flags(config, index)
+    for folder_path in folder_paths:
+        main.add_vault_to_config(config, folder_path, index)
+    return config
+
+def open_ids(config):
+    return {vault_id for vault_id, info in config['vaults'].items() if info.get('open')}
+
+def assert_matches_full_parse(text, folder_paths):
+    new_text, results, changed = build_patched_text(text, folder_paths,
+                                                    main.generate_vault_id)
+    patched = json.loads(new_text)
+    expected = full_parse(text, folder_paths)
+    assert changed > 0
+    assert patched == expected
+    return patched, results
+
+def test_existing_vault_moves_open_flag(folders):
+    text = make_text(folders, extra={'frame': 'hidden'})
+    patched, results = assert_matches_full_parse(text, [folders[1]])
+    beta_id = main.generate_vault_id(folders[1])
+    assert open_ids(patched) == {beta_id}
+    assert patched['vaults'][beta_id]['ts'] == int(NOW * 1000)
+    assert results == [(folders[1], beta_id, False)]
+
+def test_new_vault_is_added(folders):
+    text = make_text(folders)
+    patched, results = assert_matches_full_parse(text, [folders[3]])
+    new_id = main.generate_vault_id(folders[3])
+    assert len(patched['vaults']) == 4
+    assert open_ids(patched) == {new_id}
+    assert results == [(folders[3], new_id, True)]
+
+def test_clears_every_other_open_flag(folders):
+    text = make_text(folders, open_names=('alpha', 'beta'))
+    patched, _ = assert_matches_full_parse(text, [folders[2], folders[3]])
+    assert open_ids(patched) == {main.generate_vault_id(path) for path in folders[2:]}
+
+def test_reopening_the_open_vault_skips_the_write(folders):
+    text = make_text(folders)
+    new_text, results, changed = build_patched_text(text, [folders[0]],
+                                                    main.generate_vault_id)
+    assert changed == 0
+    assert new_text is text
+    # 与完整解析只差目标vault的ts
+    expected = full_parse(text, [folders[0]])
+    alpha_id = main.generate_vault_id(folders[0])
+    expected['vaults'][alpha_id]['ts'] = json.loads(text)['vaults'][alpha_id]['ts']
+    assert json.loads(new_text) == expected
+    assert results == [(folders[0], alpha_id, False)]
+
+def test_missing_folder_is_skipped(folders, tmp_path):
+    text = make_text(folders)
+    missing = str(tmp_path / 'missing')
+    # 没有有效的文件夹时patch_obsidian_config不写入补丁后的文本
+    _, results, _ = build_patched_text(text, [missing], main.generate_vault_id)
+    assert results == []
+
+@pytest.mark.parametrize('layout', ['vaults_not_first', 'indented', 'unknown_member',
+                                    'escaped_path'])
+def test_unsupported_layouts_fall_back(folders, layout):
+    if layout == 'vaults_not_first':
+        config = json.loads(make_text(folders))
+        text = json.dumps({'frame': 'hidden', 'vaults': config['vaults']},
+                          separators=(',', ':'))
+    elif layout == 'indented':
+        text = json.dumps(json.loads(make_text(folders)), indent=2)
+    elif layout == 'unknown_member':
+        text = make_text(folders).replace('"open":true}',
+                                          '"open":true,"pinned":true}')
+    else:
+        config = json.loads(make_text(folders))
+        beta_id = main.generate_vault_id(folders[1])
+        config['vaults'][beta_id]['path'] = folders[1] + '-笔记'
+        text = json.dumps(config, ensure_ascii=True, separators=(',', ':'))
+        folders[1] += '-笔记'
+        os.mkdir(folders[1])
+    with pytest.raises(PatchFallback):
+        build_patched_text(text, [folders[1]], main.generate_vault_id)
+
+def test_case_variant_falls_back_when_paths_ignore_case(folders, monkeypatch):
+    monkeypatch.setattr(config_patch, 'CASE_INSENSITIVE_PATHS', True)
+    monkeypatch.setattr(os.path, 'normcase', str.lower)
+    config = json.loads(make_text(folders))
+    beta_id = main.generate_vault_id(folders[1])
+    config['vaults'][beta_id]['path'] = folders[1].upper()
+    text = json.dumps(config, ensure_ascii=False, separators=(',', ':'))
+    with pytest.raises(PatchFallback):
+        build_patched_text(text, [folders[1]], main.generate_vault_id)
+    # zeta与BETA长度相同但normcase后不同，不触发回退
+    patched, _, _ = build_patched_text(text, [folders[3]], main.generate_vault_id)
+    assert main.generate_vault_id(folders[3]) in json.loads(patched)['vaults']
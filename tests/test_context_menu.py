@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+右键菜单注册的检查（内存注册表）：重复注册不写入、只写回被改动的值、删除后不留下键、重复删除不失败
+"""
+import os
+
+import pytest
+
+from registry_backend import InMemoryRegistry, HKEY_CLASSES_ROOT, set_backend
+from context_menu import (get_context_menu_entries, find_outdated_entries,
+                          register_context_menu, unregister_context_menu,
+                          CONTEXT_MENU_KEY, BACKGROUND_MENU_KEY)
+
+OBSIDIAN_DIR = 'Obsidian'
+EXE_PATH = os.path.join('Obsidian', 'open_folder_with_obsidian.exe')
+
+@pytest.fixture
+def registry():
+    registry = InMemoryRegistry()
+    previous = set_backend(registry)
+    yield registry
+    set_backend(previous)
+
+@pytest.fixture
+def entries():
+    return get_context_menu_entries(OBSIDIAN_DIR, EXE_PATH)
+
+def key_exists(registry, subkey):
+    try:
+        registry.close_key(registry.open_key(HKEY_CLASSES_ROOT, subkey))
+        return True
+    except FileNotFoundError:
+        return False
+
+def value_count(entries):
+    return sum(len(values) for _, values in entries)
+
+def test_entries_cover_both_menus(entries):
+    assert [subkey for subkey, _ in entries] == [
+        CONTEXT_MENU_KEY, CONTEXT_MENU_KEY + "\\command",
+        BACKGROUND_MENU_KEY, BACKGROUND_MENU_KEY + "\\command",
+    ]
+    exe_path = os.path.normpath(EXE_PATH)
+    assert entries[1][1] == {"": f'{exe_path} "%1"'}
+    assert entries[3][1] == {"": f'{exe_path} "%V"'}
+    assert entries[0][1]["MultiSelectModel"] == "Player"
+    assert "MultiSelectModel" not in get_context_menu_entries(
+        OBSIDIAN_DIR, EXE_PATH, multi_select=False)[0][1]
+
+def test_first_registration_writes_every_value(registry, entries):
+    assert find_outdated_entries(entries) == entries
+    assert register_context_menu(entries) == value_count(entries)
+    assert find_outdated_entries(entries) == []
+
+def test_repeat_registration_writes_nothing(registry, entries):
+    register_context_menu(entries)
+    assert register_context_menu(entries) == 0
+
+def test_only_changed_value_is_written_back(registry, entries):
+    register_context_menu(entries)
+    registry.set_value(HKEY_CLASSES_ROOT, entries[1][0], "", r"C:\Old\open.exe")
+    assert find_outdated_entries(entries) == [entries[1]]
+    assert register_context_menu(entries) == 1
+    assert find_outdated_entries(entries) == []
+
+def test_unregister_removes_every_key(registry, entries):
+    register_context_menu(entries)
+    assert unregister_context_menu() == 4
+    assert not any(key_exists(registry, subkey) for subkey, _ in entries)
+    assert unregister_context_menu() == 0
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+快速路径导入时间预算的回归检查
+运行benchmarks/bench_import_time.py，超出预算或快速路径加载了冷路径模块时失败
+"""
+import os
+import sys
+import subprocess
+
+BENCH_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'benchmarks', 'bench_import_time.py')
+
+def test_fast_path_import_budget():
+    result = subprocess.run([sys.executable, BENCH_SCRIPT, '--runs', '5'],
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
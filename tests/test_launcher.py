@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+auto启动策略的检查：没有单实例锁时不扫描进程表，有锁且找到实例时交给该实例
+"""
+import os
+
+import pytest
+
+import launcher
+from launcher import HandoffLauncher, ProcessTable, build_open_uri
+
+class FakeProcessTable(ProcessTable):
+    def __init__(self, pid=None):
+        self.pid = pid
+        self.calls = 0
+
+    def find(self, image_name):
+        self.calls += 1
+        return self.pid
+
+@pytest.fixture
+def spawned(monkeypatch):
+    calls = []
+
+    def spawn(args, shell=False):
+        calls.append(args)
+    monkeypatch.setattr(launcher, '_spawn', spawn)
+    return calls
+
+@pytest.fixture
+def lock_path(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path))
+    path = launcher.get_instance_lock_path()
+    os.makedirs(os.path.dirname(path))
+    return path
+
+def test_no_lock_skips_process_table(lock_path, spawned):
+    table = FakeProcessTable(pid=1234)
+    assert HandoffLauncher(table).launch('/opt/Obsidian.exe', ['/vaults/a'])
+    assert table.calls == 0
+    assert spawned == [['/opt/Obsidian.exe']]
+
+def test_stale_lock_falls_back_to_direct_launch(lock_path, spawned):
+    os.symlink('host-1', lock_path)
+    table = FakeProcessTable(pid=None)
+    HandoffLauncher(table).launch('/opt/Obsidian.exe', ['/vaults/a'])
+    assert table.calls == 1
+    assert spawned == [['/opt/Obsidian.exe']]
+
+def test_running_instance_gets_the_folders(lock_path, spawned):
+    with open(lock_path, 'w'):
+        pass
+    table = FakeProcessTable(pid=1234)
+    HandoffLauncher(table).launch('/opt/Obsidian.exe', ['/vaults/a', '/vaults/b'])
+    assert spawned == [['/opt/Obsidian.exe', build_open_uri('/vaults/a')],
+                       ['/opt/Obsidian.exe', build_open_uri('/vaults/b')]]
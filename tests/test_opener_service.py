@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+常驻服务的检查：Obsidian.exe和obsidian.json的缓存失效、不等待用户按键、连接并行处理
+"""
+import os
+import json
+import time
+import socket
+import threading
+
+import pytest
+
+import main
+import opener_service
+from opener_service import OpenerService, send_open_request
+
+@pytest.fixture(autouse=True)
+def appdata(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path))
+    monkeypatch.setattr(main, '_config_cache', None)
+    return tmp_path
+
+@pytest.fixture
+def exe_path(tmp_path):
+    path = tmp_path / 'Obsidian' / 'Obsidian.exe'
+    path.parent.mkdir()
+    path.write_text('exe')
+    return str(path)
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+def test_resolved_exe_is_cached_until_files_change(appdata, exe_path, monkeypatch):
+    calls = []
+
+    def discover():
+        calls.append(None)
+        return exe_path, True
+    monkeypatch.setattr(main, 'discover_obsidian_exe', discover)
+    config_file = appdata / 'ObsidianFolderOpener' / 'config.json'
+    config_file.parent.mkdir()
+    config_file.write_text('{}')
+
+    service = OpenerService()
+    assert service.resolve_obsidian_exe() == (exe_path, True)
+    assert service.resolve_obsidian_exe() == (exe_path, True)
+    assert len(calls) == 1
+    bump_mtime(config_file)
+    service.resolve_obsidian_exe()
+    assert len(calls) == 2
+    bump_mtime(exe_path)
+    service.resolve_obsidian_exe()
+    assert len(calls) == 3
+
+def test_missing_exe_is_not_cached(monkeypatch):
+    calls = []
+
+    def discover():
+        calls.append(None)
+        return None, False
+    monkeypatch.setattr(main, 'discover_obsidian_exe', discover)
+    service = OpenerService()
+    service.resolve_obsidian_exe()
+    service.resolve_obsidian_exe()
+    assert len(calls) == 2
+
+def test_service_never_waits_for_input(monkeypatch):
+    def fail(prompt=""):
+        raise AssertionError("常驻服务不应等待用户按键")
+    monkeypatch.setattr(main, 'safe_input', fail)
+    assert main.start_discovered_obsidian(None, False, ['/vaults/a'],
+                                          interactive=False) is False
+
+def test_obsidian_config_is_cached_until_modified(appdata):
+    config_path = main.get_obsidian_config_path()
+    os.makedirs(os.path.dirname(config_path))
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({'vaults': {}}, f)
+    main.enable_obsidian_config_cache()
+
+    config = main.read_obsidian_config()
+    assert main.read_obsidian_config() is config
+    config['vaults']['a'] = {'path': '/vaults/a', 'ts': 1}
+    assert main.write_obsidian_config(config)
+    assert main.read_obsidian_config() is config
+
+    # Obsidian自己改写了文件
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({'vaults': {'b': {'path': '/vaults/b', 'ts': 2}}}, f)
+    bump_mtime(config_path)
+    assert list(main.read_obsidian_config()['vaults']) == ['b']
+
+def test_slow_client_does_not_block_others(monkeypatch):
+    service = OpenerService()
+    opened = []
+    monkeypatch.setattr(service, 'preload', lambda: None)
+    monkeypatch.setattr(service, 'open_folders', opened.append)
+    threading.Thread(target=service.serve_forever, daemon=True).start()
+    deadline = time.monotonic() + 5
+    while opener_service.read_service_info() is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    info = opener_service.read_service_info()
+    with socket.create_connection((opener_service.SERVICE_HOST, info['port'])):
+        # 第一个连接不发送请求，第二个请求仍应立即得到确认
+        start = time.monotonic()
+        assert send_open_request(['/vaults/a'])
+        assert time.monotonic() - start < opener_service.ACK_TIMEOUT / 2
+    deadline = time.monotonic() + 5
+    while not opened:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert opened == [['/vaults/a']]
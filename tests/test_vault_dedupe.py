@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+跨vault插件去重的检查：只合并插件代码文件，日志损坏、中途退出后撤销、链接目标已被替换
+"""
+import os
+import pathlib
+
+import pytest
+
+import vault_dedupe
+from vault_dedupe import (collect_plugin_files, find_duplicates, link_duplicates,
+                          rollback_last_run, get_journal_path)
+
+PLUGIN_CODE = b'x' * 8192
+
+@pytest.fixture(autouse=True)
+def appdata(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path / 'appdata'))
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+@pytest.fixture
+def vaults(tmp_path):
+    """三个vault装有同一个插件，另有各自的设置、主题和CSS片段"""
+    paths = []
+    for i in range(3):
+        vault = tmp_path / f"vault-{i}"
+        config_dir = vault / '.obsidian'
+        write(config_dir / 'plugins' / 'dataview' / 'main.js', PLUGIN_CODE)
+        write(config_dir / 'plugins' / 'dataview' / 'data.json', PLUGIN_CODE)
+        write(config_dir / 'themes' / 'Minimal' / 'theme.css', PLUGIN_CODE)
+        write(config_dir / 'snippets' / 'wide.css', PLUGIN_CODE)
+        paths.append(str(vault))
+    return paths
+
+def main_js(vault):
+    return os.path.join(vault, '.obsidian', 'plugins', 'dataview', 'main.js')
+
+def dedupe(vault_paths):
+    groups, _ = find_duplicates(collect_plugin_files(vault_paths, workers=2), workers=2)
+    return groups, link_duplicates(groups)
+
+def test_only_plugin_code_is_linked(vaults):
+    groups, (linked, _) = dedupe(vaults)
+    assert linked == 2
+    assert [sorted(path for path, _ in group) for group in groups] == \
+        [sorted(main_js(vault) for vault in vaults)]
+    for vault in vaults[1:]:
+        assert os.path.samefile(main_js(vaults[0]), main_js(vault))
+    for rel in (('plugins', 'dataview', 'data.json'),
+                ('themes', 'Minimal', 'theme.css'),
+                ('snippets', 'wide.css')):
+        assert os.stat(os.path.join(vaults[1], '.obsidian', *rel)).st_nlink == 1
+
+def test_corrupt_journal_is_replaced(vaults):
+    journal_path = get_journal_path()
+    os.makedirs(os.path.dirname(journal_path))
+    with open(journal_path, 'w', encoding='utf-8') as f:
+        f.write('{"runs": [')
+    assert rollback_last_run() is None
+
+    _, (linked, _) = dedupe(vaults)
+    assert linked == 2
+    assert rollback_last_run() == 2
+    assert all(os.stat(main_js(vault)).st_nlink == 1 for vault in vaults)
+
+def test_interrupted_run_can_be_rolled_back(vaults, monkeypatch):
+    original = os.stat(main_js(vaults[2]))
+    real_link = os.link
+    calls = []
+
+    def link_then_interrupt(source, target):
+        calls.append(target)
+        if len(calls) > 1:
+            raise KeyboardInterrupt
+        real_link(source, target)
+    monkeypatch.setattr(vault_dedupe.os, 'link', link_then_interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        dedupe(vaults)
+    monkeypatch.setattr(vault_dedupe.os, 'link', real_link)
+
+    # 日志中仍是计划替换的全部文件；只恢复实际替换了的文件
+    assert os.path.samefile(main_js(vaults[0]), main_js(vaults[1]))
+    assert rollback_last_run() == 1
+    for vault in vaults:
+        assert os.stat(main_js(vault)).st_nlink == 1
+        with open(main_js(vault), 'rb') as f:
+            assert f.read() == PLUGIN_CODE
+    assert os.stat(main_js(vaults[2])).st_ino == original.st_ino
+    assert rollback_last_run() is None
+
+def test_rollback_skips_files_whose_target_was_replaced(vaults):
+    dedupe(vaults)
+    # 插件在第一个vault中整体更新：链接目标换成了新文件，另外两个vault仍共享旧文件
+    target = main_js(vaults[0])
+    os.remove(target)
+    write(pathlib.Path(target), b'y' * 8192)
+    shared = os.stat(main_js(vaults[1]))
+    assert shared.st_nlink == 2
+    assert not os.path.samefile(target, main_js(vaults[1]))
+
+    assert rollback_last_run() == 0
+    assert os.stat(main_js(vaults[1])).st_ino == shared.st_ino
+    assert os.path.samefile(main_js(vaults[1]), main_js(vaults[2]))
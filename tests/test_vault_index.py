@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+VaultIndex的检查：按路径查找（单次扫描和路径映射）、normcase、实质修改的判断
+"""
+import os
+
+import pytest
+
+import vault_index
+from vault_index import VaultIndex
+
+def make_config(tmp_path, open_names=('alpha',)):
+    vaults = {}
+    for i, name in enumerate(('alpha', 'beta', 'gamma')):
+        info = {'path': str(tmp_path / name), 'ts': 1000 + i}
+        if name in open_names:
+            info['open'] = True
+        vaults[f"id-{name}"] = info
+    return {'vaults': vaults}
+
+def test_find_scans_once_then_uses_path_map(tmp_path):
+    index = VaultIndex(make_config(tmp_path))
+    assert index.find(str(tmp_path / 'beta')) == 'id-beta'
+    assert index._path_to_id is None
+    assert index.find(str(tmp_path / 'gamma')) == 'id-gamma'
+    assert index._path_to_id is not None
+    assert index.find(str(tmp_path / 'missing')) is None
+
+def test_find_resolves_relative_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    index = VaultIndex(make_config(tmp_path))
+    assert index.find('alpha') == 'id-alpha'
+    assert index.find(os.path.join('sub', '..', 'beta')) == 'id-beta'
+
+@pytest.mark.parametrize('lookups', [1, 2])
+def test_find_ignores_case_when_paths_do(tmp_path, monkeypatch, lookups):
+    monkeypatch.setattr(vault_index, 'CASE_INSENSITIVE_PATHS', True)
+    monkeypatch.setattr(os.path, 'normcase', str.lower)
+    index = VaultIndex(make_config(tmp_path))
+    if lookups == 2:
+        # 第一次查找之后构建路径映射，键同样经过normcase
+        index.find(str(tmp_path / 'alpha'))
+    assert index.find(str(tmp_path / 'BETA')) == 'id-beta'
+    index.add('id-delta', {'path': str(tmp_path / 'delta'), 'ts': 0})
+    assert index.find(str(tmp_path / 'Delta')) == 'id-delta'
+
+def test_find_keeps_case_when_paths_do(tmp_path, monkeypatch):
+    monkeypatch.setattr(vault_index, 'CASE_INSENSITIVE_PATHS', False)
+    index = VaultIndex(make_config(tmp_path))
+    assert index.find(str(tmp_path / 'BETA')) is None
+
+def test_touch_and_reopen_are_not_dirty(tmp_path):
+    index = VaultIndex(make_config(tmp_path))
+    assert not index.is_dirty()
+    index.touch('id-alpha', 2000)
+    assert index.clear_open_flags() == ['id-alpha']
+    index.mark_open('id-alpha')
+    assert not index.is_dirty()
+
+def test_moving_the_open_flag_is_dirty(tmp_path):
+    config = make_config(tmp_path)
+    index = VaultIndex(config)
+    index.clear_open_flags()
+    index.mark_open('id-beta')
+    assert index.is_dirty()
+    assert [vault_id for vault_id, info in config['vaults'].items()
+            if info.get('open')] == ['id-beta']
+
+def test_added_vault_is_dirty(tmp_path):
+    index = VaultIndex(make_config(tmp_path, open_names=()))
+    index.add('id-delta', {'path': str(tmp_path / 'delta'), 'ts': 0})
+    assert index.is_dirty()
+    assert len(index) == 4
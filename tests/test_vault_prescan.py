@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+新vault预扫描的检查：构建目录只在完整扫描后排除，大量非笔记文件的子树从外层排除
+"""
+import pytest
+
+import vault_prescan
+from vault_prescan import prescan_folder
+
+def make_files(directory, names):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (directory / name).write_text('x')
+
+@pytest.fixture
+def project(tmp_path):
+    make_files(tmp_path, ['README.md'])
+    make_files(tmp_path / 'docs', ['index.md'])
+    make_files(tmp_path / 'dist' / 'assets', ['app.js'])
+    make_files(tmp_path / 'node_modules' / 'left-pad', ['index.js'])
+    return tmp_path
+
+def test_scanned_build_dir_is_excluded(project):
+    result = prescan_folder(str(project))
+    assert result['complete']
+    assert result['filters'] == ['node_modules/', 'dist/']
+
+def test_build_dir_with_notes_is_kept(project):
+    make_files(project / 'dist' / 'assets', ['notes.md'])
+    assert prescan_folder(str(project))['filters'] == ['node_modules/']
+
+def test_unscanned_build_dir_is_kept(project):
+    # 根目录扫描完即超出预算，dist未扫描，不能按"没有笔记"排除
+    result = prescan_folder(str(project), max_entries=1)
+    assert not result['complete']
+    assert result['filters'] == ['node_modules/']
+
+def test_partially_scanned_build_dir_is_kept(project):
+    # 根目录和dist已扫描，dist/assets未扫描
+    result = prescan_folder(str(project), max_entries=5)
+    assert not result['complete']
+    assert result['filters'] == ['node_modules/']
+
+def test_heavy_subtree_is_excluded_at_outermost_level(tmp_path, monkeypatch):
+    monkeypatch.setattr(vault_prescan, 'HEAVY_FILES', 4)
+    make_files(tmp_path / 'data', ['a.csv', 'b.csv'])
+    make_files(tmp_path / 'data' / 'raw', ['c.csv', 'd.csv', 'e.csv', 'f.csv'])
+    make_files(tmp_path / 'notes', ['a.md'])
+    result = prescan_folder(str(tmp_path))
+    assert result['filters'] == ['data/']
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+vault模板的检查：只硬链接插件代码，设置、主题和CSS片段复制，workspace.json不复制
+"""
+import os
+
+from vault_template import seed_vault
+
+TEMPLATE_FILES = {
+    'plugins/dataview/main.js': True,
+    'plugins/dataview/manifest.json': True,
+    'plugins/dataview/styles.css': True,
+    'plugins/dataview/data.json': False,
+    'themes/Minimal/theme.css': False,
+    'themes/Minimal/manifest.json': False,
+    'snippets/wide.css': False,
+    'appearance.json': False,
+}
+
+def test_seed_links_only_plugin_code(tmp_path):
+    template = tmp_path / 'template' / '.obsidian'
+    for rel in list(TEMPLATE_FILES) + ['workspace.json']:
+        path = template / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    folder = tmp_path / 'vault'
+    folder.mkdir()
+
+    stats = seed_vault(str(template.parent), str(folder))
+    assert (stats['linked'], stats['copied']) == (3, 5)
+    config_dir = folder / '.obsidian'
+    for rel, linked in TEMPLATE_FILES.items():
+        assert os.path.samefile(template / rel, config_dir / rel) == linked, rel
+        assert (config_dir / rel).read_text() == rel
+    assert not (config_dir / 'workspace.json').exists()